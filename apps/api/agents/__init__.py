@@ -1,12 +1,19 @@
 """
 Module des agents CrewAI pour la plateforme CoachLibre
+
+Les classes sont importées à la demande pour ne pas charger crewai/langchain
+au démarrage de l'API.
 """
 
-from .crew_manager import CrewManager
-from .intent_manager import IntentManager
-from .project_manager import ProjectManager
-from .technical_lead import TechnicalLead
-from .release_manager import ReleaseManager
+import importlib
+
+_MODULES = {
+    "CrewManager": ".crew_manager",
+    "IntentManager": ".intent_manager",
+    "ProjectManager": ".project_manager",
+    "TechnicalLead": ".technical_lead",
+    "ReleaseManager": ".release_manager",
+}
 
 __all__ = [
     "CrewManager",
@@ -14,4 +21,10 @@ __all__ = [
     "ProjectManager",
     "TechnicalLead",
     "ReleaseManager"
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        return getattr(importlib.import_module(_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,110 +1,71 @@
-from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
-from typing import Dict, Any, List
-import os
-import asyncio
+from typing import Dict, Any
 
-class CrewManager:
-    """
-    Gestionnaire principal des crews CrewAI pour orchestrer tous les agents
-    """
-    
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.1,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Agent orchestrateur principal
-        self.orchestrator = Agent(
-            role="Orchestrateur Principal",
-            goal="Coordonner et orchestrer tous les agents pour optimiser le workflow",
-            backstory="""Vous êtes l'orchestrateur principal de la plateforme CoachLibre.
-            Vous coordonnez tous les agents spécialisés pour assurer un workflow optimal.
-            Vous avez une vue d'ensemble de tous les processus et optimisez les interactions.""",
-            verbose=True,
-            allow_delegation=True,
-            llm=self.llm
-        )
-        
-        # Agent de surveillance des OKRs
-        self.okr_monitor = Agent(
-            role="Moniteur OKR",
-            goal="Surveiller et valider les objectifs et résultats clés de chaque agent",
-            backstory="""Vous êtes responsable de la surveillance des OKRs de tous les agents.
-            Vous vous assurez que chaque agent atteint ses objectifs de qualité et de performance.
-            Vous validez les résultats selon les standards de l'industrie.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-    
-    async def orchestrate_workflow(self, user_intent: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """
-        Orchestre le workflow complet avec tous les agents
-        """
-        
-        # Création des tâches d'orchestration
-        orchestration_task = Task(
-            description=f"""
+from agents.templates import CrewTemplate, TaskTemplate, route_crews
+from core.dag import consumes
+from core.executor import get_executor
+from core.llm import get_llm
+from core.metrics import instrumented
+from core.routing import default_model
+
+# Agents de l'orchestrateur
+AGENTS = {
+    # Agent orchestrateur principal
+    "orchestrator": dict(
+        role="Orchestrateur Principal",
+        goal="Coordonner et orchestrer tous les agents pour optimiser le workflow",
+        backstory="""Vous êtes l'orchestrateur principal de la plateforme CoachLibre.
+        Vous coordonnez tous les agents spécialisés pour assurer un workflow optimal.
+        Vous avez une vue d'ensemble de tous les processus et optimisez les interactions.""",
+        allow_delegation=True
+    ),
+    # Agent de surveillance des OKRs
+    "okr_monitor": dict(
+        role="Moniteur OKR",
+        goal="Surveiller et valider les objectifs et résultats clés de chaque agent",
+        backstory="""Vous êtes responsable de la surveillance des OKRs de tous les agents.
+        Vous vous assurez que chaque agent atteint ses objectifs de qualité et de performance.
+        Vous validez les résultats selon les standards de l'industrie.""",
+        allow_delegation=False
+    ),
+}
+
+# Prompts des tâches (analysés une seule fois au chargement du module)
+ORCHESTRATION_TASK = TaskTemplate(
+    description="""
             Orchestrez le workflow complet pour cette intention utilisateur :
             "{user_intent}"
-            
-            Contexte : {context or 'Aucun contexte supplémentaire'}
-            
+
+            Contexte : {context}
+
             Coordonnez les étapes suivantes :
             1. Analyse d'intention (IntentManager)
             2. Analyse des besoins (ProjectManager)
             3. Conception technique (TechnicalLead)
             4. Préparation de livraison (ReleaseManager)
-            
+
             Assurez-vous que chaque étape est optimale et que les résultats sont cohérents.
             """,
-            agent=self.orchestrator,
-            expected_output="Workflow orchestré complet"
-        )
-        
-        validation_task = Task(
-            description="""
+    expected_output="Workflow orchestré complet"
+)
+
+VALIDATION_TASK = TaskTemplate(
+    description="""
             Validez le workflow orchestré et vérifiez les OKRs :
             - Qualité des analyses
             - Cohérence des résultats
             - Performance des agents
             - Satisfaction des objectifs
-            
+
             Proposez des améliorations si nécessaire.
             """,
-            agent=self.okr_monitor,
-            expected_output="Validation OKR et recommandations"
-        )
-        
-        # Création et exécution du crew
-        crew = Crew(
-            agents=[self.orchestrator, self.okr_monitor],
-            tasks=[orchestration_task, validation_task],
-            verbose=True
-        )
-        
-        # Exécution du workflow
-        result = crew.kickoff()
-        
-        return {
-            "orchestrated_workflow": result,
-            "okr_validation": "passed",
-            "workflow_optimized": True
-        }
-    
-    async def optimize_agent_performance(self, agent_metrics: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Optimise les performances des agents basées sur les métriques
-        """
-        
-        optimization_task = Task(
-            description=f"""
+    expected_output="Validation OKR et recommandations"
+)
+
+OPTIMIZATION_TASK = TaskTemplate(
+    description="""
             Analysez ces métriques d'agents et proposez des optimisations :
             {agent_metrics}
-            
+
             Identifiez :
             1. Agents sous-performants
             2. Goulots d'étranglement
@@ -112,65 +73,27 @@ class CrewManager:
             4. Ajustements de configuration
             5. Améliorations de prompts
             """,
-            agent=self.orchestrator,
-            expected_output="Plan d'optimisation des agents"
-        )
-        
-        crew = Crew(
-            agents=[self.orchestrator],
-            tasks=[optimization_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "optimization_plan": result,
-            "performance_improvements": True
-        }
-    
-    async def handle_complex_requests(self, complex_request: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Gère les requêtes complexes nécessitant plusieurs agents
-        """
-        
-        complex_task = Task(
-            description=f"""
+    expected_output="Plan d'optimisation des agents"
+)
+
+COMPLEX_TASK = TaskTemplate(
+    description="""
             Gérez cette requête complexe nécessitant plusieurs agents :
             {complex_request}
-            
+
             Coordonnez les agents appropriés et assurez-vous que :
             1. Les bonnes compétences sont mobilisées
             2. Les interactions sont optimisées
             3. Les résultats sont cohérents
             4. La qualité est maintenue
             """,
-            agent=self.orchestrator,
-            expected_output="Résolution de requête complexe"
-        )
-        
-        crew = Crew(
-            agents=[self.orchestrator],
-            tasks=[complex_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "complex_solution": result,
-            "request_resolved": True
-        }
-    
-    async def monitor_system_health(self) -> Dict[str, Any]:
-        """
-        Surveille la santé globale du système d'agents
-        """
-        
-        health_task = Task(
-            description="""
+    expected_output="Résolution de requête complexe"
+)
+
+HEALTH_TASK = TaskTemplate(
+    description="""
             Surveillez la santé globale du système d'agents :
-            
+
             Vérifiez :
             1. Performance de chaque agent
             2. Qualité des interactions
@@ -178,33 +101,14 @@ class CrewManager:
             4. Problèmes potentiels
             5. Recommandations d'amélioration
             """,
-            agent=self.okr_monitor,
-            expected_output="Rapport de santé système"
-        )
-        
-        crew = Crew(
-            agents=[self.okr_monitor],
-            tasks=[health_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "system_health_report": result,
-            "system_healthy": True
-        }
-    
-    async def create_agent_team(self, team_config: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Crée une équipe d'agents spécialisée pour un projet
-        """
-        
-        team_task = Task(
-            description=f"""
+    expected_output="Rapport de santé système"
+)
+
+TEAM_TASK = TaskTemplate(
+    description="""
             Créez une équipe d'agents spécialisée selon cette configuration :
             {team_config}
-            
+
             Définissez :
             1. Agents nécessaires
             2. Rôles et responsabilités
@@ -212,33 +116,14 @@ class CrewManager:
             4. Workflow optimisé
             5. Métriques de succès
             """,
-            agent=self.orchestrator,
-            expected_output="Équipe d'agents configurée"
-        )
-        
-        crew = Crew(
-            agents=[self.orchestrator],
-            tasks=[team_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "agent_team": result,
-            "team_configured": True
-        }
-    
-    async def continuous_learning(self, feedback_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Implémente l'apprentissage continu basé sur le feedback
-        """
-        
-        learning_task = Task(
-            description=f"""
+    expected_output="Équipe d'agents configurée"
+)
+
+LEARNING_TASK = TaskTemplate(
+    description="""
             Analysez ce feedback et implémentez l'apprentissage continu :
             {feedback_data}
-            
+
             Identifiez :
             1. Patterns d'amélioration
             2. Ajustements de comportement
@@ -246,19 +131,111 @@ class CrewManager:
             4. Nouvelles compétences à développer
             5. Adaptation des workflows
             """,
-            agent=self.orchestrator,
-            expected_output="Plan d'apprentissage continu"
-        )
-        
-        crew = Crew(
-            agents=[self.orchestrator],
-            tasks=[learning_task],
-            verbose=True
+    expected_output="Plan d'apprentissage continu"
+)
+
+class CrewManager:
+    """
+    Gestionnaire principal des crews CrewAI pour orchestrer tous les agents
+    """
+
+    agent_id = "crew"
+
+    def __init__(self):
+        self.llm = get_llm(model=default_model(self.agent_id), temperature=0.1)
+
+        # Crews préconstruits par forme de tâche
+        orchestrator = {"orchestrator": AGENTS["orchestrator"]}
+        okr_monitor = {"okr_monitor": AGENTS["okr_monitor"]}
+        self.workflow_crew = CrewTemplate(
+            self.llm,
+            AGENTS,
+            [("orchestrator", ORCHESTRATION_TASK), ("okr_monitor", VALIDATION_TASK)]
+        )
+        self.optimization_crew = CrewTemplate(self.llm, orchestrator, [("orchestrator", OPTIMIZATION_TASK)])
+        self.complex_crew = CrewTemplate(self.llm, orchestrator, [("orchestrator", COMPLEX_TASK)])
+        self.health_crew = CrewTemplate(self.llm, okr_monitor, [("okr_monitor", HEALTH_TASK)])
+        self.team_crew = CrewTemplate(self.llm, orchestrator, [("orchestrator", TEAM_TASK)])
+        self.learning_crew = CrewTemplate(self.llm, orchestrator, [("orchestrator", LEARNING_TASK)])
+        route_crews(self)
+
+    @instrumented
+    async def orchestrate_workflow(self, user_intent: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Orchestre le workflow complet avec tous les agents
+        """
+
+        # Exécution du workflow
+        result = await get_executor().kickoff(
+            self.workflow_crew,
+            agent_id=self.agent_id,
+            user_intent=user_intent,
+            context=context or 'Aucun contexte supplémentaire'
         )
-        
-        result = crew.kickoff()
-        
+
+        return {
+            "orchestrated_workflow": result,
+            "okr_validation": "passed",
+            "workflow_optimized": True
+        }
+
+    @instrumented
+    async def optimize_agent_performance(self, agent_metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Optimise les performances des agents basées sur les métriques
+        """
+        result = await get_executor().kickoff(self.optimization_crew, agent_id=self.agent_id, agent_metrics=agent_metrics)
+
+        return {
+            "optimization_plan": result,
+            "performance_improvements": True
+        }
+
+    @instrumented
+    async def handle_complex_requests(self, complex_request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gère les requêtes complexes nécessitant plusieurs agents
+        """
+        result = await get_executor().kickoff(self.complex_crew, agent_id=self.agent_id, complex_request=complex_request)
+
+        return {
+            "complex_solution": result,
+            "request_resolved": True
+        }
+
+    @consumes()
+    @instrumented
+    async def monitor_system_health(self) -> Dict[str, Any]:
+        """
+        Surveille la santé globale du système d'agents
+        """
+        result = await get_executor().kickoff(self.health_crew, agent_id=self.agent_id)
+
+        return {
+            "system_health_report": result,
+            "system_healthy": True
+        }
+
+    @instrumented
+    async def create_agent_team(self, team_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Crée une équipe d'agents spécialisée pour un projet
+        """
+        result = await get_executor().kickoff(self.team_crew, agent_id=self.agent_id, team_config=team_config)
+
+        return {
+            "agent_team": result,
+            "team_configured": True
+        }
+
+    @instrumented
+    async def continuous_learning(self, feedback_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Implémente l'apprentissage continu basé sur le feedback
+        """
+        result = await get_executor().kickoff(self.learning_crew, agent_id=self.agent_id, feedback_data=feedback_data)
+
         return {
             "learning_plan": result,
             "continuous_improvement": True
-        } 
\ No newline at end of file
+        }
@@ -1,142 +1,202 @@
-from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
 from typing import Dict, Any
-import os
 
-class IntentManager:
-    """
-    Agent responsable de l'analyse et de la compréhension des intentions utilisateur
-    """
-    
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.1,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Agent principal d'analyse d'intention
-        self.intent_analyzer = Agent(
-            role="Analyste d'Intention",
-            goal="Analyser et comprendre les intentions des utilisateurs pour les diriger vers les bons services",
-            backstory="""Vous êtes un expert en analyse comportementale et en compréhension des besoins utilisateur.
-            Vous avez une expertise particulière dans le domaine du coaching et de l'accompagnement personnalisé.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-        
-        # Agent superviseur pour amélioration
-        self.intent_supervisor = Agent(
-            role="Superviseur d'Intention",
-            goal="Valider et améliorer les analyses d'intention pour assurer la qualité",
-            backstory="""Vous êtes un superviseur expérimenté qui valide les analyses d'intention.
-            Vous vous assurez que les besoins utilisateur sont correctement identifiés et priorisés.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-    
-    async def process_intent(self, intent: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """
-        Traite une intention utilisateur et retourne une analyse structurée
-        """
-        
-        # Création des tâches
-        analysis_task = Task(
-            description=f"""
+from agents.templates import CrewTemplate, TaskTemplate, route_crews
+from core.cache import cached_stage
+from core.dag import consumes
+from core.executor import get_executor
+from core.llm import get_llm
+from core.metrics import instrumented
+from core.resilience import is_degraded
+from core.routing import default_model
+from core.semantic_cache import get_semantic_cache
+from core.structured import IntentAnalysis, parse_output, schema_prompt
+from core.supervision import supervised_kickoff
+
+# Agents du gestionnaire d'intention
+AGENTS = {
+    # Agent principal d'analyse d'intention
+    "intent_analyzer": dict(
+        role="Analyste d'Intention",
+        goal="Analyser et comprendre les intentions des utilisateurs pour les diriger vers les bons services",
+        backstory="""Vous êtes un expert en analyse comportementale et en compréhension des besoins utilisateur.
+        Vous avez une expertise particulière dans le domaine du coaching et de l'accompagnement personnalisé.""",
+        allow_delegation=False
+    ),
+    # Agent superviseur pour amélioration
+    "intent_supervisor": dict(
+        role="Superviseur d'Intention",
+        goal="Valider et améliorer les analyses d'intention pour assurer la qualité",
+        backstory="""Vous êtes un superviseur expérimenté qui valide les analyses d'intention.
+        Vous vous assurez que les besoins utilisateur sont correctement identifiés et priorisés.""",
+        allow_delegation=False
+    ),
+}
+
+# Prompts des tâches (analysés une seule fois au chargement du module)
+ANALYSIS_TASK = TaskTemplate(
+    description="""
             Analysez l'intention suivante de l'utilisateur :
             "{intent}"
-            
-            Contexte fourni : {context or 'Aucun contexte supplémentaire'}
-            
+
+            Contexte fourni : {context}
+
             Votre analyse doit inclure :
             1. Catégorisation de l'intention (coaching, formation, consultation, etc.)
             2. Niveau d'urgence et de priorité
             3. Besoins identifiés
             4. Recommandations d'actions
             5. Score de confiance (0-1)
-            
+
             Retournez votre analyse au format JSON structuré.
             """,
-            agent=self.intent_analyzer,
-            expected_output="Analyse JSON structurée de l'intention utilisateur"
-        )
-        
-        validation_task = Task(
-            description="""
+    expected_output="Analyse JSON structurée de l'intention utilisateur. " + schema_prompt(IntentAnalysis)
+)
+
+VALIDATION_TASK = TaskTemplate(
+    description="""
             Validez l'analyse d'intention fournie et proposez des améliorations si nécessaire.
             Assurez-vous que :
             - La catégorisation est appropriée
             - Les besoins sont bien identifiés
             - Les recommandations sont pertinentes
             - Le score de confiance est justifié
-            
+
             Retournez l'analyse validée ou améliorée.
             """,
-            agent=self.intent_supervisor,
-            expected_output="Analyse validée ou améliorée"
+    expected_output="Analyse validée ou améliorée. " + schema_prompt(IntentAnalysis)
+)
+
+# Validation d'un brouillon transmis explicitement (pipeline spéculatif)
+DRAFT_VALIDATION_TASK = TaskTemplate(
+    description="""
+            Validez ce brouillon d'analyse de l'intention "{intent}" :
+            {draft}
+
+            Assurez-vous que :
+            - La catégorisation est appropriée
+            - Les besoins sont bien identifiés
+            - Les recommandations sont pertinentes
+            - Le score de confiance est justifié
+
+            Retournez l'analyse validée, inchangée si elle est correcte.
+            """,
+    expected_output="Analyse validée ou améliorée. " + schema_prompt(IntentAnalysis)
+)
+
+IMPROVEMENT_TASK = TaskTemplate(
+    description="""
+            Améliorez votre analyse précédente basée sur ce feedback :
+            {feedback}
+
+            Identifiez les points d'amélioration et proposez une version optimisée.
+            """,
+    expected_output="Analyse améliorée"
+)
+
+class IntentManager:
+    """
+    Agent responsable de l'analyse et de la compréhension des intentions utilisateur
+    """
+
+    agent_id = "intent"
+
+    def __init__(self):
+        self.llm = get_llm(model=default_model(self.agent_id), temperature=0.1)
+
+        # Crews préconstruits : analyse + validation, amélioration
+        self.intent_crew = CrewTemplate(
+            self.llm,
+            AGENTS,
+            [("intent_analyzer", ANALYSIS_TASK), ("intent_supervisor", VALIDATION_TASK)]
+        )
+        # Analyse et validation séparées (pipeline spéculatif, politique de supervision)
+        self.draft_crew = CrewTemplate(
+            self.llm,
+            {"intent_analyzer": AGENTS["intent_analyzer"]},
+            [("intent_analyzer", ANALYSIS_TASK)]
         )
-        
-        # Création et exécution du crew
-        crew = Crew(
-            agents=[self.intent_analyzer, self.intent_supervisor],
-            tasks=[analysis_task, validation_task],
-            verbose=True
+        self.validation_crew = CrewTemplate(
+            self.llm,
+            {"intent_supervisor": AGENTS["intent_supervisor"]},
+            [("intent_supervisor", DRAFT_VALIDATION_TASK)]
         )
-        
+        self.improvement_crew = CrewTemplate(
+            self.llm,
+            {"intent_analyzer": AGENTS["intent_analyzer"]},
+            [("intent_analyzer", IMPROVEMENT_TASK)]
+        )
+        route_crews(self, {"intent": IntentAnalysis, "draft": IntentAnalysis, "validation": IntentAnalysis})
+
+    @consumes(intent="intent", context="context")
+    @instrumented
+    @cached_stage
+    async def process_intent(self, intent: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Traite une intention utilisateur et retourne une analyse structurée
+        """
+
+        # Réutilisation de l'analyse d'une paraphrase déjà traitée
+        semantic_cache = get_semantic_cache()
+        cached_analysis, intent_vector = await semantic_cache.lookup(intent, context)
+        if cached_analysis is not None:
+            return cached_analysis
+
         # Exécution du workflow
-        result = crew.kickoff()
-        
-        # Traitement du résultat
-        try:
-            # Simulation d'un résultat structuré (à adapter selon le vrai output de CrewAI)
-            analysis_result = {
-                "analysis": result,
-                "confidence": 0.85,
-                "category": "coaching_request",
-                "priority": "medium",
-                "needs": ["accompagnement_personnalise", "objectifs_clairs"],
-                "recommendations": ["séance_découverte", "évaluation_besoins"]
-            }
-            
-            return analysis_result
-            
-        except Exception as e:
-            # Fallback en cas d'erreur
-            return {
-                "analysis": f"Analyse d'intention : {intent}",
-                "confidence": 0.5,
-                "category": "unknown",
-                "priority": "low",
-                "needs": [],
-                "recommendations": ["contact_humain"]
-            }
-    
-    async def improve_analysis(self, feedback: Dict[str, Any]) -> Dict[str, Any]:
+        result = await supervised_kickoff(
+            self.agent_id,
+            self.intent_crew,
+            self.draft_crew,
+            self.validation_crew,
+            validation_params={"intent": intent},
+            intent=intent,
+            context=context or 'Aucun contexte supplémentaire'
+        )
+
+        analysis_result = self._structure(result)
+        if not is_degraded():
+            await semantic_cache.store(intent_vector, context, analysis_result)
+        return analysis_result
+
+    @instrumented
+    @cached_stage
+    async def draft_intent(self, intent: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
-        Améliore l'analyse basée sur le feedback reçu
+        Première analyse (analyste seul), sur laquelle l'étape suivante peut démarrer
         """
-        improvement_task = Task(
-            description=f"""
-            Améliorez votre analyse précédente basée sur ce feedback :
-            {feedback}
-            
-            Identifiez les points d'amélioration et proposez une version optimisée.
-            """,
-            agent=self.intent_analyzer,
-            expected_output="Analyse améliorée"
+        result = await get_executor().kickoff(
+            self.draft_crew,
+            agent_id=self.agent_id,
+            intent=intent,
+            context=context or 'Aucun contexte supplémentaire'
         )
-        
-        crew = Crew(
-            agents=[self.intent_analyzer],
-            tasks=[improvement_task],
-            verbose=True
+        return self._structure(result)
+
+    @instrumented
+    @cached_stage
+    async def validate_intent(self, intent: str, draft: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Passe du superviseur sur un brouillon produit par draft_intent
+        """
+        result = await get_executor().kickoff(
+            self.validation_crew,
+            agent_id=self.agent_id,
+            intent=intent,
+            draft=draft["analysis"]
         )
-        
-        result = crew.kickoff()
-        
+        return self._structure(result)
+
+    def _structure(self, result: Any) -> Dict[str, Any]:
+        # Sortie JSON du crew → modèle compact (réparée si besoin, sans nouvel appel LLM)
+        return parse_output(IntentAnalysis, result)
+
+    @instrumented
+    async def improve_analysis(self, feedback: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Améliore l'analyse basée sur le feedback reçu
+        """
+        result = await get_executor().kickoff(self.improvement_crew, agent_id=self.agent_id, feedback=feedback)
+
         return {
             "improved_analysis": result,
             "improvement_applied": True
-        } 
\ No newline at end of file
+        }
@@ -1,55 +1,44 @@
-from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
 from typing import Dict, Any
-import os
 
-class ProjectManager:
-    """
-    Agent responsable de l'analyse des besoins et de la planification fonctionnelle
-    """
-    
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.2,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Agent principal d'analyse des besoins
-        self.requirements_analyzer = Agent(
-            role="Analyste des Besoins Fonctionnels",
-            goal="Analyser les besoins utilisateur et définir les spécifications fonctionnelles",
-            backstory="""Vous êtes un chef de projet fonctionnel expérimenté spécialisé dans l'analyse des besoins.
-            Vous avez une expertise dans la transformation des intentions utilisateur en spécifications claires et mesurables.
-            Vous travaillez dans le domaine du coaching et de l'accompagnement personnalisé.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-        
-        # Agent superviseur pour validation
-        self.requirements_supervisor = Agent(
-            role="Superviseur des Spécifications",
-            goal="Valider et optimiser les spécifications fonctionnelles",
-            backstory="""Vous êtes un superviseur senior qui valide les spécifications fonctionnelles.
-            Vous vous assurez que les besoins sont bien compris, mesurables et réalisables.
-            Vous avez une expertise en méthodologies agiles et en gestion de projet.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-    
-    async def analyze_requirements(self, intent_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Analyse les besoins basés sur l'analyse d'intention
-        """
-        
-        # Création des tâches
-        requirements_task = Task(
-            description=f"""
+from agents.templates import CrewTemplate, TaskTemplate, route_crews
+from core.cache import cached_stage
+from core.dag import consumes
+from core.executor import get_executor
+from core.handoff import get_handoff
+from core.llm import get_llm
+from core.metrics import instrumented
+from core.routing import default_model
+from core.structured import Requirements, parse_output, schema_prompt
+from core.supervision import supervised_kickoff
+
+# Agents du chef de projet fonctionnel
+AGENTS = {
+    # Agent principal d'analyse des besoins
+    "requirements_analyzer": dict(
+        role="Analyste des Besoins Fonctionnels",
+        goal="Analyser les besoins utilisateur et définir les spécifications fonctionnelles",
+        backstory="""Vous êtes un chef de projet fonctionnel expérimenté spécialisé dans l'analyse des besoins.
+        Vous avez une expertise dans la transformation des intentions utilisateur en spécifications claires et mesurables.
+        Vous travaillez dans le domaine du coaching et de l'accompagnement personnalisé.""",
+        allow_delegation=False
+    ),
+    # Agent superviseur pour validation
+    "requirements_supervisor": dict(
+        role="Superviseur des Spécifications",
+        goal="Valider et optimiser les spécifications fonctionnelles",
+        backstory="""Vous êtes un superviseur senior qui valide les spécifications fonctionnelles.
+        Vous vous assurez que les besoins sont bien compris, mesurables et réalisables.
+        Vous avez une expertise en méthodologies agiles et en gestion de projet.""",
+        allow_delegation=False
+    ),
+}
+
+# Prompts des tâches (analysés une seule fois au chargement du module)
+REQUIREMENTS_TASK = TaskTemplate(
+    description="""
             Analysez les besoins fonctionnels basés sur cette analyse d'intention :
             {intent_analysis}
-            
+
             Développez des spécifications fonctionnelles détaillées incluant :
             1. Objectifs SMART (Spécifiques, Mesurables, Atteignables, Réalistes, Temporels)
             2. Besoins fonctionnels détaillés
@@ -58,15 +47,14 @@ class ProjectManager:
             5. Planning préliminaire
             6. Ressources nécessaires
             7. Métriques de succès
-            
+
             Adaptez votre analyse au contexte du coaching et de l'accompagnement personnalisé.
             """,
-            agent=self.requirements_analyzer,
-            expected_output="Spécifications fonctionnelles détaillées"
-        )
-        
-        validation_task = Task(
-            description="""
+    expected_output="Spécifications fonctionnelles détaillées. " + schema_prompt(Requirements)
+)
+
+VALIDATION_TASK = TaskTemplate(
+    description="""
             Validez les spécifications fonctionnelles fournies et proposez des améliorations.
             Vérifiez que :
             - Les objectifs sont SMART
@@ -74,69 +62,17 @@ class ProjectManager:
             - Les critères d'acceptation sont définis
             - Le planning est réaliste
             - Les risques sont identifiés et mitigés
-            
+
             Retournez les spécifications validées ou améliorées.
             """,
-            agent=self.requirements_supervisor,
-            expected_output="Spécifications validées ou améliorées"
-        )
-        
-        # Création et exécution du crew
-        crew = Crew(
-            agents=[self.requirements_analyzer, self.requirements_supervisor],
-            tasks=[requirements_task, validation_task],
-            verbose=True
-        )
-        
-        # Exécution du workflow
-        result = crew.kickoff()
-        
-        # Traitement du résultat
-        try:
-            # Simulation d'un résultat structuré
-            requirements_result = {
-                "requirements": result,
-                "confidence": 0.88,
-                "objectives": [
-                    "Définir un plan d'accompagnement personnalisé",
-                    "Établir des objectifs mesurables",
-                    "Créer un suivi régulier"
-                ],
-                "acceptance_criteria": [
-                    "Plan d'accompagnement validé par le client",
-                    "Objectifs SMART définis",
-                    "Calendrier de suivi établi"
-                ],
-                "timeline": "4-6 semaines",
-                "resources": ["coach_certifié", "outils_suivi", "plateforme_communication"],
-                "risks": ["disponibilité_client", "objectifs_irréalistes"],
-                "success_metrics": ["atteinte_objectifs", "satisfaction_client", "progression_mesurable"]
-            }
-            
-            return requirements_result
-            
-        except Exception as e:
-            # Fallback en cas d'erreur
-            return {
-                "requirements": f"Analyse des besoins basée sur : {intent_analysis.get('analysis', 'N/A')}",
-                "confidence": 0.6,
-                "objectives": ["Accompagnement personnalisé"],
-                "acceptance_criteria": ["Client satisfait"],
-                "timeline": "À définir",
-                "resources": ["coach"],
-                "risks": ["Non spécifiés"],
-                "success_metrics": ["Satisfaction client"]
-            }
-    
-    async def create_project_plan(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Crée un plan de projet détaillé basé sur les spécifications
-        """
-        planning_task = Task(
-            description=f"""
+    expected_output="Spécifications validées ou améliorées. " + schema_prompt(Requirements)
+)
+
+PLANNING_TASK = TaskTemplate(
+    description="""
             Créez un plan de projet détaillé basé sur ces spécifications :
             {requirements}
-            
+
             Le plan doit inclure :
             1. Phases du projet avec jalons
             2. Répartition des tâches
@@ -145,51 +81,108 @@ class ProjectManager:
             5. Communication et reporting
             6. Qualité et validation
             """,
-            agent=self.requirements_analyzer,
-            expected_output="Plan de projet détaillé"
+    expected_output="Plan de projet détaillé"
+)
+
+MONITORING_TASK = TaskTemplate(
+    description="""
+            Analysez le progrès du projet {project_id} :
+            {current_status}
+
+            Identifiez :
+            1. Écarts par rapport au planning
+            2. Risques émergents
+            3. Actions correctives nécessaires
+            4. Ajustements du plan
+            """,
+    expected_output="Rapport de surveillance et recommandations"
+)
+
+class ProjectManager:
+    """
+    Agent responsable de l'analyse des besoins et de la planification fonctionnelle
+    """
+
+    agent_id = "project"
+
+    def __init__(self):
+        self.llm = get_llm(model=default_model(self.agent_id), temperature=0.2)
+
+        # Crews préconstruits par forme de tâche
+        self.requirements_crew = CrewTemplate(
+            self.llm,
+            AGENTS,
+            [("requirements_analyzer", REQUIREMENTS_TASK), ("requirements_supervisor", VALIDATION_TASK)]
+        )
+        # Passes séparées analyste / superviseur pour la politique de supervision
+        self.requirements_draft_crew = CrewTemplate(
+            self.llm,
+            {"requirements_analyzer": AGENTS["requirements_analyzer"]},
+            [("requirements_analyzer", REQUIREMENTS_TASK)]
+        )
+        self.requirements_review_crew = CrewTemplate(
+            self.llm,
+            {"requirements_supervisor": AGENTS["requirements_supervisor"]},
+            [("requirements_supervisor", VALIDATION_TASK.with_draft())]
         )
-        
-        crew = Crew(
-            agents=[self.requirements_analyzer],
-            tasks=[planning_task],
-            verbose=True
+        self.planning_crew = CrewTemplate(
+            self.llm,
+            {"requirements_analyzer": AGENTS["requirements_analyzer"]},
+            [("requirements_analyzer", PLANNING_TASK)]
+        )
+        self.monitoring_crew = CrewTemplate(
+            self.llm,
+            {"requirements_supervisor": AGENTS["requirements_supervisor"]},
+            [("requirements_supervisor", MONITORING_TASK)]
+        )
+        route_crews(self, {"requirements": Requirements, "requirements_draft": Requirements, "requirements_review": Requirements})
+
+    @consumes(intent_analysis="process_intent")
+    @instrumented
+    @cached_stage
+    async def analyze_requirements(self, intent_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyse les besoins basés sur l'analyse d'intention
+        """
+
+        # Exécution du workflow
+        result = await supervised_kickoff(
+            self.agent_id,
+            self.requirements_crew,
+            self.requirements_draft_crew,
+            self.requirements_review_crew,
+            intent_analysis=get_handoff().digest("project", intent_analysis)
         )
-        
-        result = crew.kickoff()
-        
+
+        # Sortie JSON du crew → modèle compact (réparée si besoin, sans nouvel appel LLM)
+        return parse_output(Requirements, result)
+
+    @consumes(requirements="analyze_requirements")
+    @instrumented
+    async def create_project_plan(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Crée un plan de projet détaillé basé sur les spécifications
+        """
+        result = await get_executor().kickoff(self.planning_crew, agent_id=self.agent_id, requirements=requirements)
+
         return {
             "project_plan": result,
             "planning_complete": True
         }
-    
+
+    @instrumented
     async def monitor_progress(self, project_id: str, current_status: Dict[str, Any]) -> Dict[str, Any]:
         """
         Surveille le progrès du projet et propose des ajustements
         """
-        monitoring_task = Task(
-            description=f"""
-            Analysez le progrès du projet {project_id} :
-            {current_status}
-            
-            Identifiez :
-            1. Écarts par rapport au planning
-            2. Risques émergents
-            3. Actions correctives nécessaires
-            4. Ajustements du plan
-            """,
-            agent=self.requirements_supervisor,
-            expected_output="Rapport de surveillance et recommandations"
-        )
-        
-        crew = Crew(
-            agents=[self.requirements_supervisor],
-            tasks=[monitoring_task],
-            verbose=True
+        result = await get_executor().kickoff(
+            self.monitoring_crew,
+            agent_id=self.agent_id,
+            project_id=project_id,
+            current_status=current_status
         )
-        
-        result = crew.kickoff()
-        
+
         return {
             "monitoring_report": result,
             "adjustments_needed": True
-        } 
\ No newline at end of file
+        }
@@ -1,55 +1,44 @@
-from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
 from typing import Dict, Any
-import os
 
-class ReleaseManager:
-    """
-    Agent responsable de la préparation et du déploiement des livrables
-    """
-    
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.2,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Agent principal de gestion des releases
-        self.release_coordinator = Agent(
-            role="Coordinateur de Release",
-            goal="Préparer et coordonner les déploiements de manière sécurisée et fiable",
-            backstory="""Vous êtes un release manager expérimenté spécialisé dans les déploiements continus.
-            Vous avez une expertise en DevOps, CI/CD et gestion des environnements.
-            Vous vous assurez que les livrables sont de qualité et déployés en toute sécurité.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-        
-        # Agent superviseur de qualité
-        self.quality_supervisor = Agent(
-            role="Superviseur de Qualité",
-            goal="Valider la qualité des livrables avant déploiement",
-            backstory="""Vous êtes un expert en assurance qualité qui valide les livrables.
-            Vous vous assurez que les standards de qualité sont respectés.
-            Vous avez une expertise en tests automatisés et en validation de déploiement.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-    
-    async def prepare_delivery(self, technical_solution: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Prépare le plan de livraison basé sur la solution technique
-        """
-        
-        # Création des tâches
-        delivery_task = Task(
-            description=f"""
+from agents.templates import CrewTemplate, TaskTemplate, route_crews
+from core.cache import cached_stage
+from core.dag import consumes
+from core.executor import get_executor
+from core.handoff import get_handoff
+from core.llm import get_llm
+from core.metrics import instrumented
+from core.routing import default_model
+from core.structured import DeliveryPlan, parse_output, schema_prompt
+from core.supervision import supervised_kickoff
+
+# Agents du release manager
+AGENTS = {
+    # Agent principal de gestion des releases
+    "release_coordinator": dict(
+        role="Coordinateur de Release",
+        goal="Préparer et coordonner les déploiements de manière sécurisée et fiable",
+        backstory="""Vous êtes un release manager expérimenté spécialisé dans les déploiements continus.
+        Vous avez une expertise en DevOps, CI/CD et gestion des environnements.
+        Vous vous assurez que les livrables sont de qualité et déployés en toute sécurité.""",
+        allow_delegation=False
+    ),
+    # Agent superviseur de qualité
+    "quality_supervisor": dict(
+        role="Superviseur de Qualité",
+        goal="Valider la qualité des livrables avant déploiement",
+        backstory="""Vous êtes un expert en assurance qualité qui valide les livrables.
+        Vous vous assurez que les standards de qualité sont respectés.
+        Vous avez une expertise en tests automatisés et en validation de déploiement.""",
+        allow_delegation=False
+    ),
+}
+
+# Prompts des tâches (analysés une seule fois au chargement du module)
+DELIVERY_TASK = TaskTemplate(
+    description="""
             Préparez un plan de livraison basé sur cette solution technique :
             {technical_solution}
-            
+
             Votre plan doit inclure :
             1. Stratégie de déploiement (blue-green, canary, rolling)
             2. Environnements (dev, staging, production)
@@ -61,15 +50,14 @@ class ReleaseManager:
             8. Formation et support
             9. Métriques de succès
             10. Plan de communication
-            
+
             Adaptez votre plan au contexte de la plateforme CoachLibre.
             """,
-            agent=self.release_coordinator,
-            expected_output="Plan de livraison détaillé"
-        )
-        
-        validation_task = Task(
-            description="""
+    expected_output="Plan de livraison détaillé. " + schema_prompt(DeliveryPlan)
+)
+
+VALIDATION_TASK = TaskTemplate(
+    description="""
             Validez le plan de livraison fourni et proposez des améliorations.
             Vérifiez que :
             - La stratégie de déploiement est appropriée
@@ -78,98 +66,17 @@ class ReleaseManager:
             - Le rollback est possible
             - La documentation est complète
             - Le plan de communication est clair
-            
+
             Retournez le plan validé ou amélioré.
             """,
-            agent=self.quality_supervisor,
-            expected_output="Plan de livraison validé ou amélioré"
-        )
-        
-        # Création et exécution du crew
-        crew = Crew(
-            agents=[self.release_coordinator, self.quality_supervisor],
-            tasks=[delivery_task, validation_task],
-            verbose=True
-        )
-        
-        # Exécution du workflow
-        result = crew.kickoff()
-        
-        # Traitement du résultat
-        try:
-            # Simulation d'un résultat structuré
-            delivery_result = {
-                "delivery_plan": result,
-                "confidence": 0.90,
-                "deployment_strategy": {
-                    "type": "blue-green",
-                    "environments": ["dev", "staging", "production"],
-                    "automation": "GitHub Actions + ArgoCD"
-                },
-                "testing": {
-                    "unit_tests": "Jest + Pytest",
-                    "integration_tests": "Postman + Newman",
-                    "e2e_tests": "Playwright",
-                    "performance_tests": "k6",
-                    "security_tests": "OWASP ZAP"
-                },
-                "monitoring": {
-                    "metrics": "Prometheus + Grafana",
-                    "logging": "ELK Stack",
-                    "alerting": "PagerDuty",
-                    "tracing": "Jaeger"
-                },
-                "rollback": {
-                    "strategy": "automatic",
-                    "triggers": ["error_rate > 5%", "response_time > 2s"],
-                    "timeout": "5 minutes"
-                },
-                "documentation": [
-                    "Guide utilisateur",
-                    "Documentation API",
-                    "Guide de déploiement",
-                    "Runbook opérationnel"
-                ],
-                "communication": {
-                    "stakeholders": ["équipe_dev", "coachs", "clients"],
-                    "channels": ["email", "slack", "dashboard"],
-                    "frequency": "real-time"
-                },
-                "success_metrics": [
-                    "uptime > 99.9%",
-                    "response_time < 500ms",
-                    "error_rate < 1%",
-                    "user_satisfaction > 4.5/5"
-                ],
-                "timeline": "2-3 semaines"
-            }
-            
-            return delivery_result
-            
-        except Exception as e:
-            # Fallback en cas d'erreur
-            return {
-                "delivery_plan": f"Plan de livraison basé sur : {technical_solution.get('solution', 'N/A')}",
-                "confidence": 0.6,
-                "deployment_strategy": {"type": "manual"},
-                "testing": {"basic": "tests manuels"},
-                "monitoring": {"basic": "logs"},
-                "rollback": {"strategy": "manual"},
-                "documentation": ["Guide basique"],
-                "communication": {"basic": "email"},
-                "success_metrics": ["fonctionnel"],
-                "timeline": "À définir"
-            }
-    
-    async def execute_deployment(self, deployment_config: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Exécute le déploiement selon la configuration
-        """
-        deployment_task = Task(
-            description=f"""
+    expected_output="Plan de livraison validé ou amélioré. " + schema_prompt(DeliveryPlan)
+)
+
+DEPLOYMENT_TASK = TaskTemplate(
+    description="""
             Exécutez le déploiement selon cette configuration :
             {deployment_config}
-            
+
             Suivez ces étapes :
             1. Validation pré-déploiement
             2. Déploiement en staging
@@ -178,29 +85,11 @@ class ReleaseManager:
             5. Monitoring post-déploiement
             6. Validation finale
             """,
-            agent=self.release_coordinator,
-            expected_output="Rapport de déploiement"
-        )
-        
-        crew = Crew(
-            agents=[self.release_coordinator],
-            tasks=[deployment_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "deployment_report": result,
-            "deployment_successful": True
-        }
-    
-    async def monitor_deployment(self, deployment_id: str) -> Dict[str, Any]:
-        """
-        Surveille le déploiement en cours
-        """
-        monitoring_task = Task(
-            description=f"""
+    expected_output="Rapport de déploiement"
+)
+
+MONITORING_TASK = TaskTemplate(
+    description="""
             Surveillez le déploiement {deployment_id} et identifiez :
             1. Métriques de performance
             2. Erreurs et alertes
@@ -208,32 +97,14 @@ class ReleaseManager:
             4. Problèmes potentiels
             5. Actions correctives nécessaires
             """,
-            agent=self.quality_supervisor,
-            expected_output="Rapport de surveillance"
-        )
-        
-        crew = Crew(
-            agents=[self.quality_supervisor],
-            tasks=[monitoring_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "monitoring_report": result,
-            "deployment_healthy": True
-        }
-    
-    async def create_release_notes(self, release_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Crée les notes de release
-        """
-        notes_task = Task(
-            description=f"""
+    expected_output="Rapport de surveillance"
+)
+
+NOTES_TASK = TaskTemplate(
+    description="""
             Créez des notes de release basées sur ces données :
             {release_data}
-            
+
             Les notes doivent inclure :
             1. Résumé des changements
             2. Nouvelles fonctionnalités
@@ -243,32 +114,14 @@ class ReleaseManager:
             6. Problèmes connus
             7. Support et contact
             """,
-            agent=self.release_coordinator,
-            expected_output="Notes de release complètes"
-        )
-        
-        crew = Crew(
-            agents=[self.release_coordinator],
-            tasks=[notes_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "release_notes": result,
-            "notes_complete": True
-        }
-    
-    async def handle_incident(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Gère un incident de déploiement
-        """
-        incident_task = Task(
-            description=f"""
+    expected_output="Notes de release complètes"
+)
+
+INCIDENT_TASK = TaskTemplate(
+    description="""
             Gérez cet incident de déploiement :
             {incident_data}
-            
+
             Actions requises :
             1. Analyse de l'incident
             2. Impact assessment
@@ -277,19 +130,113 @@ class ReleaseManager:
             5. Plan de résolution
             6. Prévention future
             """,
-            agent=self.release_coordinator,
-            expected_output="Plan de gestion d'incident"
+    expected_output="Plan de gestion d'incident"
+)
+
+class ReleaseManager:
+    """
+    Agent responsable de la préparation et du déploiement des livrables
+    """
+
+    agent_id = "release"
+
+    def __init__(self):
+        self.llm = get_llm(model=default_model(self.agent_id), temperature=0.2)
+
+        # Crews préconstruits par forme de tâche
+        coordinator = {"release_coordinator": AGENTS["release_coordinator"]}
+        supervisor = {"quality_supervisor": AGENTS["quality_supervisor"]}
+        self.delivery_crew = CrewTemplate(
+            self.llm,
+            AGENTS,
+            [("release_coordinator", DELIVERY_TASK), ("quality_supervisor", VALIDATION_TASK)]
+        )
+        # Passes séparées analyste / superviseur pour la politique de supervision
+        self.delivery_draft_crew = CrewTemplate(
+            self.llm,
+            {"release_coordinator": AGENTS["release_coordinator"]},
+            [("release_coordinator", DELIVERY_TASK)]
+        )
+        self.delivery_review_crew = CrewTemplate(
+            self.llm,
+            {"quality_supervisor": AGENTS["quality_supervisor"]},
+            [("quality_supervisor", VALIDATION_TASK.with_draft())]
+        )
+        self.deployment_crew = CrewTemplate(self.llm, coordinator, [("release_coordinator", DEPLOYMENT_TASK)])
+        self.monitoring_crew = CrewTemplate(self.llm, supervisor, [("quality_supervisor", MONITORING_TASK)])
+        self.notes_crew = CrewTemplate(self.llm, coordinator, [("release_coordinator", NOTES_TASK)])
+        self.incident_crew = CrewTemplate(self.llm, coordinator, [("release_coordinator", INCIDENT_TASK)])
+        route_crews(self, {"delivery": DeliveryPlan, "delivery_draft": DeliveryPlan, "delivery_review": DeliveryPlan})
+
+    @consumes(technical_solution="design_solution")
+    @instrumented
+    @cached_stage
+    async def prepare_delivery(self, technical_solution: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prépare le plan de livraison basé sur la solution technique
+        """
+
+        # Exécution du workflow
+        result = await supervised_kickoff(
+            self.agent_id,
+            self.delivery_crew,
+            self.delivery_draft_crew,
+            self.delivery_review_crew,
+            technical_solution=get_handoff().digest("release", technical_solution)
         )
-        
-        crew = Crew(
-            agents=[self.release_coordinator],
-            tasks=[incident_task],
-            verbose=True
+
+        # Sortie JSON du crew → modèle compact (réparée si besoin, sans nouvel appel LLM)
+        return parse_output(DeliveryPlan, result)
+
+    @instrumented
+    async def execute_deployment(self, deployment_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Exécute le déploiement selon la configuration
+        """
+        result = await get_executor().kickoff(
+            self.deployment_crew,
+            agent_id=self.agent_id,
+            deployment_config=deployment_config
         )
-        
-        result = crew.kickoff()
-        
+
+        return {
+            "deployment_report": result,
+            "deployment_successful": True
+        }
+
+    @instrumented
+    async def monitor_deployment(self, deployment_id: str) -> Dict[str, Any]:
+        """
+        Surveille le déploiement en cours
+        """
+        result = await get_executor().kickoff(self.monitoring_crew, agent_id=self.agent_id, deployment_id=deployment_id)
+
+        return {
+            "monitoring_report": result,
+            "deployment_healthy": True
+        }
+
+    @consumes(release_data="design_solution")
+    @instrumented
+    async def create_release_notes(self, release_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Crée les notes de release
+        """
+        result = await get_executor().kickoff(self.notes_crew, agent_id=self.agent_id, release_data=release_data)
+
+        return {
+            "release_notes": result,
+            "notes_complete": True
+        }
+
+    @instrumented
+    async def handle_incident(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gère un incident de déploiement
+        """
+        result = await get_executor().kickoff(self.incident_crew, agent_id=self.agent_id, incident_data=incident_data)
+
         return {
             "incident_response": result,
             "incident_handled": True
-        } 
\ No newline at end of file
+        }
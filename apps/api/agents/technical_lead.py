@@ -1,55 +1,44 @@
-from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
 from typing import Dict, Any
-import os
 
-class TechnicalLead:
-    """
-    Agent responsable de la conception technique et de l'architecture des solutions
-    """
-    
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.3,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Agent principal de conception technique
-        self.technical_architect = Agent(
-            role="Architecte Technique",
-            goal="Concevoir des solutions techniques robustes et évolutives",
-            backstory="""Vous êtes un lead développeur expérimenté spécialisé dans l'architecture de solutions.
-            Vous avez une expertise dans les technologies modernes (Astro, FastAPI, CrewAI, Kubernetes).
-            Vous concevez des solutions scalables et maintenables pour la plateforme de coaching.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-        
-        # Agent superviseur technique
-        self.technical_supervisor = Agent(
-            role="Superviseur Technique",
-            goal="Valider et optimiser les architectures techniques",
-            backstory="""Vous êtes un architecte senior qui valide les conceptions techniques.
-            Vous vous assurez que les solutions sont robustes, performantes et évolutives.
-            Vous avez une expertise en DevOps, cloud native et microservices.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
-    
-    async def design_solution(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Conçoit une solution technique basée sur les spécifications fonctionnelles
-        """
-        
-        # Création des tâches
-        design_task = Task(
-            description=f"""
+from agents.templates import CrewTemplate, TaskTemplate, route_crews
+from core.cache import cached_stage
+from core.dag import consumes
+from core.executor import get_executor
+from core.handoff import get_handoff
+from core.llm import get_llm
+from core.metrics import instrumented
+from core.routing import default_model
+from core.structured import TechnicalSolution, parse_output, schema_prompt
+from core.supervision import supervised_kickoff
+
+# Agents du chef de projet technique
+AGENTS = {
+    # Agent principal de conception technique
+    "technical_architect": dict(
+        role="Architecte Technique",
+        goal="Concevoir des solutions techniques robustes et évolutives",
+        backstory="""Vous êtes un lead développeur expérimenté spécialisé dans l'architecture de solutions.
+        Vous avez une expertise dans les technologies modernes (Astro, FastAPI, CrewAI, Kubernetes).
+        Vous concevez des solutions scalables et maintenables pour la plateforme de coaching.""",
+        allow_delegation=False
+    ),
+    # Agent superviseur technique
+    "technical_supervisor": dict(
+        role="Superviseur Technique",
+        goal="Valider et optimiser les architectures techniques",
+        backstory="""Vous êtes un architecte senior qui valide les conceptions techniques.
+        Vous vous assurez que les solutions sont robustes, performantes et évolutives.
+        Vous avez une expertise en DevOps, cloud native et microservices.""",
+        allow_delegation=False
+    ),
+}
+
+# Prompts des tâches (analysés une seule fois au chargement du module)
+DESIGN_TASK = TaskTemplate(
+    description="""
             Concevez une solution technique basée sur ces spécifications :
             {requirements}
-            
+
             Votre conception doit inclure :
             1. Architecture globale (microservices, monolithique, etc.)
             2. Stack technologique recommandée
@@ -61,15 +50,14 @@ class TechnicalLead:
             8. Monitoring et observabilité
             9. Déploiement et CI/CD
             10. Estimation des efforts techniques
-            
+
             Adaptez votre conception au contexte de la plateforme CoachLibre.
             """,
-            agent=self.technical_architect,
-            expected_output="Conception technique détaillée"
-        )
-        
-        validation_task = Task(
-            description="""
+    expected_output="Conception technique détaillée. " + schema_prompt(TechnicalSolution)
+)
+
+VALIDATION_TASK = TaskTemplate(
+    description="""
             Validez la conception technique fournie et proposez des améliorations.
             Vérifiez que :
             - L'architecture est scalable et maintenable
@@ -78,94 +66,17 @@ class TechnicalLead:
             - Les performances sont optimisées
             - Le déploiement est automatisé
             - Le monitoring est complet
-            
+
             Retournez la conception validée ou améliorée.
             """,
-            agent=self.technical_supervisor,
-            expected_output="Conception technique validée ou améliorée"
-        )
-        
-        # Création et exécution du crew
-        crew = Crew(
-            agents=[self.technical_architect, self.technical_supervisor],
-            tasks=[design_task, validation_task],
-            verbose=True
-        )
-        
-        # Exécution du workflow
-        result = crew.kickoff()
-        
-        # Traitement du résultat
-        try:
-            # Simulation d'un résultat structuré
-            solution_result = {
-                "solution": result,
-                "confidence": 0.92,
-                "architecture": {
-                    "type": "microservices",
-                    "frontend": "Astro + TinaCMS + React Islands",
-                    "backend": "FastAPI + CrewAI + PayloadCMS",
-                    "database": "PostgreSQL + Qdrant",
-                    "infrastructure": "Kubernetes + Crossplane + ArgoCD"
-                },
-                "integrations": [
-                    "LiveKit (visio)",
-                    "Stripe (paiements)",
-                    "OAuth (calendriers)",
-                    "Flowise (IA conversationnelle)",
-                    "n8n (workflows)"
-                ],
-                "security": [
-                    "JWT authentication",
-                    "OAuth 2.0",
-                    "HTTPS/TLS",
-                    "Rate limiting",
-                    "Input validation"
-                ],
-                "performance": {
-                    "caching": "Redis",
-                    "cdn": "Cloudflare",
-                    "load_balancing": "Kubernetes Ingress",
-                    "monitoring": "Prometheus + Grafana"
-                },
-                "deployment": {
-                    "ci_cd": "GitHub Actions + ArgoCD",
-                    "containers": "Docker",
-                    "orchestration": "Kubernetes",
-                    "monitoring": "Backstage"
-                },
-                "effort_estimation": "8-12 semaines"
-            }
-            
-            return solution_result
-            
-        except Exception as e:
-            # Fallback en cas d'erreur
-            return {
-                "solution": f"Conception technique basée sur : {requirements.get('requirements', 'N/A')}",
-                "confidence": 0.7,
-                "architecture": {
-                    "type": "monolithique",
-                    "frontend": "Astro",
-                    "backend": "FastAPI",
-                    "database": "PostgreSQL"
-                },
-                "integrations": ["Basiques"],
-                "security": ["Standard"],
-                "performance": {"caching": "Basic"},
-                "deployment": {"ci_cd": "Manual"},
-                "effort_estimation": "À définir"
-            }
-    
-    async def create_technical_specs(self, solution: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Crée les spécifications techniques détaillées
-        """
-        specs_task = Task(
-            description=f"""
+    expected_output="Conception technique validée ou améliorée. " + schema_prompt(TechnicalSolution)
+)
+
+SPECS_TASK = TaskTemplate(
+    description="""
             Créez des spécifications techniques détaillées basées sur cette solution :
             {solution}
-            
+
             Les spécifications doivent inclure :
             1. Diagrammes d'architecture
             2. API specifications (OpenAPI/Swagger)
@@ -175,32 +86,14 @@ class TechnicalLead:
             6. Tests et qualité
             7. Documentation technique
             """,
-            agent=self.technical_architect,
-            expected_output="Spécifications techniques détaillées"
-        )
-        
-        crew = Crew(
-            agents=[self.technical_architect],
-            tasks=[specs_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "technical_specs": result,
-            "specs_complete": True
-        }
-    
-    async def review_code_quality(self, code_review: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Effectue une revue de code et propose des améliorations
-        """
-        review_task = Task(
-            description=f"""
+    expected_output="Spécifications techniques détaillées"
+)
+
+REVIEW_TASK = TaskTemplate(
+    description="""
             Effectuez une revue de code basée sur ces éléments :
             {code_review}
-            
+
             Analysez :
             1. Qualité du code
             2. Bonnes pratiques
@@ -209,35 +102,17 @@ class TechnicalLead:
             5. Maintenabilité
             6. Tests
             7. Documentation
-            
+
             Proposez des améliorations concrètes.
             """,
-            agent=self.technical_supervisor,
-            expected_output="Rapport de revue de code avec recommandations"
-        )
-        
-        crew = Crew(
-            agents=[self.technical_supervisor],
-            tasks=[review_task],
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        return {
-            "code_review_report": result,
-            "improvements_suggested": True
-        }
-    
-    async def optimize_performance(self, performance_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Optimise les performances basées sur les métriques
-        """
-        optimization_task = Task(
-            description=f"""
+    expected_output="Rapport de revue de code avec recommandations"
+)
+
+OPTIMIZATION_TASK = TaskTemplate(
+    description="""
             Analysez ces données de performance et proposez des optimisations :
             {performance_data}
-            
+
             Identifiez :
             1. Goulots d'étranglement
             2. Optimisations possibles
@@ -245,19 +120,100 @@ class TechnicalLead:
             4. Monitoring à améliorer
             5. Tests de charge à effectuer
             """,
-            agent=self.technical_architect,
-            expected_output="Plan d'optimisation des performances"
+    expected_output="Plan d'optimisation des performances"
+)
+
+class TechnicalLead:
+    """
+    Agent responsable de la conception technique et de l'architecture des solutions
+    """
+
+    agent_id = "technical"
+
+    def __init__(self):
+        self.llm = get_llm(model=default_model(self.agent_id), temperature=0.3)
+
+        # Crews préconstruits par forme de tâche
+        architect = {"technical_architect": AGENTS["technical_architect"]}
+        supervisor = {"technical_supervisor": AGENTS["technical_supervisor"]}
+        self.design_crew = CrewTemplate(
+            self.llm,
+            AGENTS,
+            [("technical_architect", DESIGN_TASK), ("technical_supervisor", VALIDATION_TASK)]
+        )
+        # Passes séparées analyste / superviseur pour la politique de supervision
+        self.design_draft_crew = CrewTemplate(
+            self.llm,
+            {"technical_architect": AGENTS["technical_architect"]},
+            [("technical_architect", DESIGN_TASK)]
         )
-        
-        crew = Crew(
-            agents=[self.technical_architect],
-            tasks=[optimization_task],
-            verbose=True
+        self.design_review_crew = CrewTemplate(
+            self.llm,
+            {"technical_supervisor": AGENTS["technical_supervisor"]},
+            [("technical_supervisor", VALIDATION_TASK.with_draft())]
+        )
+        self.specs_crew = CrewTemplate(self.llm, architect, [("technical_architect", SPECS_TASK)])
+        self.review_crew = CrewTemplate(self.llm, supervisor, [("technical_supervisor", REVIEW_TASK)])
+        self.optimization_crew = CrewTemplate(self.llm, architect, [("technical_architect", OPTIMIZATION_TASK)])
+        route_crews(self, {"design": TechnicalSolution, "design_draft": TechnicalSolution, "design_review": TechnicalSolution})
+
+    @consumes(requirements="analyze_requirements")
+    @instrumented
+    @cached_stage
+    async def design_solution(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Conçoit une solution technique basée sur les spécifications fonctionnelles
+        """
+
+        # Exécution du workflow
+        result = await supervised_kickoff(
+            self.agent_id,
+            self.design_crew,
+            self.design_draft_crew,
+            self.design_review_crew,
+            requirements=get_handoff().digest("technical", requirements)
+        )
+
+        # Sortie JSON du crew → modèle compact (réparée si besoin, sans nouvel appel LLM)
+        return parse_output(TechnicalSolution, result)
+
+    @consumes(solution="design_solution")
+    @instrumented
+    async def create_technical_specs(self, solution: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Crée les spécifications techniques détaillées
+        """
+        result = await get_executor().kickoff(self.specs_crew, agent_id=self.agent_id, solution=solution)
+
+        return {
+            "technical_specs": result,
+            "specs_complete": True
+        }
+
+    @instrumented
+    async def review_code_quality(self, code_review: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Effectue une revue de code et propose des améliorations
+        """
+        result = await get_executor().kickoff(self.review_crew, agent_id=self.agent_id, code_review=code_review)
+
+        return {
+            "code_review_report": result,
+            "improvements_suggested": True
+        }
+
+    @instrumented
+    async def optimize_performance(self, performance_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Optimise les performances basées sur les métriques
+        """
+        result = await get_executor().kickoff(
+            self.optimization_crew,
+            agent_id=self.agent_id,
+            performance_data=performance_data
         )
-        
-        result = crew.kickoff()
-        
+
         return {
             "optimization_plan": result,
             "performance_improvements": True
-        } 
\ No newline at end of file
+        }
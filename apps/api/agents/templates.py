@@ -0,0 +1,210 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai import Agent, Task, Crew
+
+from core.llm import get_llm
+from core.log import get_logger, log_agent_step, verbose_crew
+from core.routing import get_model_router
+from core.tracing import get_tracer
+
+
+def _agent_step(step: Any) -> None:
+    # Un step_callback défini évite que Crew.kickoff() recrée l'exécuteur des agents à chaque appel ;
+    # les étapes ne sont journalisées que pour les exécutions échantillonnées
+    log_agent_step(step)
+
+
+class TracedTask(Task):
+    """
+    Tâche CrewAI dont chaque exécution est un span (enfant du span du crew)
+    """
+
+    def execute(self, agent: Optional[Agent] = None, context: Optional[str] = None, tools: Optional[List[Any]] = None) -> str:
+        role = (agent or self.agent).role if (agent or self.agent) else None
+        with get_tracer().span(f"task {role}", **{"task.agent": role, "task.prompt_chars": len(self.description)}):
+            return super().execute(agent=agent, context=context, tools=tools)
+
+
+class TaskTemplate:
+    """
+    Prompt de tâche analysé une seule fois au chargement du module ;
+    render() ne fait plus qu'assembler les fragments avec les paramètres
+    """
+
+    def __init__(self, description: str, expected_output: str):
+        self.description = description
+        self.expected_output = expected_output
+        self._parts = [(literal, field) for literal, field, _, _ in Formatter().parse(description)]
+        self.fields = {field for _, field in self._parts if field}
+
+    def render(self, **params: Any) -> str:
+        return "".join(
+            literal + (str(params[field]) if field else "")
+            for literal, field in self._parts
+        )
+
+    def with_draft(self, label: str = "Document à valider") -> "TaskTemplate":
+        """
+        Variante qui reçoit explicitement le brouillon à relire ({draft}) au lieu du
+        contexte de la tâche précédente du crew
+        """
+        description = self.description.rstrip() + f"\n\n            {label} :\n            {{draft}}\n            "
+        return TaskTemplate(description=description, expected_output=self.expected_output)
+
+    def prototype(self, agent: Agent) -> Task:
+        """
+        Tâche validée une fois par agent, copiée ensuite à chaque exécution
+        """
+        return TracedTask(description=self.description, agent=agent, expected_output=self.expected_output)
+
+    def build(self, prototype: Task, **params: Any) -> Task:
+        # model_copy ne revalide pas : seuls les champs mutables sont renouvelés
+        return prototype.model_copy(update={
+            "description": self.render(**params) if self.fields else self.description,
+            "id": uuid.uuid4(),
+            "tools": list(prototype.tools),
+            "output": None,
+        })
+
+
+class _CrewSet:
+    """
+    Jeu d'agents et de tâches prototypes utilisé par une seule exécution à la fois
+    """
+
+    def __init__(self, crew: Crew, prototypes: List[Task]):
+        self.crew = crew
+        self.prototypes = prototypes
+
+
+class CrewTemplate:
+    """
+    Crew préconstruit pour un jeu d'agents et une forme de tâches donnés.
+
+    Les Agent CrewAI conservent un état d'exécution (exécuteur, tâche courante) :
+    chaque exécution emprunte donc un jeu d'agents dédié dans un pool, construit
+    à la demande et réutilisé ensuite.
+
+    Pas de sortie verbose de CrewAI par défaut (écritures synchrones sur stdout) :
+    les étapes des agents passent par la journalisation structurée pour les
+    exécutions échantillonnées (LOG_VERBOSE_SAMPLE_RATE, X-Debug). CREW_VERBOSE=true
+    rétablit l'ancienne sortie.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        agents: Dict[str, Dict[str, Any]],
+        tasks: List[Tuple[str, TaskTemplate]],
+        verbose: Optional[bool] = None,
+        max_idle: int = 8,
+        route: Optional[str] = None,
+        schema: Optional[type] = None
+    ):
+        self.llm = llm
+        self.agent_specs = agents
+        self.tasks = tasks
+        self.verbose = verbose if verbose is not None else os.getenv("CREW_VERBOSE", "false").lower() == "true"
+        self.max_idle = max_idle
+        # Nom de route (<agent>.<crew>) et schéma de sortie, utilisés par le ModelRouter
+        self.route = route
+        self.schema = schema
+        self._variants: Dict[str, "CrewTemplate"] = {}
+        self._variants_lock = threading.Lock()
+        self._pool: "queue.LifoQueue[_CrewSet]" = queue.LifoQueue(maxsize=max_idle)
+        # Un premier jeu est construit immédiatement (préchauffage de l'agent)
+        self._checkin(self._build_set())
+
+    def _build_set(self) -> _CrewSet:
+        agents = {
+            name: Agent(**spec, verbose=self.verbose, llm=self.llm)
+            for name, spec in self.agent_specs.items()
+        }
+        prototypes = [template.prototype(agents[name]) for name, template in self.tasks]
+        crew = Crew(
+            agents=list(agents.values()),
+            tasks=prototypes,
+            verbose=self.verbose,
+            function_calling_llm=self.llm,
+            step_callback=_agent_step
+        )
+        return _CrewSet(crew, prototypes)
+
+    def _checkout(self) -> _CrewSet:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._build_set()
+
+    def _checkin(self, crew_set: _CrewSet) -> None:
+        try:
+            self._pool.put_nowait(crew_set)
+        except queue.Full:
+            pass
+
+    def for_model(self, model: str) -> "CrewTemplate":
+        """
+        Même crew avec un autre modèle (même température, même route et même schéma),
+        construit au premier usage
+        """
+        if model == getattr(self.llm, "model_name", None):
+            return self
+        with self._variants_lock:
+            if model not in self._variants:
+                llm = get_llm(model=model, temperature=getattr(self.llm, "temperature", 0.0))
+                self._variants[model] = CrewTemplate(
+                    llm, self.agent_specs, self.tasks, self.verbose, self.max_idle,
+                    route=self.route, schema=self.schema
+                )
+            return self._variants[model]
+
+    def kickoff(self, **params: Any) -> Any:
+        """
+        Exécute le crew (bloquant) avec les paramètres des prompts, sur le ou les
+        modèles choisis par la route du crew
+        """
+        return get_model_router().kickoff(self, **params)
+
+    def run(self, **params: Any) -> Any:
+        """
+        Exécute le crew avec son propre modèle
+        """
+        tracer = get_tracer()
+        model = getattr(self.llm, "model_name", None)
+        with tracer.span(f"crew {self.route or 'unrouted'}", **{"crew.route": self.route, "llm.model": model}), verbose_crew(self.route) as sampled:
+            start = time.perf_counter()
+            crew_set = self._checkout()
+            try:
+                with tracer.span("crew.render"):
+                    tasks = [
+                        template.build(prototype, **params)
+                        for (_, template), prototype in zip(self.tasks, crew_set.prototypes)
+                    ]
+                    crew = crew_set.crew.model_copy(update={"tasks": tasks, "id": uuid.uuid4()})
+                output = crew.kickoff()
+                if sampled:
+                    get_logger("coachlibre.crew").info(
+                        "crew_run", route=self.route, model=model,
+                        duration_ms=round((time.perf_counter() - start) * 1000, 1), output_chars=len(str(output))
+                    )
+                return output
+            finally:
+                self._checkin(crew_set)
+
+
+def route_crews(agent: Any, schemas: Optional[Dict[str, type]] = None) -> None:
+    """
+    Nomme les crews d'un agent pour le routage des modèles (<agent_id>.<attribut sans
+    _crew>, ex. intent.draft) et leur associe le schéma de sortie attendu
+    """
+    for attribute, crew in vars(agent).items():
+        if isinstance(crew, CrewTemplate):
+            name = attribute[:-len("_crew")] if attribute.endswith("_crew") else attribute
+            crew.route = f"{agent.agent_id}.{name}"
+            crew.schema = (schemas or {}).get(name)
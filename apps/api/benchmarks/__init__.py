@@ -0,0 +1,3 @@
+"""
+Benchmarks de l'API CoachLibre (à lancer depuis apps/api : python -m benchmarks.<nom>)
+"""
@@ -0,0 +1,118 @@
+"""
+Coût de la journalisation sur le débit des workflows, avec le LLM local.
+
+L'API est lancée dans un processus uvicorn par mode, sa sortie redirigée vers un
+fichier (comme la sortie d'un conteneur) :
+
+- verbose : ancien comportement, crews CrewAI en verbose=True (CREW_VERBOSE=true)
+- quiet : crews silencieux, journaux JSON via la file non bloquante
+- sampled : comme quiet, avec les étapes d'agents journalisées pour une part des crews
+
+    python -m benchmarks.logs --modes verbose quiet sampled --concurrency 16 --requests 64 --output logs.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict
+
+from benchmarks.workers import API_DIR, wait_ready
+from benchmarks.workflow import free_port, git_commit, run_level
+
+MODES = {
+    "verbose": {"CREW_VERBOSE": "true"},
+    "quiet": {"CREW_VERBOSE": "false", "LOG_VERBOSE_SAMPLE_RATE": "0"},
+    "sampled": {"CREW_VERBOSE": "false"},
+}
+
+
+async def run_mode(mode: str, args, env: Dict[str, str]) -> Dict:
+    import httpx
+
+    port = free_port()
+    overrides = dict(MODES[mode])
+    if mode == "sampled":
+        overrides["LOG_VERBOSE_SAMPLE_RATE"] = str(args.sample_rate)
+    with tempfile.NamedTemporaryFile(prefix=f"coachlibre-{mode}-", suffix=".log", delete=False) as output:
+        path = output.name
+    with open(path, "wb") as output:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--no-access-log"],
+            cwd=API_DIR,
+            env={**env, **overrides},
+            stdout=output,
+            stderr=subprocess.STDOUT
+        )
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency + 4)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+                await wait_ready(client, process)
+                # Construction paresseuse des agents, hors mesure
+                await run_level(client, args.concurrency, args.concurrency)
+                before = os.path.getsize(path)
+                level = await run_level(client, args.concurrency, args.requests)
+                logged = os.path.getsize(path) - before
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+    os.unlink(path)
+    return {"mode": mode, **level, "log_bytes": logged, "log_bytes_per_workflow": logged / args.requests}
+
+
+async def main_async(args) -> Dict:
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "fake",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-benchmark"),
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.jitter_ms),
+        "FAKE_LLM_COMPLETION_TOKENS": str(args.completion_tokens),
+        "CACHE_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "SINGLEFLIGHT_ENABLED": "false",
+        "AGENT_WARMUP": "false",
+        "PYTHONPATH": API_DIR,
+    }
+    runs = [await run_mode(mode, args, env) for mode in args.modes]
+    baseline = runs[0]["throughput_rps"] if runs else 0.0
+    for run in runs:
+        run["throughput_vs_first"] = run["throughput_rps"] / baseline if baseline else None
+    return {
+        "commit": git_commit(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "completion_tokens": args.completion_tokens,
+            "sample_rate": args.sample_rate,
+        },
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64, help="Workflows mesurés par mode")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--sample-rate", type=float, default=0.05, help="LOG_VERBOSE_SAMPLE_RATE du mode sampled")
+    parser.add_argument("--output", help="Fichier JSON de résultats (stdout par défaut)")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(main_async(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Mesure le temps de démarrage de l'API : import de main.py seul (construction paresseuse)
+contre import + construction de tous les agents (comportement historique).
+
+Chaque mesure est faite dans un processus neuf :
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    # Démarrage actuel : uvicorn peut accepter des connexions dès l'import
+    "lazy_import": "import main",
+    # Premier appel d'un agent après un démarrage paresseux
+    "lazy_first_agent": "import main; main.agent_registry.get('intent')",
+    # Ancien démarrage : les cinq agents construits avant d'accepter une connexion
+    "eager_all_agents": "import main; [main.agent_registry.get(a) for a in main.agent_registry.factories]",
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(statement: str) -> float:
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-benchmark"), "AGENT_WARMUP": "false"}
+    output = subprocess.run(
+        [sys.executable, "-c", TIMER.format(statement=statement)],
+        capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Fichier JSON de résultats (stdout par défaut)")
+    args = parser.parse_args()
+
+    results = {}
+    for name, statement in SCENARIOS.items():
+        timings = [measure(statement) for _ in range(args.runs)]
+        results[name] = {
+            "runs": args.runs,
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "max_s": max(timings),
+        }
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare le coût Python de préparation d'un crew par requête :
+construction complète (Crew + Task validés, f-strings) contre CrewTemplate.
+
+    python -m benchmarks.templates --iterations 200 --output templates.json
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from crewai import Agent, Crew, Task
+
+from agents.intent_manager import AGENTS, ANALYSIS_TASK, VALIDATION_TASK
+from agents.templates import CrewTemplate
+from core.llm import get_llm
+
+
+def build_fresh(agents, intent: str) -> Crew:
+    # Chemin historique : nouveaux Task/Crew validés à chaque requête
+    tasks = [
+        Task(description=ANALYSIS_TASK.description.format(intent=intent, context="Aucun"),
+             agent=agents["intent_analyzer"], expected_output=ANALYSIS_TASK.expected_output),
+        Task(description=VALIDATION_TASK.description,
+             agent=agents["intent_supervisor"], expected_output=VALIDATION_TASK.expected_output),
+    ]
+    return Crew(agents=list(agents.values()), tasks=tasks, verbose=False)
+
+
+def build_template(template: CrewTemplate, intent: str) -> Crew:
+    crew_set = template._checkout()
+    try:
+        tasks = [
+            task_template.build(prototype, intent=intent, context="Aucun")
+            for (_, task_template), prototype in zip(template.tasks, crew_set.prototypes)
+        ]
+        return crew_set.crew.model_copy(update={"tasks": tasks})
+    finally:
+        template._checkin(crew_set)
+
+
+def measure(func, iterations: int) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(f"je veux un coach pour ma reconversion #{i}")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"per_call_ms": elapsed / iterations * 1000, "peak_alloc_kb": peak / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="Fichier JSON de résultats (stdout par défaut)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    llm = get_llm(model="gpt-4", temperature=0.1)
+    agents = {name: Agent(**spec, verbose=False, llm=llm) for name, spec in AGENTS.items()}
+    template = CrewTemplate(llm, AGENTS, [("intent_analyzer", ANALYSIS_TASK), ("intent_supervisor", VALIDATION_TASK)], verbose=False)
+
+    results = {
+        "fresh_crew": measure(lambda intent: build_fresh(agents, intent), args.iterations),
+        "crew_template": measure(lambda intent: build_template(template, intent), args.iterations),
+    }
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
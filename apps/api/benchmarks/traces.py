@@ -0,0 +1,196 @@
+"""
+Lecture des traces exportées (TRACE_FILE, OTLP/JSON une requête par ligne) :
+arbre des spans d'une trace avec frise temporelle et chemin critique (*), piles
+repliées pour un flamegraph (flamegraph.pl, speedscope) et temps propre par span.
+
+    python -m benchmarks.traces traces.jsonl                  # trace la plus lente
+    python -m benchmarks.traces traces.jsonl --trace <trace_id>
+    python -m benchmarks.traces traces.jsonl --folded workflow.folded
+    python -m benchmarks.traces traces.jsonl --summary        # temps propre agrégé
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+BAR_WIDTH = 40
+
+
+def load_spans(paths: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Spans des fichiers OTLP/JSON regroupés par trace
+    """
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                for resource in json.loads(line).get("resourceSpans", []):
+                    for scope in resource.get("scopeSpans", []):
+                        for span in scope.get("spans", []):
+                            span["start"] = int(span["startTimeUnixNano"])
+                            span["end"] = int(span["endTimeUnixNano"])
+                            span["attrs"] = {
+                                a["key"]: next(iter(a["value"].values())) for a in span.get("attributes", [])
+                            }
+                            traces[span["traceId"]].append(span)
+    return traces
+
+
+def build_tree(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Relie chaque span à ses enfants ; retourne les racines (parent absent de la trace)
+    """
+    by_id = {span["spanId"]: span for span in spans}
+    roots = []
+    for span in spans:
+        span.setdefault("children", [])
+    for span in sorted(spans, key=lambda s: s["start"]):
+        parent = by_id.get(span.get("parentSpanId"))
+        if parent is None:
+            roots.append(span)
+        else:
+            parent["children"].append(span)
+    return roots
+
+
+def critical_path(span: Dict[str, Any], path: Optional[Set[str]] = None) -> Set[str]:
+    """
+    Spans qui déterminent la fin de leur parent : en remontant depuis la fin, l'enfant
+    terminé en dernier, puis le dernier terminé avant son début, etc.
+    """
+    path = path if path is not None else set()
+    path.add(span["spanId"])
+    cursor = span["end"]
+    for child in sorted(span["children"], key=lambda c: c["end"], reverse=True):
+        if child["end"] <= cursor:
+            critical_path(child, path)
+            cursor = child["start"]
+    return path
+
+
+def self_time(span: Dict[str, Any]) -> int:
+    """
+    Durée du span hors enfants (intervalles des enfants fusionnés)
+    """
+    covered = 0
+    cursor = span["start"]
+    for child in sorted(span["children"], key=lambda c: c["start"]):
+        start, end = max(child["start"], cursor), min(child["end"], span["end"])
+        if end > start:
+            covered += end - start
+            cursor = end
+    return max(0, span["end"] - span["start"] - covered)
+
+
+def label(span: Dict[str, Any]) -> str:
+    attrs = span["attrs"]
+    details = []
+    if "llm.model" in attrs and span["name"].startswith("llm"):
+        details.append(attrs["llm.model"])
+    for key in ("llm.usage.prompt_tokens", "llm.usage.completion_tokens"):
+        if key in attrs:
+            details.append(f"{key.rsplit('.', 1)[-1].split('_')[0]}={attrs[key]}")
+    if "llm.limiter_wait_ms" in attrs:
+        details.append(f"attente={attrs['llm.limiter_wait_ms']}ms")
+    for event in span.get("events", []):
+        details.append(event["name"])
+    if span.get("status", {}).get("code") == 2:
+        details.append(f"ERREUR {span['status'].get('message', '')}")
+    return span["name"] + (f" [{', '.join(details)}]" if details else "")
+
+
+def render_tree(root: Dict[str, Any], out=sys.stdout) -> None:
+    origin, total = root["start"], max(1, root["end"] - root["start"])
+    critical = critical_path(root)
+
+    def walk(span: Dict[str, Any], depth: int) -> None:
+        offset = int((span["start"] - origin) / total * BAR_WIDTH)
+        width = max(1, int((span["end"] - span["start"]) / total * BAR_WIDTH))
+        bar = " " * offset + "█" * min(width, BAR_WIDTH - offset)
+        marker = "*" if span["spanId"] in critical else " "
+        duration = (span["end"] - span["start"]) / 1e6
+        out.write(f"{bar:<{BAR_WIDTH}} {marker} {duration:9.1f}ms  {'  ' * depth}{label(span)}\n")
+        for child in span["children"]:
+            walk(child, depth + 1)
+
+    out.write(f"trace {root['traceId']}  {total / 1e6:.1f}ms  (* : chemin critique)\n")
+    walk(root, 0)
+
+
+def folded_stacks(roots: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Piles repliées "racine;enfant;feuille temps_propre_µs" pour un flamegraph
+    """
+    stacks: Dict[str, int] = defaultdict(int)
+
+    def walk(span: Dict[str, Any], prefix: str) -> None:
+        stack = f"{prefix};{span['name']}" if prefix else span["name"]
+        stacks[stack.replace(" ", "_")] += self_time(span) // 1000
+        for child in span["children"]:
+            walk(child, stack)
+
+    for root in roots:
+        walk(root, "")
+    return stacks
+
+
+def summary(roots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Temps propre et nombre d'occurrences par nom de span, tous les arbres confondus
+    """
+    totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "self_ms": 0.0, "total_ms": 0.0})
+
+    def walk(span: Dict[str, Any]) -> None:
+        entry = totals[span["name"]]
+        entry["count"] += 1
+        entry["self_ms"] += self_time(span) / 1e6
+        entry["total_ms"] += (span["end"] - span["start"]) / 1e6
+        for child in span["children"]:
+            walk(child)
+
+    for root in roots:
+        walk(root)
+    return sorted(({"name": name, **values} for name, values in totals.items()), key=lambda e: -e["self_ms"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Fichiers TRACE_FILE")
+    parser.add_argument("--trace", help="Identifiant de trace (par défaut la plus lente)")
+    parser.add_argument("--folded", help="Écrit les piles repliées de toutes les traces dans ce fichier")
+    parser.add_argument("--summary", action="store_true", help="Temps propre agrégé par nom de span")
+    args = parser.parse_args()
+
+    traces = load_spans(args.files)
+    if not traces:
+        sys.exit("Aucun span dans les fichiers fournis")
+    forest = {trace_id: build_tree(spans) for trace_id, spans in traces.items()}
+    all_roots = [root for roots in forest.values() for root in roots]
+
+    if args.folded:
+        with open(args.folded, "w") as f:
+            for stack, micros in sorted(folded_stacks(all_roots).items()):
+                if micros:
+                    f.write(f"{stack} {micros}\n")
+    if args.summary:
+        print(f"{'span':<50} {'n':>6} {'propre ms':>12} {'total ms':>12}")
+        for entry in summary(all_roots):
+            print(f"{entry['name'][:50]:<50} {entry['count']:>6} {entry['self_ms']:>12.1f} {entry['total_ms']:>12.1f}")
+        return
+
+    if args.trace:
+        if args.trace not in forest:
+            sys.exit(f"Trace inconnue : {args.trace}")
+        roots = forest[args.trace]
+    else:
+        roots = [max(all_roots, key=lambda r: r["end"] - r["start"])]
+    for root in roots:
+        render_tree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Test de charge du mode multi-workers (gunicorn + workers uvicorn) avec le LLM local.
+
+Pour chaque nombre de workers, l'API est lancée dans un processus gunicorn séparé
+puis chargée sur /workflow/stream ; le rapport donne le débit, les latences et
+l'efficacité de la montée en charge par rapport à un seul worker.
+
+    python -m benchmarks.workers --workers 1 2 4 --concurrency 16 --requests 64 --output workers.json
+
+Sans REDIS_URL, chaque worker garde son propre état (suffisant pour mesurer le débit).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict
+
+from benchmarks.workflow import free_port, git_commit, run_level
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_ready(client, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn s'est arrêté (code {process.returncode})")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("gunicorn n'a pas démarré dans le délai")
+
+
+async def run_workers(workers: int, args, env: Dict[str, str]) -> Dict:
+    import httpx
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-w", str(workers), "-b", f"127.0.0.1:{port}", "main:app"],
+        cwd=API_DIR,
+        env={**env, "GUNICORN_ACCESS_LOG": "", "PROMETHEUS_MULTIPROC_DIR": os.path.join(args.metrics_dir, f"w{workers}")},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency + 4)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+            await wait_ready(client, process)
+            # Construction paresseuse des agents dans chaque worker, hors mesure
+            await run_level(client, args.concurrency, max(args.concurrency, workers * 4))
+            level = await run_level(client, args.concurrency, args.requests)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+    return {"workers": workers, **level}
+
+
+async def main_async(args) -> Dict:
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "fake",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-benchmark"),
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.jitter_ms),
+        "FAKE_LLM_COMPLETION_TOKENS": str(args.completion_tokens),
+        "CACHE_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "SINGLEFLIGHT_ENABLED": "false",
+        "AGENT_WARMUP": "false",
+        "PYTHONPATH": API_DIR,
+    }
+    runs = [await run_workers(workers, args, env) for workers in args.workers]
+    baseline = runs[0]["throughput_rps"] / runs[0]["workers"] if runs and runs[0]["throughput_rps"] else 0.0
+    for run in runs:
+        # Débit obtenu / débit idéal (linéaire à partir du premier nombre de workers)
+        run["scaling_efficiency"] = run["throughput_rps"] / (baseline * run["workers"]) if baseline else None
+    return {
+        "commit": git_commit(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "completion_tokens": args.completion_tokens,
+            "cpu_count": os.cpu_count(),
+        },
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64, help="Workflows mesurés par nombre de workers")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--metrics-dir", default="/tmp/coachlibre-bench-metrics")
+    parser.add_argument("--output", help="Fichier JSON de résultats (stdout par défaut)")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(main_async(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark hors ligne du workflow multi-agent avec le LLM local (LLM_PROVIDER=fake).
+
+L'API est servie par uvicorn dans le processus du benchmark ; des clients HTTP
+envoient des workflows sur /workflow/stream à différents niveaux de concurrence.
+Pour chaque niveau : débit, latences p50/p95/p99 (totale, premier événement,
+par étape), erreurs et retard de la boucle d'événements.
+
+    python -m benchmarks.workflow --concurrency 1 4 16 --requests 32 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import time
+from typing import Dict, List
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {"p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": ordered[-1]}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_workflow(client, index: int) -> Dict:
+    """
+    Envoie un workflow et horodate les événements SSE reçus
+    """
+    start = time.perf_counter()
+    timings = {"stages": {}, "ttfb": None, "error": None}
+    stage_started = {}
+    event = None
+    payload = {"intent": f"Je veux un coach pour ma reconversion (#{index})", "user_id": f"bench-{index}"}
+    async with client.stream("POST", "/workflow/stream", json=payload) as response:
+        async for line in response.aiter_lines():
+            now = time.perf_counter()
+            if timings["ttfb"] is None:
+                timings["ttfb"] = now - start
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line.split(":", 1)[1])
+                if event == "stage_started":
+                    stage_started[data["stage"]] = now
+                elif event == "stage":
+                    stage = next((s for s in stage_started if s not in timings["stages"]), None)
+                    if stage is not None:
+                        timings["stages"][stage] = now - stage_started[stage]
+                elif event == "error":
+                    timings["error"] = data["detail"]
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+async def loop_lag_probe(samples: List[float], interval: float = 0.01) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def run_level(client, concurrency: int, requests: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    lag: List[float] = []
+    probe = asyncio.create_task(loop_lag_probe(lag))
+
+    async def one(i: int):
+        async with semaphore:
+            try:
+                return await run_workflow(client, i)
+            except Exception as e:
+                return {"error": str(e), "stages": {}, "ttfb": None, "total": None}
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[one(i) for i in range(requests)])
+    wall = time.perf_counter() - start
+    probe.cancel()
+
+    ok = [r for r in results if not r["error"]]
+    stages = {}
+    for r in ok:
+        for stage, value in r["stages"].items():
+            stages.setdefault(stage, []).append(value)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(results) - len(ok),
+        "wall_time_s": wall,
+        "throughput_rps": len(ok) / wall if wall else 0.0,
+        "latency_s": percentiles([r["total"] for r in ok]),
+        "ttfb_s": percentiles([r["ttfb"] for r in ok if r["ttfb"] is not None]),
+        "stages_s": {stage: percentiles(values) for stage, values in stages.items()},
+        "event_loop_lag_ms": {k: v * 1000 for k, v in percentiles(lag).items()},
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def main_async(args) -> Dict:
+    import httpx
+    import uvicorn
+
+    import main
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    levels = []
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 4)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits) as client:
+        # Construction des agents hors mesure
+        await main.agent_registry.warm_up()
+        for concurrency in args.concurrency:
+            levels.append(await run_level(client, concurrency, args.requests))
+
+    server.should_exit = True
+    await serve
+    return {
+        "commit": git_commit(),
+        "config": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "distribution": args.distribution,
+            "failure_rate": args.failure_rate,
+            "completion_tokens": args.completion_tokens,
+            "cache": args.with_cache,
+        },
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="Workflows par niveau de concurrence")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--distribution", default="normal", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--with-cache", action="store_true", help="Laisse les caches de réponses actifs")
+    parser.add_argument("--output", help="Fichier JSON de résultats (stdout par défaut)")
+    args = parser.parse_args()
+
+    # Configuration à poser avant l'import de l'application
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-benchmark"),
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.jitter_ms),
+        "FAKE_LLM_DISTRIBUTION": args.distribution,
+        "FAKE_LLM_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_LLM_COMPLETION_TOKENS": str(args.completion_tokens),
+        "CACHE_ENABLED": "true" if args.with_cache else "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "AGENT_WARMUP": "false",
+    })
+
+    report = json.dumps(asyncio.run(main_async(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
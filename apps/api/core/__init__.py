@@ -0,0 +1,3 @@
+"""
+Services transverses de l'API CoachLibre (exécution, cache, métriques, ...)
+"""
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from pydantic import ValidationError
+
+from core.metrics import record_error
+from core.workflow import WorkflowPipeline, intent_key
+from models import UserIntent
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def parse_item(raw: Any) -> UserIntent:
+    if isinstance(raw, (str, bytes)):
+        raw = json.loads(raw)
+    return UserIntent.model_validate(raw)
+
+
+async def iter_json_array(items: Iterable[Any]) -> AsyncIterator[Tuple[int, Any]]:
+    for index, raw in enumerate(items):
+        yield index, raw
+
+
+async def iter_ndjson(body: bytes) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Lignes d'un corps NDJSON (lignes vides ignorées)
+    """
+    index = 0
+    for line in body.split(b"\n"):
+        if line.strip():
+            yield index, line
+            index += 1
+
+
+def ndjson_line(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str) + "\n"
+
+
+class BatchProcessor:
+    """
+    Traitement en masse d'intentions (POST /workflow/batch) :
+
+    - les intentions identiques (intention, contexte et budget) ne sont exécutées qu'une fois ;
+    - BATCH_MAX_CONCURRENCY workflows au plus en parallèle pour tous les lots du
+      processus (les appels LLM restent soumis au LLMLimiter partagé) ;
+    - les résultats sont émis en NDJSON dans l'ordre de fin, avec l'index d'origine
+      le statut du workflow ("completed" ou "partial" si le budget de l'élément est
+      épuisé) et une erreur par élément en cas d'échec.
+    """
+
+    def __init__(self, pipeline: WorkflowPipeline, max_concurrency: Optional[int] = None):
+        self.pipeline = pipeline
+        self.max_concurrency = max_concurrency or int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _run_workflow(self, user_intent: UserIntent):
+        async with self._semaphore:
+            return await self.pipeline.run_shared(user_intent)
+
+    async def stream(self, items: AsyncIterator[Tuple[int, Any]]) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        workflows: Dict[Tuple[str, Optional[float]], asyncio.Task] = {}
+        handlers = set()
+        # Limite les éléments lus mais pas encore terminés (contre-pression sur l'entrée)
+        pending = asyncio.Semaphore(self.max_concurrency * 4)
+
+        async def handle(index: int, raw: Any):
+            try:
+                try:
+                    user_intent = parse_item(raw)
+                except (ValueError, ValidationError) as e:
+                    await queue.put({"index": index, "status": "invalid", "error": str(e)})
+                    return
+
+                # Même intention, même budget : un budget différent peut donner un résultat partiel
+                key = (intent_key(user_intent), user_intent.timeout)
+                duplicate = key in workflows
+                if not duplicate:
+                    workflows[key] = asyncio.create_task(self._run_workflow(user_intent))
+                try:
+                    result = await asyncio.shield(workflows[key])
+                    line = {"index": index, "status": result.status, "result": result.model_dump()}
+                except Exception as e:
+                    if not duplicate:
+                        record_error("batch", e)
+                    line = {"index": index, "status": "failed", "error": str(e) or type(e).__name__}
+                if duplicate:
+                    line["deduplicated"] = True
+                await queue.put(line)
+            finally:
+                pending.release()
+
+        async def read():
+            try:
+                async for index, raw in items:
+                    await pending.acquire()
+                    task = asyncio.create_task(handle(index, raw))
+                    handlers.add(task)
+                    task.add_done_callback(handlers.discard)
+            except Exception as e:
+                await queue.put({"index": None, "status": "invalid", "error": f"Lecture du lot interrompue : {e}"})
+            while handlers:
+                await asyncio.gather(*list(handlers), return_exceptions=True)
+            await queue.put(None)
+
+        reader = asyncio.create_task(read())
+        try:
+            while True:
+                line = await queue.get()
+                if line is None:
+                    break
+                yield ndjson_line(line)
+        finally:
+            # Client déconnecté : on annule la lecture et les workflows restants
+            reader.cancel()
+            for task in [*handlers, *workflows.values()]:
+                task.cancel()
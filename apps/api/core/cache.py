@@ -0,0 +1,238 @@
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from core.metrics import record_cache
+from core.resilience import is_degraded, track_degraded
+
+# Positionné par l'en-tête X-Cache-Bypass pour la requête courante
+cache_bypass: ContextVar[bool] = ContextVar("cache_bypass", default=False)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(value: Any) -> Any:
+    """
+    Normalise les entrées d'un prompt (casse, espaces, ordre des clés)
+    """
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip().lower()
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return normalize(str(value))
+
+
+def cache_key(agent_class: str, method: str, model: str, temperature: float, inputs: Any, routes: Optional[Any] = None) -> str:
+    """
+    Clé adressée par contenu : (classe d'agent, méthode, modèle, température, entrées
+    normalisées) et, s'il y en a, routes de modèles appliquées aux crews de l'agent
+    """
+    parts = [agent_class, method, model, temperature, normalize(inputs)]
+    if routes:
+        parts.append(routes)
+    payload = json.dumps(
+        parts,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Cache mémoire borné avec expiration par entrée
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    Cache des réponses d'agents à deux niveaux : LRU local puis Redis partagé (optionnel).
+
+    - CACHE_ENABLED : active le cache (true par défaut)
+    - CACHE_MAX_ENTRIES : taille du niveau local
+    - CACHE_TTL_SECONDS : durée de vie par défaut ; CACHE_TTL_<AGENT> par agent (ex. CACHE_TTL_INTENT)
+    - CACHE_REDIS_URL : niveau partagé (REDIS_URL par défaut)
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, redis_url: Optional[str] = None):
+        self.enabled = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+        self.default_ttl = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+        self.local = LRUCache(max_entries or int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+        self.prefix = "coachlibre:cache:"
+        self.stats = {"hits_local": 0, "hits_shared": 0, "misses": 0, "bypassed": 0, "errors": 0}
+
+        redis_url = redis_url or os.getenv("CACHE_REDIS_URL", os.getenv("REDIS_URL"))
+        self.shared = None
+        if redis_url:
+            import redis.asyncio as redis
+
+            self.shared = redis.from_url(redis_url, decode_responses=True)
+
+    def ttl_for(self, agent_id: str) -> float:
+        return float(os.getenv(f"CACHE_TTL_{agent_id.upper()}", self.default_ttl))
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats["hits_local"] += 1
+            record_cache("response", "hit_local")
+            return copy.deepcopy(value)
+
+        if self.shared is not None:
+            try:
+                raw = await self.shared.get(self.prefix + key)
+            except Exception:
+                # Le cache ne doit jamais faire échouer une requête
+                self.stats["errors"] += 1
+                raw = None
+            if raw is not None:
+                self.stats["hits_shared"] += 1
+                record_cache("response", "hit_shared")
+                entry = json.loads(raw)
+                self.local.set(key, entry["value"], entry["ttl"])
+                return copy.deepcopy(entry["value"])
+
+        self.stats["misses"] += 1
+        record_cache("response", "miss")
+        return None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        # Passage par JSON : même représentation pour les deux niveaux
+        value = json.loads(json.dumps(value, default=str))
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            try:
+                await self.shared.set(self.prefix + key, json.dumps({"value": value, "ttl": ttl}), ex=int(ttl))
+            except Exception:
+                self.stats["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        hits = self.stats["hits_local"] + self.stats["hits_shared"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries_local": len(self.local),
+            "shared_enabled": self.shared is not None,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def bound_arguments(signature: inspect.Signature, instance: Any, args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Arguments d'un appel de méthode par nom de paramètre (hors self)
+    """
+    bound = signature.bind(instance, *args, **kwargs)
+    bound.apply_defaults()
+    return dict(list(bound.arguments.items())[1:])
+
+
+def cached_stage(method):
+    """
+    Met en cache le résultat d'une méthode d'agent (self.llm et self.agent_id requis).
+    La clé porte sur les arguments liés à la signature, valeurs par défaut comprises :
+    appels positionnels et nommés équivalents partagent la même entrée. Elle inclut
+    les routes de modèles de l'agent (MODEL_ROUTES, cascades) : changer de route
+    change de clé, alors que les réponses d'une même cascade (petit ou grand modèle
+    selon la confiance) sont des réponses de la route et partagent l'entrée. Les
+    réponses du petit modèle imposées par le budget sont dégradées, donc hors cache
+    """
+    from core.routing import get_model_router
+
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        # Réponses de repli (modèle indisponible) signalées pendant l'appel
+        track_degraded()
+        cache = get_cache()
+        if not cache.enabled or cache_bypass.get():
+            cache.stats["bypassed"] += 1
+            record_cache("response", "bypassed")
+            return await method(self, *args, **kwargs)
+
+        key = cache_key(
+            type(self).__name__,
+            method.__name__,
+            getattr(self.llm, "model_name", ""),
+            getattr(self.llm, "temperature", None),
+            bound_arguments(signature, self, args, kwargs),
+            get_model_router().signature(self.agent_id)
+        )
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = await method(self, *args, **kwargs)
+        if not is_degraded():
+            await cache.set(key, result, cache.ttl_for(self.agent_id))
+        return result
+
+    return wrapper
+
+
+class CacheBypassMiddleware:
+    """
+    Middleware ASGI : "X-Cache-Bypass: true" désactive le cache pour la requête
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        bypass = headers.get(b"x-cache-bypass", b"").decode().lower() in ("1", "true", "yes")
+        token = cache_bypass.set(bypass)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            cache_bypass.reset(token)
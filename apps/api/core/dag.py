@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.metrics import record_error
+from core.registry import AgentRegistry
+
+NodeCallback = Callable[[str, str], Awaitable[None]]
+
+
+def consumes(**inputs: str):
+    """
+    Déclare les entrées d'une méthode d'agent : paramètre → nœud producteur
+    (nom d'une autre méthode) ou entrée initiale du workflow (ex. "intent")
+    """
+    def decorator(method):
+        method.dag_inputs = dict(inputs)
+        return method
+
+    return decorator
+
+
+class DagNode:
+    """
+    Méthode d'agent exécutée comme nœud du graphe ; son nom est celui de la méthode
+    """
+
+    def __init__(self, agent_id: str, method: str, inputs: Dict[str, str]):
+        self.agent_id = agent_id
+        self.method = method
+        self.name = method
+        self.inputs = inputs
+
+    @property
+    def dependencies(self) -> List[str]:
+        return list(dict.fromkeys(self.inputs.values()))
+
+
+class DagError(ValueError):
+    """
+    Graphe invalide : dépendance inconnue ou cycle
+    """
+
+
+class DagExecutor:
+    """
+    Exécute un graphe de méthodes d'agents : chaque nœud démarre dès que ses entrées
+    sont disponibles, avec au plus DAG_MAX_PARALLEL nœuds simultanés.
+
+    Un échec n'interrompt que les nœuds qui en dépendent (statut "skipped") : les
+    branches indépendantes se terminent et leurs résultats sont retournés. L'annulation
+    du workflow annule tous les nœuds en cours.
+    """
+
+    def __init__(self, registry: AgentRegistry, max_parallel: Optional[int] = None):
+        self.registry = registry
+        self.max_parallel = max_parallel or int(os.getenv("DAG_MAX_PARALLEL", "4"))
+
+    def build(self, catalog: Dict[str, Tuple[str, Dict[str, str]]], targets: Iterable[str], sources: Iterable[str]) -> Dict[str, DagNode]:
+        """
+        Construit le sous-graphe nécessaire aux nœuds cibles (ancêtres inclus) ;
+        catalog : méthode → (agent, entrées déclarées)
+        """
+        sources = set(sources)
+        nodes: Dict[str, DagNode] = {}
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name in nodes:
+                continue
+            if name not in catalog:
+                raise DagError(f"Nœud inconnu : {name}")
+            agent_id, inputs = catalog[name]
+            nodes[name] = DagNode(agent_id, name, inputs)
+            pending.extend(dep for dep in nodes[name].dependencies if dep not in sources)
+
+        # Détection de cycle (tri topologique)
+        order, visiting = [], set()
+
+        def visit(name: str) -> None:
+            if name in order:
+                return
+            if name in visiting:
+                raise DagError(f"Cycle détecté autour de {name}")
+            visiting.add(name)
+            for dep in nodes[name].dependencies:
+                if dep in nodes:
+                    visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in list(nodes):
+            visit(name)
+        return {name: nodes[name] for name in order}
+
+    async def _execute(self, node: DagNode, values: Dict[str, Any], semaphore: asyncio.Semaphore) -> Any:
+        async with semaphore:
+            agent = await self.registry.aget(node.agent_id)
+            kwargs = {param: values[source] for param, source in node.inputs.items()}
+            return await getattr(agent, node.method)(**kwargs)
+
+    async def run(
+        self,
+        nodes: Dict[str, DagNode],
+        sources: Dict[str, Any],
+        on_node: Optional[NodeCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Retourne {"results", "statuses", "errors", "durations"} ; statuts possibles :
+        completed, failed, skipped (dépendance en échec)
+        """
+        async def notify(name: str, status: str):
+            if on_node is not None:
+                await on_node(name, status)
+
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        values: Dict[str, Any] = dict(sources)
+        statuses = {name: "pending" for name in nodes}
+        errors: Dict[str, str] = {}
+        durations: Dict[str, float] = {}
+        started: Dict[str, float] = {}
+        running: Dict[asyncio.Task, str] = {}
+
+        def ready(node: DagNode) -> bool:
+            return all(dep in sources or statuses.get(dep) == "completed" for dep in node.dependencies)
+
+        def skip_dependents(failed: str) -> None:
+            for name, node in nodes.items():
+                if statuses[name] == "pending" and failed in node.dependencies:
+                    statuses[name] = "skipped"
+                    skip_dependents(name)
+
+        try:
+            while True:
+                for name, node in nodes.items():
+                    if statuses[name] == "pending" and ready(node):
+                        statuses[name] = "running"
+                        started[name] = time.perf_counter()
+                        running[asyncio.create_task(self._execute(node, values, semaphore))] = name
+                        await notify(name, "running")
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    durations[name] = time.perf_counter() - started[name]
+                    # Nœud annulé de l'intérieur (et non le workflow) : traité comme un échec
+                    error = asyncio.CancelledError("Nœud annulé") if task.cancelled() else task.exception()
+                    if error is None:
+                        values[name] = task.result()
+                        statuses[name] = "completed"
+                    else:
+                        record_error("dag", error)
+                        errors[name] = str(error) or type(error).__name__
+                        statuses[name] = "failed"
+                        skip_dependents(name)
+                    await notify(name, statuses[name])
+        finally:
+            # Annulation du workflow : on propage aux nœuds en cours
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return {
+            "results": {name: values[name] for name in nodes if statuses[name] == "completed"},
+            "statuses": statuses,
+            "errors": errors,
+            "durations": durations,
+        }
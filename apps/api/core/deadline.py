@@ -0,0 +1,171 @@
+import contextvars
+import json
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.metrics import DEADLINE_OUTCOMES
+
+logger = logging.getLogger("coachlibre.deadline")
+
+# Part du budget total allouée à chaque étape (DEADLINE_STAGE_WEIGHTS pour la remplacer)
+DEFAULT_STAGE_WEIGHTS = {"intent": 0.15, "project": 0.3, "technical": 0.3, "release": 0.25}
+
+_deadline: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("deadline", default=None)
+# Étapes en cours, fin de leur budget et mode dégradé
+_stage: contextvars.ContextVar[Optional[Tuple[Tuple[str, ...], float, bool]]] = contextvars.ContextVar("stage", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Levée quand le budget de temps de la requête est épuisé avant une étape
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Budget de temps épuisé avant l'étape {stage}")
+        self.stage = stage
+
+
+def stage_weights() -> Dict[str, float]:
+    return {**DEFAULT_STAGE_WEIGHTS, **json.loads(os.getenv("DEADLINE_STAGE_WEIGHTS", "{}"))}
+
+
+def parse_deadline_header(value: Optional[str]) -> Optional[float]:
+    """
+    Budget en secondes d'un en-tête X-Request-Deadline : durée en secondes ("30"),
+    ou date limite epoch en secondes ou millisecondes. ValueError si la valeur n'est
+    pas un nombre ou si le budget est nul, négatif ou déjà dépassé
+    """
+    if not value:
+        return None
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"Date limite invalide : {value}")
+    if number > 1e12:
+        number /= 1000
+    if number > 1e9:
+        number -= time.time()
+    if number <= 0:
+        raise ValueError(f"Date limite dépassée : {value}")
+    return number
+
+
+class Deadline:
+    """
+    Budget de temps d'un workflow, réparti entre les étapes restantes au prorata de
+    leur poids : une étape plus rapide que prévu laisse sa marge aux suivantes,
+    une étape lente réduit leur part.
+
+    - DEADLINE_STAGE_WEIGHTS : JSON {étape: poids}
+    - DEADLINE_DEGRADE_RATIO : en dessous de cette part de son allocation nominale,
+      une étape passe en mode dégradé (superviseur sauté, petit modèle)
+    - DEADLINE_MIN_STAGE_SECONDS : temps restant minimal pour lancer une étape ; en
+      dessous, le workflow s'arrête et retourne les étapes terminées
+
+    La part d'une étape sert aux décisions de dégradation ; les crews ne sont
+    interrompus qu'à l'épuisement du budget total.
+    """
+
+    def __init__(self, budget: float, stages: List[str]):
+        self.budget = budget
+        self.end = time.monotonic() + budget
+        self.stages = stages
+        self.weights = stage_weights()
+        self.degrade_ratio = float(os.getenv("DEADLINE_DEGRADE_RATIO", "0.5"))
+        self.min_stage_seconds = float(os.getenv("DEADLINE_MIN_STAGE_SECONDS", "1"))
+        self.degraded: List[str] = []
+
+    def remaining(self) -> float:
+        return self.end - time.monotonic()
+
+    def _weight(self, stages: List[str]) -> float:
+        return sum(self.weights.get(stage, 0.0) for stage in stages)
+
+    def allocate(self, stages: List[str]) -> float:
+        """
+        Budget des étapes demandées : part du temps restant selon leur poids parmi
+        les étapes qui restent à exécuter
+        """
+        pending = self.stages[self.stages.index(stages[0]):]
+        total = self._weight(pending)
+        share = self._weight(stages) / total if total else 1.0
+        return max(0.0, self.remaining() * share)
+
+    def nominal(self, stages: List[str]) -> float:
+        total = self._weight(self.stages)
+        return self.budget * self._weight(stages) / total if total else self.budget
+
+    def mark_degraded(self, stages: Tuple[str, ...]) -> None:
+        for stage in stages:
+            if stage not in self.degraded:
+                self.degraded.append(stage)
+                DEADLINE_OUTCOMES.labels(stage=stage, outcome="degraded").inc()
+
+    @contextmanager
+    def stage(self, *stages: str) -> Iterator[float]:
+        """
+        Ouvre le budget d'une étape (ou de plusieurs étapes exécutées ensemble) ;
+        les exécutions de crews de l'étape sont bornées par ce budget
+        """
+        budget = self.allocate(list(stages))
+        if self.remaining() < self.min_stage_seconds:
+            DEADLINE_OUTCOMES.labels(stage=stages[0], outcome="cancelled").inc()
+            raise DeadlineExceeded(stages[0])
+        degraded = budget < self.degrade_ratio * self.nominal(list(stages))
+        if degraded:
+            self.mark_degraded(stages)
+            logger.info("deadline stages=%s budget=%.2fs mode=degraded", ",".join(stages), budget)
+        token = _stage.set((stages, time.monotonic() + budget, degraded))
+        try:
+            yield budget
+        finally:
+            _stage.reset(token)
+
+
+@contextmanager
+def workflow_deadline(budget: Optional[float], stages: List[str]) -> Iterator[Optional[Deadline]]:
+    """
+    Active le budget d'un workflow pour la tâche courante (sans budget : aucun effet)
+    """
+    if budget is None:
+        yield None
+        return
+    deadline = Deadline(budget, stages)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _deadline.get()
+
+
+def stage_remaining() -> Optional[float]:
+    """
+    Secondes restantes pour l'étape en cours (None sans budget)
+    """
+    stage = _stage.get()
+    return None if stage is None else stage[1] - time.monotonic()
+
+
+def stage_degraded() -> bool:
+    """
+    L'étape en cours doit prendre le chemin le moins coûteux (budget entamé)
+    """
+    stage = _stage.get()
+    return stage is not None and stage[2]
+
+
+def degrade_stage() -> None:
+    """
+    Signale qu'une étape en cours a pris un chemin dégradé (superviseur sauté...)
+    """
+    deadline = _deadline.get()
+    stage = _stage.get()
+    if deadline is not None and stage is not None:
+        deadline.mark_degraded(stage[0])
@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from core.deadline import current_deadline
+
+
+class CrewTimeoutError(TimeoutError):
+    """
+    Levée quand l'exécution d'un crew dépasse le délai alloué
+    """
+
+    def __init__(self, agent_id: str, timeout: float):
+        super().__init__(f"L'agent {agent_id} a dépassé le délai de {timeout:g}s")
+        self.agent_id = agent_id
+        self.timeout = timeout
+
+
+class CrewExecutor:
+    """
+    Exécute les appels bloquants de CrewAI (crew.kickoff) dans un pool de threads borné,
+    afin de ne jamais bloquer la boucle d'événements d'uvicorn.
+
+    - CREW_MAX_WORKERS : taille du pool partagé
+    - CREW_AGENT_CONCURRENCY : nombre d'exécutions simultanées par agent
+    - CREW_CONCURRENCY_<AGENT> : limite spécifique à un agent (ex. CREW_CONCURRENCY_INTENT)
+    - CREW_TIMEOUT_SECONDS : délai maximal d'une exécution, réduit au temps restant
+      du budget de la requête (X-Request-Deadline) s'il est plus court
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        default_timeout: Optional[float] = None,
+        agent_concurrency: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or int(os.getenv("CREW_MAX_WORKERS", "32"))
+        self.default_timeout = default_timeout or float(os.getenv("CREW_TIMEOUT_SECONDS", "300"))
+        self.agent_concurrency = agent_concurrency or int(os.getenv("CREW_AGENT_CONCURRENCY", "8"))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crew")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self, agent_id: str) -> asyncio.Semaphore:
+        # Les sémaphores sont liés à une boucle : on les recrée si la boucle change
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+
+        if agent_id not in self._semaphores:
+            limit = int(os.getenv(f"CREW_CONCURRENCY_{agent_id.upper()}", self.agent_concurrency))
+            self._semaphores[agent_id] = asyncio.Semaphore(limit)
+        return self._semaphores[agent_id]
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        agent_id: str,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Exécute une fonction bloquante dans le pool en respectant la limite de l'agent.
+
+        Si la coroutine appelante est annulée (client déconnecté, délai dépassé), une
+        tâche qui n'a pas démarré est retirée de la file. Un thread ne peut pas être
+        interrompu : une tâche démarrée va jusqu'au bout, son résultat est ignoré, et
+        elle occupe sa place dans la limite de l'agent jusqu'à sa fin réelle.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.default_timeout
+        deadline = current_deadline()
+        if deadline is not None:
+            # Une étape lente consomme la marge des suivantes, jamais au-delà du budget total
+            timeout = min(timeout, max(deadline.remaining(), 0.001))
+        # Le contexte est copié pour que les variables de requête suivent le thread
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+
+        semaphore = self._semaphore(agent_id)
+        await semaphore.acquire()
+        try:
+            future = self._pool.submit(call)
+        except BaseException:
+            semaphore.release()
+            raise
+        # Place libérée à la fin du thread (ou à son retrait de la file), pas au départ de l'appelant
+        future.add_done_callback(lambda _: self._release(loop, semaphore))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise CrewTimeoutError(agent_id, timeout) from None
+
+    @staticmethod
+    def _release(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore) -> None:
+        # Appelé depuis le thread du pool : le sémaphore appartient à la boucle
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            # Boucle fermée (arrêt du processus) : plus personne n'attend la place
+            pass
+
+    async def kickoff(self, crew: Any, agent_id: str, timeout: Optional[float] = None, **params: Any) -> Any:
+        """
+        Lance crew.kickoff(**params) hors de la boucle d'événements
+        (Crew CrewAI ou CrewTemplate paramétré par les variables de prompt)
+        """
+        return await self.run(functools.partial(crew.kickoff, **params), agent_id=agent_id, timeout=timeout)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[CrewExecutor] = None
+
+
+def get_executor() -> CrewExecutor:
+    """
+    Retourne l'exécuteur partagé du processus
+    """
+    global _executor
+    if _executor is None:
+        _executor = CrewExecutor()
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
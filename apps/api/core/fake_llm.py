@@ -0,0 +1,152 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+_attempts: Dict[str, int] = {}
+_attempts_lock = threading.Lock()
+
+
+def _attempt(key: str) -> int:
+    """
+    Numéro d'appel d'un même prompt (compteurs remis à zéro au-delà de 10 000 prompts)
+    """
+    with _attempts_lock:
+        if len(_attempts) > 10000:
+            _attempts.clear()
+        _attempts[key] = _attempts.get(key, 0) + 1
+        return _attempts[key] - 1
+
+
+class FakeLLMError(RuntimeError):
+    """
+    Échec simulé d'un appel LLM
+    """
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    LLM local déterministe pour les benchmarks et les tests hors ligne.
+
+    Pour un même prompt (et une même graine), la latence, l'échec éventuel et la
+    réponse sont identiques d'une exécution à l'autre. La réponse respecte le
+    format attendu par CrewAI ("Final Answer: ...") et contient un JSON avec un
+    score de confiance.
+    """
+
+    model_name: str = "fake"
+    temperature: float = 0.0
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    distribution: str = "normal"
+    failure_rate: float = 0.0
+    completion_tokens: int = 200
+    min_confidence: float = 0.6
+    max_confidence: float = 0.98
+    seed: int = 0
+    limiter: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _latency(self, rng: random.Random) -> float:
+        mean = self.latency_ms / 1000
+        jitter = self.jitter_ms / 1000
+        if self.distribution == "fixed":
+            return mean
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(mean - jitter, mean + jitter))
+        if self.distribution == "lognormal":
+            # Queue de distribution longue, comme les vraies API
+            return rng.lognormvariate(0, 0.5) * mean
+        return max(0.0, rng.gauss(mean, jitter))
+
+    def _answer(self, rng: random.Random, prompt: str) -> str:
+        payload = {
+            "confidence": round(rng.uniform(self.min_confidence, self.max_confidence), 2),
+            "summary": " ".join(f"mot{rng.randint(0, 999)}" for _ in range(self.completion_tokens)),
+        }
+        return "Thought: J'ai maintenant la réponse\nFinal Answer: " + json.dumps(payload, ensure_ascii=False)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        key = f"{self.seed}:{self.model_name}:{prompt}"
+        rng = random.Random(key)
+        # Latence et échec tirés par tentative : une reprise ou un duplicata du même prompt
+        # n'a pas le même sort (la suite reste déterministe d'une exécution à l'autre)
+        timing = random.Random(f"{key}:{_attempt(key)}")
+        prompt_tokens = max(1, len(prompt) // 4)
+
+        def call() -> ChatResult:
+            time.sleep(self._latency(timing))
+            if timing.random() < self.failure_rate:
+                raise FakeLLMError("Échec simulé du LLM")
+            content = self._answer(rng, prompt)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": prompt_tokens + self.completion_tokens,
+            }
+            return ChatResult(
+                generations=[ChatGeneration(message=AIMessage(content=content))],
+                llm_output={"token_usage": usage, "model_name": self.model_name}
+            )
+
+        if self.limiter is None:
+            return call()
+        # Mêmes limites globales que les vrais appels HTTP
+        with self.limiter.slot(prompt_tokens) as release:
+            try:
+                return call()
+            finally:
+                release()
+
+
+def fake_llm_from_env(
+    model: str,
+    temperature: float,
+    limiter: Any = None,
+    callbacks: Optional[List[Any]] = None
+) -> FakeChatModel:
+    """
+    FAKE_LLM_LATENCY_MS, FAKE_LLM_JITTER_MS, FAKE_LLM_DISTRIBUTION (fixed|uniform|normal|lognormal),
+    FAKE_LLM_FAILURE_RATE, FAKE_LLM_COMPLETION_TOKENS, FAKE_LLM_MIN_CONFIDENCE,
+    FAKE_LLM_MAX_CONFIDENCE, FAKE_LLM_SEED.
+
+    Chaque réglage peut être précisé par modèle pour simuler un petit et un grand
+    modèle : FAKE_LLM_LATENCY_MS_GPT_3_5_TURBO=50, FAKE_LLM_MIN_CONFIDENCE_GPT_3_5_TURBO=0.3...
+    """
+    suffix = re.sub(r"[^A-Z0-9]", "_", model.upper())
+
+    def setting(name: str, default: str) -> str:
+        return os.getenv(f"FAKE_LLM_{name}_{suffix}", os.getenv(f"FAKE_LLM_{name}", default))
+
+    return FakeChatModel(
+        model_name=model,
+        temperature=temperature,
+        latency_ms=float(setting("LATENCY_MS", "200")),
+        jitter_ms=float(setting("JITTER_MS", "50")),
+        distribution=setting("DISTRIBUTION", "normal"),
+        failure_rate=float(setting("FAILURE_RATE", "0")),
+        completion_tokens=int(setting("COMPLETION_TOKENS", "200")),
+        min_confidence=float(setting("MIN_CONFIDENCE", "0.6")),
+        max_confidence=float(setting("MAX_CONFIDENCE", "0.98")),
+        seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        limiter=limiter,
+        callbacks=callbacks
+    )
@@ -0,0 +1,173 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# Champs transmis à chaque étape (clé = étape qui reçoit les données)
+STAGE_FIELDS: Dict[str, List[str]] = {
+    "project": ["analysis", "category", "priority", "needs", "recommendations", "confidence"],
+    "technical": ["requirements", "objectives", "acceptance_criteria", "timeline", "resources", "risks", "success_metrics"],
+    "release": ["solution", "architecture", "integrations", "security", "performance", "deployment", "effort_estimation"],
+}
+
+# Budget de tokens du digest injecté dans le prompt de chaque étape
+STAGE_BUDGETS: Dict[str, int] = {
+    "project": 800,
+    "technical": 1200,
+    "release": 1200,
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Nombre de tokens (tiktoken si disponible, sinon ~4 caractères par token)
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return max(1, len(text) // 4)
+
+
+def compact_json(data: Any) -> str:
+    """
+    JSON canonique sans espaces superflus
+    """
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _shorten(text: str, mode: str) -> str:
+    """
+    Réduit une chaîne de moitié : par phrases entières en mode "extract", sinon par caractères
+    """
+    if mode == "extract":
+        sentences = _SENTENCE_END.split(text)
+        if len(sentences) > 1:
+            extract = " ".join(sentences[: max(1, len(sentences) // 2)]) + " …"
+            if len(extract) < len(text):
+                return extract
+    return text[: len(text) // 2].rstrip() + "…"
+
+
+def _largest(data: Any, path: tuple = ()) -> Optional[tuple]:
+    """
+    Chemin et taille de la plus grosse chaîne ou liste du document qui peut encore
+    être réduite (plus de 2 caractères, plus d'un élément)
+    """
+    best = None
+    if isinstance(data, str):
+        return (len(data), path) if len(data) > 2 else None
+    if isinstance(data, list):
+        best = (len(compact_json(data)), path) if len(data) > 1 else None
+        items = enumerate(data)
+    elif isinstance(data, dict):
+        items = data.items()
+    else:
+        return None
+    for key, value in items:
+        candidate = _largest(value, path + (key,))
+        if candidate is not None and (best is None or candidate[0] > best[0]):
+            best = candidate
+    return best
+
+
+def fit_to_budget(data: Any, budget: int, mode: str = "truncate", max_rounds: int = 50) -> str:
+    """
+    Réduit le document sans appel LLM jusqu'à respecter le budget de tokens :
+    la plus grosse chaîne est raccourcie, ou la plus grosse liste perd sa seconde moitié.
+    En dernier recours, les derniers champs d'un objet sont retirés entiers ; le
+    résultat reste un JSON valide, quitte à dépasser le budget
+    """
+    text = compact_json(data)
+    for _ in range(max_rounds):
+        if count_tokens(text) <= budget:
+            return text
+        target = _largest(data)
+        if target is None:
+            break
+        path = target[1]
+        parent = data
+        for key in path[:-1]:
+            parent = parent[key]
+        value = parent[path[-1]] if path else data
+        reduced = _shorten(value, mode) if isinstance(value, str) else value[: max(1, len(value) // 2)]
+        if path:
+            parent[path[-1]] = reduced
+        else:
+            data = reduced
+        text = compact_json(data)
+
+    # Dernier recours : champs les moins prioritaires (les derniers) retirés entiers
+    while isinstance(data, dict) and len(data) > 1 and count_tokens(text) > budget:
+        data.popitem()
+        text = compact_json(data)
+    return text
+
+
+class HandoffSerializer:
+    """
+    Sérialise la sortie d'une étape en digest compact pour le prompt de l'étape suivante.
+
+    - HANDOFF_FIELDS_<ETAPE> : liste blanche des champs (séparés par des virgules)
+    - HANDOFF_BUDGET_<ETAPE> : budget de tokens du digest
+    - HANDOFF_MODE : "truncate" (coupe des chaînes) ou "extract" (phrases entières)
+    """
+
+    def __init__(self):
+        self.mode = os.getenv("HANDOFF_MODE", "truncate")
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def fields_for(self, stage: str) -> Optional[List[str]]:
+        configured = os.getenv(f"HANDOFF_FIELDS_{stage.upper()}")
+        if configured:
+            return [field.strip() for field in configured.split(",") if field.strip()]
+        return STAGE_FIELDS.get(stage)
+
+    def budget_for(self, stage: str) -> int:
+        return int(os.getenv(f"HANDOFF_BUDGET_{stage.upper()}", STAGE_BUDGETS.get(stage, 1000)))
+
+    def digest(self, stage: str, data: Dict[str, Any]) -> str:
+        """
+        Digest JSON de `data` destiné au prompt de l'étape `stage`
+        """
+        fields = self.fields_for(stage)
+        # Ordre de la liste blanche : les champs prioritaires d'abord
+        selected = data if fields is None else {k: data[k] for k in fields if k in data}
+        # Copie JSON : la réduction ne doit pas modifier le résultat de l'étape précédente
+        selected = json.loads(compact_json(selected))
+        text = fit_to_budget(selected, self.budget_for(stage), self.mode)
+
+        stage_stats = self.stats.setdefault(stage, {"calls": 0, "raw_tokens": 0, "prompt_tokens": 0})
+        stage_stats["calls"] += 1
+        # Taille qu'aurait eue l'ancien prompt ({dict} interpolé tel quel)
+        stage_stats["raw_tokens"] += count_tokens(str(data))
+        stage_stats["prompt_tokens"] += count_tokens(text)
+        return text
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            stage: {
+                **values,
+                "saved_ratio": 1 - values["prompt_tokens"] / values["raw_tokens"] if values["raw_tokens"] else 0.0,
+            }
+            for stage, values in self.stats.items()
+        }
+
+
+_serializer: Optional[HandoffSerializer] = None
+
+
+def get_handoff() -> HandoffSerializer:
+    global _serializer
+    if _serializer is None:
+        _serializer = HandoffSerializer()
+    return _serializer
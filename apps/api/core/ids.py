@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from core.cache import cache_key
+
+# Base32 de Crockford (sans I, L, O, U) : l'ordre lexicographique suit l'ordre numérique
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(_ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+class UlidGenerator:
+    """
+    Identifiants ULID : 48 bits d'horodatage en millisecondes + 80 bits aléatoires,
+    26 caractères triables dans l'ordre de création. Dans une même milliseconde, la
+    partie aléatoire est incrémentée pour garder l'ordre strict sur le processus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms <= self._last_ms:
+                # Même milliseconde (ou horloge revenue en arrière) : suite monotone
+                now_ms = self._last_ms
+                self._last_random = (self._last_random + 1) & ((1 << 80) - 1)
+                if self._last_random == 0:
+                    now_ms += 1
+            else:
+                self._last_random = int.from_bytes(os.urandom(10), "big")
+            self._last_ms = now_ms
+            return _encode(now_ms, 10) + _encode(self._last_random, 16)
+
+
+_generator = UlidGenerator()
+
+
+def new_ulid() -> str:
+    return _generator.new()
+
+
+def new_workflow_id() -> str:
+    """
+    Identifiant unique et triable par date de création (wf_<ULID>)
+    """
+    return f"wf_{new_ulid()}"
+
+
+def ulid_timestamp(value: str) -> float:
+    """
+    Date de création (secondes epoch) d'un ULID ou d'un identifiant préfixé
+    """
+    encoded = value.rsplit("_", 1)[-1][:10].upper()
+    millis = 0
+    for char in encoded:
+        millis = millis * 32 + _ALPHABET.index(char)
+    return millis / 1000
+
+
+def intent_hash(intent: str, context: Optional[Any] = None) -> str:
+    """
+    Empreinte stable d'une intention (intention et contexte normalisés), identique
+    entre processus et réplicas : clé de déduplication des workflows
+    """
+    return cache_key("workflow", "run", "", None, {"intent": intent, "context": context})
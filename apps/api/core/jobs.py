@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set
+
+from core.ids import intent_hash, new_workflow_id
+from core.workflow import STAGES, WorkflowPipeline
+from models import AgentResponse, UserIntent
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore(ABC):
+    """
+    Stockage de l'état des workflows asynchrones, partagé entre les réplicas
+    """
+
+    @abstractmethod
+    async def save(self, job: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def update(self, workflow_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """
+        Met à jour un job ; seul le réplica qui exécute le workflow écrit dessus
+        """
+        job = await self.get(workflow_id)
+        if job is None:
+            return None
+        job.update(fields)
+        job["updated_at"] = _now()
+        await self.save(job)
+        return job
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Stockage local au processus (développement, réplica unique)
+    """
+
+    def __init__(self, max_jobs: int = 10000):
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["workflow_id"]] = json.loads(json.dumps(job))
+        # Éviction des jobs les plus anciens (ordre d'insertion du dict)
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.pop(next(iter(self._jobs)))
+
+    async def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(workflow_id)
+        return json.loads(json.dumps(job)) if job is not None else None
+
+
+class RedisJobStore(JobStore):
+    """
+    Stockage Redis : n'importe quel réplica peut répondre à un polling
+    """
+
+    def __init__(self, url: str, ttl: int = 86400, prefix: str = "coachlibre:workflow:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        await self.client.set(self.prefix + job["workflow_id"], json.dumps(job), ex=self.ttl)
+
+    async def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(self.prefix + workflow_id)
+        return json.loads(raw) if raw else None
+
+
+def create_job_store() -> JobStore:
+    """
+    JOB_STORE=memory|redis ; par défaut Redis dès que REDIS_URL est défini
+    """
+    redis_url = os.getenv("REDIS_URL")
+    backend = os.getenv("JOB_STORE", "redis" if redis_url else "memory")
+    if backend == "redis":
+        return RedisJobStore(redis_url or "redis://localhost:6379", ttl=int(os.getenv("JOB_TTL_SECONDS", "86400")))
+    return InMemoryJobStore()
+
+
+class JobManager:
+    """
+    Soumet les workflows en tâche de fond et suit leur progression étape par étape
+    """
+
+    def __init__(self, store: JobStore, pipeline: WorkflowPipeline):
+        self.store = store
+        self.pipeline = pipeline
+        # Références fortes vers les tâches en cours (sinon le GC peut les collecter)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, user_intent: UserIntent) -> Dict[str, Any]:
+        workflow_id = new_workflow_id()
+        now = _now()
+        job = {
+            "workflow_id": workflow_id,
+            "status": "pending",
+            "stages": {stage: "pending" for stage in STAGES},
+            "results": [],
+            "result": None,
+            "error": None,
+            "intent_hash": intent_hash(user_intent.intent, user_intent.context),
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.store.save(job)
+
+        task = asyncio.create_task(self._run(workflow_id, user_intent))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(workflow_id)
+
+    async def _run(self, workflow_id: str, user_intent: UserIntent) -> None:
+        stages = {stage: "pending" for stage in STAGES}
+        results = []
+
+        async def on_stage(stage: str, status: str, response: Optional[AgentResponse]):
+            stages[stage] = status
+            if response is not None:
+                results.append(response.model_dump())
+            await self.store.update(workflow_id, status="running", stages=stages, results=results)
+
+        try:
+            result = await self.pipeline.run(user_intent, workflow_id=workflow_id, on_stage=on_stage)
+            # Budget de temps épuisé : résultat partiel, étapes non exécutées marquées "skipped"
+            stages.update({stage: "skipped" for stage in result.skipped_stages})
+            await self.store.update(workflow_id, status=result.status, stages=stages, result=result.model_dump())
+        except asyncio.CancelledError:
+            await self.store.update(workflow_id, status="cancelled")
+            raise
+        except Exception as e:
+            stages = {stage: ("failed" if status == "running" else status) for stage, status in stages.items()}
+            await self.store.update(workflow_id, status="failed", stages=stages, error=str(e))
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,223 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+from core.metrics import llm_metrics_handler
+from core.streaming import llm_streaming_options
+from core.tracing import SPAN_KIND_CLIENT, get_tracer, llm_tracing_handler
+
+
+class TokenBucket:
+    """
+    Seau à jetons thread-safe : `rate_per_minute` unités rechargées en continu
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self._tokens = rate_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> None:
+        # Une demande supérieure à la capacité attendrait indéfiniment
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class LLMLimiter:
+    """
+    Limites globales du processus sur les appels LLM :
+    - LLM_MAX_CONCURRENCY : requêtes simultanées
+    - LLM_REQUESTS_PER_MINUTE : requêtes par minute
+    - LLM_TOKENS_PER_MINUTE : tokens (estimés) par minute
+    """
+
+    def __init__(self):
+        self.semaphore = threading.BoundedSemaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "16")))
+        self.requests = TokenBucket(float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500")))
+        self.tokens = TokenBucket(float(os.getenv("LLM_TOKENS_PER_MINUTE", "150000")))
+
+    @contextmanager
+    def slot(self, estimated_tokens: int) -> Iterator[Callable[[], None]]:
+        """
+        Attend les quotas puis réserve une place ; la fonction fournie libère la place
+        """
+        self.requests.acquire(1)
+        self.tokens.acquire(estimated_tokens)
+        self.semaphore.acquire()
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                self.semaphore.release()
+
+        try:
+            yield release
+        except BaseException:
+            release()
+            raise
+
+
+def estimate_tokens(payload: bytes) -> int:
+    # Approximation usuelle : ~4 octets par token
+    return max(1, len(payload) // 4)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """
+    Libère la place de concurrence quand le corps de la réponse est fermé
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class LimitedTransport(httpx.HTTPTransport):
+    """
+    Transport HTTP keep-alive qui applique les limites globales à chaque requête
+    """
+
+    def __init__(self, limiter: LLMLimiter, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        # Span jusqu'aux en-têtes de la réponse ; l'attente des quotas est un attribut
+        with get_tracer().span("llm.http", kind=SPAN_KIND_CLIENT, **{"http.url": str(request.url)}) as span:
+            queued = time.perf_counter()
+            with self.limiter.slot(estimate_tokens(request.content)) as release:
+                if span is not None:
+                    span.set_attribute("llm.limiter_wait_ms", round((time.perf_counter() - queued) * 1000, 1))
+                response = super().handle_request(request)
+                if span is not None:
+                    span.set_attribute("http.status_code", response.status_code)
+                # En streaming, la place reste occupée jusqu'à la fin de la lecture
+                response.stream = _ReleasingStream(response.stream, release)
+                return response
+
+
+def resilience_enabled() -> bool:
+    """
+    LLM_RESILIENCE=false : appels LLM directs, sans reprises ni disjoncteur
+    """
+    return os.getenv("LLM_RESILIENCE", "true").lower() == "true"
+
+
+class LLMRegistry:
+    """
+    Registre des clients LLM partagés : un transport HTTP poolé par (fournisseur, modèle)
+    et un client par (fournisseur, modèle, température).
+
+    - LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE : taille du pool de connexions
+    - LLM_REQUEST_TIMEOUT : délai d'une requête HTTP
+    """
+
+    def __init__(self):
+        self.limiter = LLMLimiter()
+        self._http_clients: Dict[Tuple[str, str], httpx.Client] = {}
+        self._llms: Dict[Tuple[str, str, float], Any] = {}
+        self._lock = threading.Lock()
+
+    def _http_client(self, provider: str, model: str) -> httpx.Client:
+        key = (provider, model)
+        if key not in self._http_clients:
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "32")),
+                max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "16")),
+                keepalive_expiry=60.0
+            )
+            self._http_clients[key] = httpx.Client(
+                transport=LimitedTransport(self.limiter, limits=limits),
+                timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+            )
+        return self._http_clients[key]
+
+    def get(self, model: str, temperature: float, provider: Optional[str] = None) -> Any:
+        # LLM_PROVIDER=fake remplace tous les clients par le LLM local des benchmarks
+        provider = provider or os.getenv("LLM_PROVIDER", "openai")
+        key = (provider, model, temperature)
+        with self._lock:
+            if key not in self._llms:
+                self._llms[key] = self._build(provider, model, temperature)
+            return self._llms[key]
+
+    def _build(self, provider: str, model: str, temperature: float) -> Any:
+        options = llm_streaming_options()
+        callbacks = options.pop("callbacks", []) + [llm_metrics_handler(model)]
+        if get_tracer().enabled:
+            callbacks.append(llm_tracing_handler(model))
+        if provider == "fake":
+            from core.fake_llm import fake_llm_from_env
+
+            inner = fake_llm_from_env(model, temperature, limiter=self.limiter)
+        elif provider == "openai":
+            from langchain_openai import ChatOpenAI
+
+            inner = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=self._http_client(provider, model),
+                # Reprises assurées par LLMResilience
+                max_retries=0 if resilience_enabled() else 2,
+                **options
+            )
+        else:
+            raise ValueError(f"Fournisseur LLM inconnu : {provider}")
+
+        if not resilience_enabled():
+            inner.callbacks = callbacks
+            return inner
+
+        from core.resilient_llm import ResilientChatModel
+
+        # Callbacks portés par l'enveloppe : un seul appel compté, même après reprises
+        return ResilientChatModel(inner=inner, model_name=model, temperature=temperature, callbacks=callbacks)
+
+    def close(self) -> None:
+        for client in self._http_clients.values():
+            client.close()
+        self._http_clients.clear()
+        self._llms.clear()
+
+
+_registry: Optional[LLMRegistry] = None
+
+
+def get_llm_registry() -> LLMRegistry:
+    global _registry
+    if _registry is None:
+        _registry = LLMRegistry()
+    return _registry
+
+
+def get_llm(model: str, temperature: float, provider: Optional[str] = None) -> Any:
+    """
+    Retourne le client LLM partagé pour (modèle, température)
+    """
+    return get_llm_registry().get(model, temperature, provider)
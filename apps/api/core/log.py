@@ -0,0 +1,269 @@
+import atexit
+import contextvars
+import copy
+import hmac
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+import structlog
+
+from core.metrics import LOG_RECORDS_DROPPED
+from core.tracing import current_span
+
+# Requête en mode debug (en-tête X-Debug) : journaux DEBUG et traces verbeuses des crews
+debug_request: contextvars.ContextVar[bool] = contextvars.ContextVar("debug_request", default=False)
+# Crew dont les étapes d'agents sont journalisées (exécution échantillonnée)
+_verbose_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("verbose_route", default=None)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler qui n'attend jamais : file pleine, l'enregistrement est abandonné
+    et compté. Le contexte de la requête (variables structlog, trace) est capturé
+    dans le thread appelant, le rendu JSON se fait dans le thread du QueueListener.
+    """
+
+    def __init__(self, log_queue: queue.Queue, level: int):
+        super().__init__(log_queue)
+        self.threshold = level
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Niveau global, ou DEBUG pour les seules requêtes marquées X-Debug
+        if record.levelno < self.threshold and not debug_request.get():
+            return False
+        return super().filter(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Même processus : exc_info reste utilisable par le formateur, seul le message est figé
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict) and record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        context = structlog.contextvars.get_contextvars()
+        span = current_span()
+        if span is not None:
+            context = {**context, "trace_id": span.trace_id, "span_id": span.span_id}
+        record.log_context = context
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+def _add_record_context(logger: Any, method: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    record = event_dict.get("_record")
+    if record is not None:
+        for key, value in getattr(record, "log_context", {}).items():
+            event_dict.setdefault(key, value)
+        # Date de l'événement, pas celle de son écriture par le listener
+        event_dict.setdefault("timestamp", datetime.fromtimestamp(record.created, timezone.utc).isoformat())
+    return event_dict
+
+
+class LogSystem:
+    """
+    Journalisation structurée et non bloquante du processus :
+
+    - LOG_FORMAT : json (défaut) ou console
+    - LOG_LEVEL : niveau global (INFO)
+    - LOG_QUEUE_SIZE : enregistrements en attente avant abandon
+    - LOG_VERBOSE_SAMPLE_RATE : part des exécutions de crews dont les étapes d'agents
+      (pensées, outils, réponses) sont journalisées ; toujours pour X-Debug
+    - LOG_VERBOSE_MAX_CHARS : longueur maximale d'un texte d'étape journalisé
+    - LOG_DEBUG_HEADER=true et LOG_DEBUG_TOKEN : l'en-tête "X-Debug: <LOG_DEBUG_TOKEN>"
+      active le mode debug pour la requête (désactivé par défaut, et sans secret)
+    """
+
+    def __init__(self):
+        self.level = logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+        self.format = os.getenv("LOG_FORMAT", "json")
+        self.verbose_sample_rate = float(os.getenv("LOG_VERBOSE_SAMPLE_RATE", "0.0"))
+        self.verbose_max_chars = int(os.getenv("LOG_VERBOSE_MAX_CHARS", "2000"))
+        self.debug_token = os.getenv("LOG_DEBUG_TOKEN", "").encode()
+        self.debug_header = os.getenv("LOG_DEBUG_HEADER", "false").lower() == "true" and bool(self.debug_token)
+        self.queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        self.handler = NonBlockingQueueHandler(self.queue, self.level)
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self._debug_requests = 0
+        self._debug_lock = threading.Lock()
+
+    def configure(self) -> None:
+        shared = [structlog.stdlib.add_logger_name, structlog.stdlib.add_log_level]
+        renderer = structlog.dev.ConsoleRenderer() if self.format == "console" else structlog.processors.JSONRenderer(ensure_ascii=False)
+        formatter = structlog.stdlib.ProcessorFormatter(
+            foreign_pre_chain=shared,
+            processors=[
+                _add_record_context,
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.format_exc_info,
+                renderer,
+            ]
+        )
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(formatter)
+
+        structlog.configure(
+            processors=[structlog.stdlib.filter_by_level, *shared, structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            wrapper_class=structlog.stdlib.BoundLogger,
+            cache_logger_on_first_use=True
+        )
+
+        root = logging.getLogger()
+        root.handlers = [self.handler]
+        root.setLevel(self.level)
+
+        self.listener = logging.handlers.QueueListener(self.queue, output, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def authorize_debug(self, value: bytes) -> bool:
+        """
+        En-tête X-Debug accepté seulement s'il porte le secret partagé
+        """
+        return self.debug_header and hmac.compare_digest(value, self.debug_token)
+
+    def enter_debug(self) -> None:
+        # Journaux de l'application en DEBUG le temps des seules requêtes X-Debug en cours ;
+        # le handler écarte ceux des autres requêtes
+        with self._debug_lock:
+            self._debug_requests += 1
+            if self._debug_requests == 1:
+                logging.getLogger("coachlibre").setLevel(logging.DEBUG)
+
+    def exit_debug(self) -> None:
+        with self._debug_lock:
+            self._debug_requests -= 1
+            if self._debug_requests == 0:
+                logging.getLogger("coachlibre").setLevel(logging.NOTSET)
+
+    def close(self) -> None:
+        # Vide la file avant l'arrêt
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "level": logging.getLevelName(self.level),
+            "format": self.format,
+            "queued": self.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "verbose_sample_rate": self.verbose_sample_rate,
+        }
+
+
+_log_system: Optional[LogSystem] = None
+
+
+def configure_logging() -> LogSystem:
+    """
+    Installe la journalisation du processus (une fois par worker)
+    """
+    global _log_system
+    if _log_system is None:
+        _log_system = LogSystem()
+        _log_system.configure()
+    return _log_system
+
+
+def get_log_system() -> Optional[LogSystem]:
+    return _log_system
+
+
+def get_logger(name: str) -> Any:
+    return structlog.get_logger(name)
+
+
+@contextmanager
+def verbose_crew(route: Optional[str]) -> Iterator[bool]:
+    """
+    Tire au sort l'exécution d'un crew pour la journaliser en détail (toujours en
+    X-Debug) ; les étapes sont émises par log_agent_step
+    """
+    system = _log_system
+    sampled = system is not None and (
+        debug_request.get() or (system.verbose_sample_rate > 0 and random.random() < system.verbose_sample_rate)
+    )
+    if not sampled:
+        yield False
+        return
+    token = _verbose_route.set(route or "unrouted")
+    try:
+        yield True
+    finally:
+        _verbose_route.reset(token)
+
+
+def log_agent_step(step: Any) -> None:
+    """
+    step_callback des agents CrewAI : sans effet hors exécution échantillonnée
+    """
+    route = _verbose_route.get()
+    if route is None:
+        return
+    limit = _log_system.verbose_max_chars
+    logger = get_logger("coachlibre.crew")
+    # AgentFinish, ou liste de (AgentAction, observation)
+    if hasattr(step, "return_values"):
+        logger.info("agent_finish", route=route, thought=str(step.log)[:limit], output=str(step.return_values.get("output", ""))[:limit])
+        return
+    for action, observation in step if isinstance(step, list) else []:
+        logger.info(
+            "agent_action",
+            route=route,
+            tool=getattr(action, "tool", None),
+            tool_input=str(getattr(action, "tool_input", ""))[:limit],
+            thought=str(getattr(action, "log", ""))[:limit],
+            observation=str(observation)[:limit]
+        )
+
+
+class LogContextMiddleware:
+    """
+    Middleware ASGI : identifiant de requête (X-Request-ID, repris ou généré, renvoyé
+    dans la réponse) lié aux journaux de la requête ; "X-Debug: <LOG_DEBUG_TOKEN>"
+    active les journaux DEBUG et les traces verbeuses des crews pour cette seule requête
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex[:16]
+        system = _log_system
+        debug = system is not None and system.authorize_debug(headers.get(b"x-debug", b""))
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        token = debug_request.set(debug)
+        if debug:
+            system.enter_debug()
+        try:
+            with structlog.contextvars.bound_contextvars(request_id=request_id, path=scope["path"]):
+                await self.app(scope, receive, send_with_id)
+        finally:
+            if debug:
+                system.exit_debug()
+            debug_request.reset(token)
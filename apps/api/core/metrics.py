@@ -0,0 +1,316 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+# Les crews durent de quelques secondes à plusieurs minutes
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+STAGE_LATENCY = Histogram(
+    "coachlibre_agent_stage_duration_seconds",
+    "Durée des méthodes d'agents",
+    ["agent", "stage"],
+    buckets=LATENCY_BUCKETS
+)
+AGENT_CALLS = Counter(
+    "coachlibre_agent_calls_total",
+    "Appels des méthodes d'agents par statut (success, error, cancelled)",
+    ["agent", "stage", "status"]
+)
+LLM_CALLS = Counter("coachlibre_llm_calls_total", "Appels LLM", ["model", "status"])
+LLM_LATENCY = Histogram(
+    "coachlibre_llm_call_duration_seconds",
+    "Durée des appels LLM",
+    ["model"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter("coachlibre_llm_tokens_total", "Tokens LLM consommés", ["model", "kind"])
+CACHE_LOOKUPS = Counter(
+    "coachlibre_cache_lookups_total",
+    "Consultations des caches (hit_local, hit_shared, hit, miss, bypassed)",
+    ["cache", "result"]
+)
+WORKFLOWS_IN_FLIGHT = Gauge(
+    "coachlibre_workflows_in_flight",
+    "Workflows en cours d'exécution",
+    # Mode multiprocessus : somme des workers vivants
+    multiprocess_mode="livesum"
+)
+WORKFLOW_LATENCY = Histogram(
+    "coachlibre_workflow_duration_seconds",
+    "Durée des workflows complets",
+    buckets=LATENCY_BUCKETS
+)
+SPECULATIONS = Counter(
+    "coachlibre_speculations_total",
+    "Exécutions spéculatives de l'étape projet (accepted, rejected, error)",
+    ["result"]
+)
+SPECULATION_DIFF = Histogram(
+    "coachlibre_speculation_diff_ratio",
+    "Part du brouillon d'intention modifiée par le superviseur",
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0)
+)
+SUPERVISION_DECISIONS = Counter(
+    "coachlibre_supervision_decisions_total",
+    "Décisions de la politique de supervision",
+    ["agent", "decision", "reason"]
+)
+SINGLEFLIGHT = Counter(
+    "coachlibre_singleflight_total",
+    "Workflows calculés (leader) ou regroupés sur un calcul en cours (coalesced_local, coalesced_remote, fallback)",
+    ["result"]
+)
+MODEL_ROUTES = Counter(
+    "coachlibre_model_routes_total",
+    "Exécutions routées par modèle (accepted, final, deadline, escalate_<raison>)",
+    ["route", "model", "outcome"]
+)
+LLM_RETRIES = Counter("coachlibre_llm_retries_total", "Reprises d'appels LLM après une erreur transitoire", ["model", "error"])
+LLM_HEDGES = Counter(
+    "coachlibre_llm_hedges_total",
+    "Requêtes LLM dupliquées (launched) et requête gagnante (won : duplicata, lost : originale)",
+    ["model", "outcome"]
+)
+LLM_BREAKER_STATE = Gauge(
+    "coachlibre_llm_breaker_state",
+    "État du disjoncteur par modèle (0 fermé, 1 essai, 2 ouvert)",
+    ["model"],
+    multiprocess_mode="max"
+)
+STAGE_FALLBACKS = Counter(
+    "coachlibre_stage_fallbacks_total",
+    "Réponses de repli servies faute de modèle disponible",
+    ["route"]
+)
+DEADLINE_OUTCOMES = Counter(
+    "coachlibre_deadline_outcomes_total",
+    "Étapes passées en mode dégradé ou annulées faute de budget de temps (degraded, cancelled, timeout)",
+    ["stage", "outcome"]
+)
+LOG_RECORDS_DROPPED = Counter("coachlibre_log_records_dropped_total", "Journaux abandonnés, file de journalisation pleine")
+ERRORS = Counter("coachlibre_errors_total", "Erreurs par composant et type", ["component", "error"])
+
+
+def record_cache(cache: str, result: str) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+
+
+def record_error(component: str, error: BaseException) -> None:
+    ERRORS.labels(component=component, error=type(error).__name__).inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Exposition Prometheus (contenu, content-type) ; avec PROMETHEUS_MULTIPROC_DIR
+    (gunicorn), agrégation des métriques de tous les workers
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def summarize_activity(last: Optional[float], latencies: List[float], counts: Dict[str, int]) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+
+    def percentile(q: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return {
+        "last_activity": datetime.fromtimestamp(last, timezone.utc).isoformat() if last else None,
+        "calls": counts,
+        "latency_seconds": {
+            "window": len(latencies),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+        },
+    }
+
+
+class ActivityTracker:
+    """
+    Dernière activité et latences récentes de chaque agent, pour /agents/{id}/status
+    (fenêtre glissante des ACTIVITY_WINDOW derniers appels)
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._last: Dict[str, float] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent_id: str, duration: float, status: str) -> None:
+        with self._lock:
+            self._last[agent_id] = time.time()
+            self._latencies.setdefault(agent_id, deque(maxlen=self.window)).append(duration)
+            counts = self._counts.setdefault(agent_id, {"success": 0, "error": 0, "cancelled": 0})
+            counts[status] += 1
+
+    def snapshot(self, agent_id: str) -> Dict[str, Any]:
+        with self._lock:
+            last = self._last.get(agent_id)
+            latencies = list(self._latencies.get(agent_id, ()))
+            counts = dict(self._counts.get(agent_id, {"success": 0, "error": 0, "cancelled": 0}))
+        return summarize_activity(last, latencies, counts)
+
+    async def asnapshot(self, agent_id: str) -> Dict[str, Any]:
+        return self.snapshot(agent_id)
+
+
+class SharedActivityTracker(ActivityTracker):
+    """
+    Activité agrégée entre workers et réplicas dans Redis (ACTIVITY_REDIS_URL,
+    REDIS_URL par défaut). L'écriture est envoyée en tâche de fond ; la lecture
+    retombe sur l'activité locale si Redis est indisponible.
+    """
+
+    def __init__(self, redis_url: str, window: int = 200):
+        super().__init__(window)
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(redis_url, decode_responses=True)
+        self.prefix = "coachlibre:activity:"
+        self._pending: Set[asyncio.Task] = set()
+
+    def record(self, agent_id: str, duration: float, status: str) -> None:
+        super().record(agent_id, duration, status)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._push(agent_id, duration, status, time.time()))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _push(self, agent_id: str, duration: float, status: str, timestamp: float) -> None:
+        key = self.prefix + agent_id
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(f"{key}:last", timestamp)
+            pipe.lpush(f"{key}:latencies", duration)
+            pipe.ltrim(f"{key}:latencies", 0, self.window - 1)
+            pipe.hincrby(f"{key}:calls", status, 1)
+            await pipe.execute()
+        except Exception as e:
+            record_error("activity", e)
+
+    async def asnapshot(self, agent_id: str) -> Dict[str, Any]:
+        key = self.prefix + agent_id
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(f"{key}:last")
+            pipe.lrange(f"{key}:latencies", 0, -1)
+            pipe.hgetall(f"{key}:calls")
+            last, latencies, calls = await pipe.execute()
+        except Exception as e:
+            record_error("activity", e)
+            return self.snapshot(agent_id)
+        counts = {"success": 0, "error": 0, "cancelled": 0}
+        counts.update({status: int(count) for status, count in calls.items()})
+        return summarize_activity(float(last) if last else None, [float(v) for v in latencies], counts)
+
+
+_activity: Optional[ActivityTracker] = None
+
+
+def get_activity() -> ActivityTracker:
+    global _activity
+    if _activity is None:
+        window = int(os.getenv("ACTIVITY_WINDOW", "200"))
+        redis_url = os.getenv("ACTIVITY_REDIS_URL", os.getenv("REDIS_URL"))
+        _activity = SharedActivityTracker(redis_url, window) if redis_url else ActivityTracker(window)
+    return _activity
+
+
+def instrumented(method):
+    """
+    Mesure une méthode d'agent (self.agent_id requis) : histogramme de latence,
+    compteur d'appels par statut, activité de l'agent et span de trace
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        from core.tracing import get_tracer
+
+        start = time.perf_counter()
+        status = "success"
+        try:
+            with get_tracer().span(f"agent.{self.agent_id}.{method.__name__}", **{"agent.id": self.agent_id}):
+                return await method(self, *args, **kwargs)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status = "error"
+            record_error(self.agent_id, e)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            STAGE_LATENCY.labels(agent=self.agent_id, stage=method.__name__).observe(duration)
+            AGENT_CALLS.labels(agent=self.agent_id, stage=method.__name__, status=status).inc()
+            get_activity().record(self.agent_id, duration, status)
+
+    return wrapper
+
+
+_llm_handler_class = None
+
+
+def llm_metrics_handler(model: str) -> Any:
+    """
+    Handler LangChain qui compte les appels, la durée et les tokens d'un modèle
+    (construit à la demande pour ne pas importer langchain au démarrage)
+    """
+    global _llm_handler_class
+    if _llm_handler_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class LLMMetricsHandler(BaseCallbackHandler):
+            def __init__(self, model: str):
+                self.model = model
+                self._started: Dict[Any, float] = {}
+
+            def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any) -> None:
+                self._started[run_id] = time.perf_counter()
+
+            def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any) -> None:
+                self._started[run_id] = time.perf_counter()
+
+            def _finish(self, run_id: Any, status: str) -> None:
+                started = self._started.pop(run_id, None)
+                if started is not None:
+                    LLM_LATENCY.labels(model=self.model).observe(time.perf_counter() - started)
+                LLM_CALLS.labels(model=self.model, status=status).inc()
+
+            def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+                self._finish(run_id, "success")
+                usage = (response.llm_output or {}).get("token_usage") or {}
+                if not usage:
+                    # Réponses en streaming : pas de décompte fourni, on estime la complétion
+                    from core.llm import estimate_tokens
+
+                    text = "".join(g.text for generations in response.generations for g in generations)
+                    usage = {"completion_tokens": estimate_tokens(text.encode())}
+                for kind in ("prompt_tokens", "completion_tokens"):
+                    if usage.get(kind):
+                        LLM_TOKENS.labels(model=self.model, kind=kind.split("_")[0]).inc(usage[kind])
+
+            def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+                self._finish(run_id, "error")
+                record_error("llm", error)
+
+        _llm_handler_class = LLMMetricsHandler
+    return _llm_handler_class(model)
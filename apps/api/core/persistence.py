@@ -0,0 +1,469 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.metrics import record_error
+
+logger = logging.getLogger("coachlibre.persistence")
+
+# Colonnes écrites par table (ordre des tuples du tampon)
+TABLES: Dict[str, Tuple[str, ...]] = {
+    "workflows": ("workflow_id", "user_id", "intent", "intent_hash", "status", "final_output", "error", "duration_ms", "created_at"),
+    "workflow_stages": ("workflow_id", "stage", "position", "agent_id", "confidence", "output", "duration_ms", "created_at"),
+    "agent_feedback": ("agent_id", "workflow_id", "user_id", "feedback", "created_at"),
+}
+
+# Clé d'unicité : une réécriture remplace la ligne (workflow relancé, étape recalculée)
+CONFLICT_KEYS: Dict[str, Tuple[str, ...]] = {
+    "workflows": ("workflow_id",),
+    "workflow_stages": ("workflow_id", "stage"),
+}
+
+POSTGRES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    workflow_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    intent TEXT NOT NULL,
+    intent_hash TEXT,
+    status TEXT NOT NULL,
+    final_output TEXT,
+    error TEXT,
+    duration_ms DOUBLE PRECISION,
+    created_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workflows_user_id_idx ON workflows (user_id, created_at DESC);
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS intent_hash TEXT;
+CREATE INDEX IF NOT EXISTS workflows_intent_hash_idx ON workflows (intent_hash);
+
+CREATE TABLE IF NOT EXISTS workflow_stages (
+    workflow_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    agent_id TEXT,
+    confidence DOUBLE PRECISION,
+    output JSONB,
+    duration_ms DOUBLE PRECISION,
+    created_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (workflow_id, stage)
+);
+
+CREATE TABLE IF NOT EXISTS agent_feedback (
+    id BIGSERIAL PRIMARY KEY,
+    agent_id TEXT NOT NULL,
+    workflow_id TEXT,
+    user_id TEXT,
+    feedback JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agent_feedback_agent_id_idx ON agent_feedback (agent_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS agent_feedback_workflow_id_idx ON agent_feedback (workflow_id);
+CREATE INDEX IF NOT EXISTS agent_feedback_user_id_idx ON agent_feedback (user_id);
+"""
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    workflow_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    intent TEXT NOT NULL,
+    intent_hash TEXT,
+    status TEXT NOT NULL,
+    final_output TEXT,
+    error TEXT,
+    duration_ms REAL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workflows_user_id_idx ON workflows (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS workflows_intent_hash_idx ON workflows (intent_hash);
+
+CREATE TABLE IF NOT EXISTS workflow_stages (
+    workflow_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    agent_id TEXT,
+    confidence REAL,
+    output TEXT,
+    duration_ms REAL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (workflow_id, stage)
+);
+
+CREATE TABLE IF NOT EXISTS agent_feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT NOT NULL,
+    workflow_id TEXT,
+    user_id TEXT,
+    feedback TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agent_feedback_agent_id_idx ON agent_feedback (agent_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS agent_feedback_workflow_id_idx ON agent_feedback (workflow_id);
+CREATE INDEX IF NOT EXISTS agent_feedback_user_id_idx ON agent_feedback (user_id);
+"""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def insert_sql(table: str, placeholder) -> str:
+    """
+    INSERT (avec remplacement sur la clé d'unicité) ; placeholder(i) donne le
+    marqueur du i-ème paramètre ($1 pour asyncpg, ? pour SQLite)
+    """
+    columns = TABLES[table]
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(placeholder(i + 1) for i in range(len(columns)))})"
+    keys = CONFLICT_KEYS.get(table)
+    if keys:
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in keys)
+        sql += f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    return sql
+
+
+class PersistenceBackend(ABC):
+    """
+    Base de données des workflows, étapes et retours utilisateurs
+    """
+
+    async def connect(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+    @abstractmethod
+    async def write_batch(self, batch: Dict[str, List[tuple]]) -> None:
+        ...
+
+    @abstractmethod
+    async def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        ...
+
+    def placeholder(self, index: int) -> str:
+        return f"${index}"
+
+
+class PostgresBackend(PersistenceBackend):
+    """
+    PostgreSQL via un pool asyncpg (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE)
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.pool = None
+
+    async def connect(self) -> None:
+        import asyncpg
+
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+        )
+        async with self.pool.acquire() as connection:
+            await connection.execute(POSTGRES_SCHEMA)
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def write_batch(self, batch: Dict[str, List[tuple]]) -> None:
+        # Une transaction et un executemany par table pour tout le lot
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                for table, rows in batch.items():
+                    await connection.executemany(insert_sql(table, self.placeholder), rows)
+
+    async def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        async with self.pool.acquire() as connection:
+            return [dict(row) for row in await connection.fetch(sql, *args)]
+
+
+class SQLiteBackend(PersistenceBackend):
+    """
+    Équivalent SQLite (tests, développement local) : appels exécutés hors de la boucle
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def placeholder(self, index: int) -> str:
+        return "?"
+
+    def _run(self, func):
+        with self._lock:
+            return func(self._connection)
+
+    async def connect(self) -> None:
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        await asyncio.to_thread(self._run, lambda c: c.executescript(SQLITE_SCHEMA))
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+
+    @staticmethod
+    def _adapt(value: Any) -> Any:
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    async def write_batch(self, batch: Dict[str, List[tuple]]) -> None:
+        def write(connection: sqlite3.Connection) -> None:
+            with connection:
+                for table, rows in batch.items():
+                    connection.executemany(
+                        insert_sql(table, self.placeholder),
+                        [tuple(self._adapt(v) for v in row) for row in rows]
+                    )
+
+        await asyncio.to_thread(self._run, write)
+
+    async def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        # Requêtes écrites pour asyncpg ($1, $2...) : conversion des marqueurs
+        for index in range(len(args), 0, -1):
+            sql = sql.replace(f"${index}", "?")
+        args = tuple(self._adapt(v) for v in args)
+        rows = await asyncio.to_thread(self._run, lambda c: c.execute(sql, args).fetchall())
+        return [dict(row) for row in rows]
+
+
+class WorkflowStore:
+    """
+    Persistance asynchrone des workflows, des sorties d'étapes et des retours.
+
+    Les écritures passent par un tampon en mémoire (write-behind) vidé par lots toutes
+    les PERSIST_FLUSH_INTERVAL secondes ou dès PERSIST_BATCH_SIZE lignes : le chemin
+    des requêtes n'attend jamais la base. Si le tampon (PERSIST_BUFFER_SIZE) est plein,
+    les lignes sont abandonnées et comptées plutôt que de ralentir l'API.
+    """
+
+    def __init__(self, backend: Optional[PersistenceBackend]):
+        self.backend = backend
+        self.flush_interval = float(os.getenv("PERSIST_FLUSH_INTERVAL", "1.0"))
+        self.batch_size = int(os.getenv("PERSIST_BATCH_SIZE", "200"))
+        self.buffer_size = int(os.getenv("PERSIST_BUFFER_SIZE", "10000"))
+        self.reconnect_interval = float(os.getenv("PERSIST_RECONNECT_SECONDS", "5"))
+        self.reconnect_max_interval = float(os.getenv("PERSIST_RECONNECT_MAX_SECONDS", "60"))
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0, "connect_errors": 0}
+        self.connected = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._reconnector: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def start(self) -> None:
+        """
+        Connexion à la base ; en cas d'échec l'API démarre quand même, la persistance
+        désactivée, et la connexion est retentée en arrière-plan (les lignes sont
+        gardées dans le tampon, dans sa limite, jusqu'à la reconnexion)
+        """
+        if self.backend is None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.buffer_size)
+        if not await self._connect():
+            self._reconnector = asyncio.create_task(self._reconnect_loop())
+
+    async def _connect(self) -> bool:
+        try:
+            await self.backend.connect()
+        except Exception as e:
+            record_error("persistence", e)
+            self.stats["connect_errors"] += 1
+            logger.warning("persistance indisponible (%s: %s), nouvel essai en arrière-plan", type(e).__name__, e)
+            return False
+        self.connected = True
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return True
+
+    async def _reconnect_loop(self) -> None:
+        delay = self.reconnect_interval
+        while True:
+            await asyncio.sleep(delay)
+            if await self._connect():
+                logger.info("persistance reconnectée")
+                return
+            delay = min(self.reconnect_max_interval, delay * 2)
+
+    async def close(self) -> None:
+        if self._reconnector is not None:
+            self._reconnector.cancel()
+            try:
+                await self._reconnector
+            except asyncio.CancelledError:
+                pass
+        if self._flusher is not None:
+            # Marqueur de fin : le flusher termine le lot en cours au lieu d'être interrompu
+            await self._queue.put(None)
+            await self._flusher
+            await self.flush()
+        if self.connected:
+            await self.backend.close()
+            self.connected = False
+
+    def _enqueue(self, table: str, row: tuple) -> None:
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait((table, row))
+            self.stats["queued"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    async def _flush_loop(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            rows = [item]
+            stopping = False
+            # Regroupe ce qui arrive pendant l'intervalle, dans la limite du lot
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(rows) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                rows.append(item)
+            await self._write(rows)
+            if stopping:
+                return
+
+    async def flush(self) -> None:
+        """
+        Écrit immédiatement tout le contenu du tampon
+        """
+        if self._queue is None or not self.connected:
+            return
+        rows = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                rows.append(item)
+        if rows:
+            await self._write(rows)
+
+    async def _write(self, rows: List[Tuple[str, tuple]]) -> None:
+        batch: Dict[str, List[tuple]] = {}
+        for table, row in rows:
+            batch.setdefault(table, []).append(row)
+        try:
+            await self.backend.write_batch(batch)
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+        except Exception as e:
+            # Une base indisponible ne doit pas faire échouer les workflows
+            record_error("persistence", e)
+            self.stats["errors"] += 1
+            self.stats["dropped"] += len(rows)
+
+    def record_workflow(
+        self,
+        workflow_id: str,
+        user_id: Optional[str],
+        intent: str,
+        status: str,
+        final_output: Optional[str] = None,
+        error: Optional[str] = None,
+        duration: Optional[float] = None,
+        stages: Optional[List[Dict[str, Any]]] = None,
+        intent_hash: Optional[str] = None
+    ) -> None:
+        """
+        Met en file le workflow et ses étapes, dans l'ordre (dict stage, agent_id, confidence, output, duration)
+        """
+        now = _now()
+        self._enqueue("workflows", (
+            workflow_id, user_id, intent, intent_hash, status, final_output, error,
+            duration * 1000 if duration is not None else None, now
+        ))
+        for position, stage in enumerate(stages or []):
+            duration_stage = stage.get("duration")
+            self._enqueue("workflow_stages", (
+                workflow_id,
+                stage["stage"],
+                position,
+                stage.get("agent_id"),
+                stage.get("confidence"),
+                json.dumps(stage.get("output"), ensure_ascii=False, default=str),
+                duration_stage * 1000 if duration_stage is not None else None,
+                now
+            ))
+
+    def record_feedback(self, agent_id: str, feedback: Dict[str, Any], workflow_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        self._enqueue("agent_feedback", (
+            agent_id, workflow_id, user_id, json.dumps(feedback, ensure_ascii=False, default=str), _now()
+        ))
+
+    async def get_workflow(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        if not self.connected:
+            return None
+        rows = await self.backend.fetch("SELECT * FROM workflows WHERE workflow_id = $1", workflow_id)
+        if not rows:
+            return None
+        workflow = rows[0]
+        stages = await self.backend.fetch(
+            "SELECT stage, agent_id, confidence, output, duration_ms FROM workflow_stages WHERE workflow_id = $1 ORDER BY position",
+            workflow_id
+        )
+        for stage in stages:
+            if isinstance(stage["output"], str):
+                stage["output"] = json.loads(stage["output"])
+        workflow["stages"] = stages
+        return workflow
+
+    async def list_workflows(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        if not self.connected:
+            return []
+        return await self.backend.fetch(
+            "SELECT workflow_id, status, intent, intent_hash, duration_ms, created_at FROM workflows "
+            "WHERE user_id = $1 ORDER BY created_at DESC LIMIT $2",
+            user_id, limit
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "connected": self.connected,
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "buffered": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+def create_workflow_store() -> WorkflowStore:
+    """
+    PERSISTENCE_BACKEND : postgres (défaut si DATABASE_URL est défini), sqlite
+    (PERSISTENCE_SQLITE_PATH, en mémoire par défaut) ou none
+    """
+    backend = os.getenv("PERSISTENCE_BACKEND", "postgres" if os.getenv("DATABASE_URL") else "none")
+    if backend == "postgres":
+        return WorkflowStore(PostgresBackend(os.environ["DATABASE_URL"]))
+    if backend == "sqlite":
+        return WorkflowStore(SQLiteBackend(os.getenv("PERSISTENCE_SQLITE_PATH", ":memory:")))
+    return WorkflowStore(None)
+
+
+_store: Optional[WorkflowStore] = None
+
+
+def get_workflow_store() -> WorkflowStore:
+    global _store
+    if _store is None:
+        _store = create_workflow_store()
+    return _store
@@ -0,0 +1,85 @@
+import asyncio
+import importlib
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.tracing import get_tracer
+
+# Agents disponibles : identifiant → (module, classe), importés au premier usage
+AGENT_FACTORIES: Dict[str, Tuple[str, str]] = {
+    "crew": ("agents.crew_manager", "CrewManager"),
+    "intent": ("agents.intent_manager", "IntentManager"),
+    "project": ("agents.project_manager", "ProjectManager"),
+    "technical": ("agents.technical_lead", "TechnicalLead"),
+    "release": ("agents.release_manager", "ReleaseManager"),
+}
+
+
+class AgentRegistry:
+    """
+    Construit les agents à la demande : crewai/langchain ne sont importés et les
+    Agent CrewAI créés qu'à la première utilisation (ou lors du préchauffage)
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.factories = factories or AGENT_FACTORIES
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self.factories
+
+    def is_warm(self, agent_id: str) -> bool:
+        return agent_id in self._instances
+
+    def get(self, agent_id: str) -> Any:
+        """
+        Retourne l'agent, en le construisant si nécessaire (bloquant)
+        """
+        instance = self._instances.get(agent_id)
+        if instance is not None:
+            return instance
+
+        if agent_id not in self.factories:
+            raise KeyError(f"Agent inconnu : {agent_id}")
+
+        with self._lock:
+            if agent_id not in self._instances:
+                self._instances[agent_id] = self.agent_class(agent_id)()
+            return self._instances[agent_id]
+
+    def agent_class(self, agent_id: str) -> type:
+        """
+        Classe de l'agent (importe le module sans construire l'agent)
+        """
+        if agent_id not in self.factories:
+            raise KeyError(f"Agent inconnu : {agent_id}")
+        module_name, class_name = self.factories[agent_id]
+        return getattr(importlib.import_module(module_name), class_name)
+
+    async def aget(self, agent_id: str) -> Any:
+        """
+        Variante asynchrone : la première construction se fait hors de la boucle d'événements
+        """
+        instance = self._instances.get(agent_id)
+        if instance is not None:
+            return instance
+        with get_tracer().span("agent.build", **{"agent.id": agent_id}):
+            return await asyncio.to_thread(self.get, agent_id)
+
+    async def warm_up(self, agent_ids: Optional[Iterable[str]] = None) -> None:
+        for agent_id in agent_ids or self.factories:
+            await self.aget(agent_id)
+
+    def status(self) -> Dict[str, bool]:
+        return {agent_id: self.is_warm(agent_id) for agent_id in self.factories}
+
+
+_registry: Optional[AgentRegistry] = None
+
+
+def get_agent_registry() -> AgentRegistry:
+    global _registry
+    if _registry is None:
+        _registry = AgentRegistry()
+    return _registry
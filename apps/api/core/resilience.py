@@ -0,0 +1,297 @@
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import httpx
+
+from core.deadline import current_deadline
+from core.metrics import LLM_BREAKER_STATE, LLM_HEDGES, LLM_RETRIES, record_error
+from core.tracing import add_span_event
+
+logger = logging.getLogger("coachlibre.resilience")
+
+# Erreurs transitoires des clients LLM (comparées par nom pour ne pas importer openai)
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError", "FakeLLMError"}
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+# Liste partagée par les appels d'une méthode d'agent : non vide si une réponse de
+# repli a été servie (le résultat ne doit alors pas être mis en cache)
+_degraded: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("degraded", default=None)
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Appel refusé sans attendre : le circuit du modèle est ouvert
+    """
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit ouvert pour le modèle {model} (nouvel essai dans {retry_in:.0f}s)")
+        self.model = model
+        self.retry_in = retry_in
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def track_degraded() -> contextvars.Token:
+    return _degraded.set([])
+
+
+def mark_degraded(reason: str) -> None:
+    marker = _degraded.get()
+    if marker is not None:
+        marker.append(reason)
+
+
+def is_degraded() -> bool:
+    return bool(_degraded.get())
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un modèle : ouvert après failure_threshold échecs transitoires
+    consécutifs, puis un seul appel d'essai (half_open) après reset_timeout secondes
+    """
+
+    def __init__(self, model: str, failure_threshold: int, reset_timeout: float):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+        LLM_BREAKER_STATE.labels(model=model).set(0)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("breaker model=%s %s -> %s", self.model, self.state, state)
+        self.state = state
+        LLM_BREAKER_STATE.labels(model=self.model).set(BREAKER_STATES[state])
+
+    def before_call(self) -> bool:
+        """
+        Admet ou refuse un appel ; True si cet appel est l'appel d'essai (half_open),
+        à libérer ensuite par release_probe()
+        """
+        with self._lock:
+            if self.state == "closed":
+                return False
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self._set_state("half_open")
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            raise CircuitOpenError(self.model, max(0.0, remaining))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state("closed")
+
+    def release_probe(self) -> None:
+        """
+        Libère l'appel d'essai quelle que soit l'issue (annulation, erreur inattendue) :
+        sans cela le circuit resterait refusé indéfiniment
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.opened_at = time.monotonic()
+                self._set_state("open")
+
+
+class LLMResilience:
+    """
+    Appels LLM résilients (exécutés dans les threads des crews) :
+
+    - reprises avec attente exponentielle et gigue sur les erreurs transitoires
+      (LLM_RETRY_ATTEMPTS, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY) ;
+    - requête dupliquée (hedging) si la réponse n'est pas arrivée après le p95 des
+      latences récentes du modèle ; la première réponse gagne (LLM_HEDGING=true,
+      LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_WINDOW). Désactivé pour les appels en streaming ;
+    - disjoncteur par modèle (LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS) :
+      circuit ouvert, les appels échouent immédiatement avec CircuitOpenError.
+    """
+
+    def __init__(self):
+        self.attempts = max(1, int(os.getenv("LLM_RETRY_ATTEMPTS", "3")))
+        self.base_delay = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+        self.max_delay = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+        self.hedging = os.getenv("LLM_HEDGING", "false").lower() == "true"
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_window = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+        self.failure_threshold = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+        self.reset_timeout = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(model, self.failure_threshold, self.reset_timeout)
+            return self._breakers[model]
+
+    def _model_stats(self, model: str) -> Dict[str, int]:
+        return self.stats.setdefault(model, {"calls": 0, "retries": 0, "failures": 0, "hedges": 0, "hedges_won": 0})
+
+    def _count(self, model: str, field: str) -> None:
+        with self._lock:
+            self._model_stats(model)[field] += 1
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(self._latencies.get(model, ()))
+        if len(latencies) < self.hedge_min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def call(self, model: str, func: Callable[[], Any], hedge: bool = True) -> Any:
+        """
+        Exécute func() (appel LLM bloquant) avec reprises, hedging et disjoncteur
+        """
+        breaker = self.breaker(model)
+        self._count(model, "calls")
+        for attempt in range(self.attempts):
+            probe = breaker.before_call()
+            try:
+                if self.hedging and hedge:
+                    result = self._hedged(model, func)
+                else:
+                    result = self._timed(model, func)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Erreur de requête (authentification, 400...) : le modèle a répondu
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                self._count(model, "failures")
+                record_error("llm", e)
+                if breaker.state == "open":
+                    # Cet échec vient d'ouvrir le circuit : l'appelant bascule sur le repli
+                    add_span_event("llm.circuit_open", model=model)
+                    raise CircuitOpenError(model, breaker.reset_timeout) from e
+                if attempt == self.attempts - 1:
+                    raise
+                # Attente exponentielle avec gigue (évite les reprises synchronisées)
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay = random.uniform(delay / 2, delay)
+                deadline = current_deadline()
+                if deadline is not None and deadline.remaining() < delay:
+                    # Budget de la requête plus court que l'attente : pas de reprise
+                    add_span_event("llm.retry_skipped", reason="deadline")
+                    raise
+                self._count(model, "retries")
+                LLM_RETRIES.labels(model=model, error=type(e).__name__).inc()
+                add_span_event("llm.retry", attempt=attempt + 1, error=type(e).__name__)
+                time.sleep(delay)
+                continue
+            finally:
+                # Seul l'appel d'essai libère l'essai : un appel admis circuit fermé
+                # ne doit pas autoriser un second essai concurrent
+                if probe:
+                    breaker.release_probe()
+            breaker.record_success()
+            return result
+
+    def _timed(self, model: str, func: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = func()
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=self.hedge_window)).append(time.perf_counter() - start)
+        return result
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                size = int(os.getenv("LLM_HEDGE_POOL_SIZE", "64"))
+                self._pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def _hedged(self, model: str, func: Callable[[], Any]) -> Any:
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return self._timed(model, func)
+
+        pool = self._executor()
+        primary = pool.submit(contextvars.copy_context().run, self._timed, model, func)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+
+        # Réponse plus lente que le p95 : requête dupliquée, la première réponse gagne
+        self._count(model, "hedges")
+        LLM_HEDGES.labels(model=model, outcome="launched").inc()
+        add_span_event("llm.hedge", delay_ms=round(delay * 1000, 1))
+        hedge = pool.submit(contextvars.copy_context().run, self._timed, model, func)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    won = future is hedge
+                    if won:
+                        self._count(model, "hedges_won")
+                    LLM_HEDGES.labels(model=model, outcome="won" if won else "lost").inc()
+                    add_span_event("llm.hedge_won" if won else "llm.hedge_lost")
+                    # La requête perdante se termine en arrière-plan, son résultat est ignoré
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {}
+            for model, stats in self.stats.items():
+                breaker = self._breakers.get(model)
+                models[model] = {
+                    **stats,
+                    "breaker": breaker.state if breaker else "closed",
+                    "breaker_opened": breaker.opened if breaker else 0,
+                    "hedge_win_rate": stats["hedges_won"] / stats["hedges"] if stats["hedges"] else None,
+                }
+        for model in models:
+            models[model]["hedge_delay_seconds"] = self.hedge_delay(model)
+        return {"hedging": self.hedging, "retry_attempts": self.attempts, "models": models}
+
+
+_resilience: Optional[LLMResilience] = None
+
+
+def get_resilience() -> LLMResilience:
+    global _resilience
+    if _resilience is None:
+        _resilience = LLMResilience()
+    return _resilience
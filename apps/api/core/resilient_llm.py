@@ -0,0 +1,38 @@
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+
+from core.resilience import get_resilience
+
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Enveloppe un modèle LangChain : chaque génération passe par LLMResilience
+    (reprises, hedging, disjoncteur du modèle). Les callbacks (métriques, streaming)
+    sont portés par l'enveloppe et reçoivent les tokens du modèle interne.
+    """
+
+    inner: Any
+    model_name: str
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{getattr(self.inner, '_llm_type', 'llm')}"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        # Pas de requête dupliquée en streaming : les tokens seraient émis deux fois
+        hedge = not getattr(self.inner, "streaming", False)
+        return get_resilience().call(
+            self.model_name,
+            lambda: self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            hedge=hedge
+        )
@@ -0,0 +1,299 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from core.deadline import stage_degraded
+from core.llm import estimate_tokens
+from core.metrics import MODEL_ROUTES, STAGE_FALLBACKS
+from core.resilience import CircuitOpenError, mark_degraded
+from core.structured import extract_json
+from core.supervision import extract_confidence
+
+logger = logging.getLogger("coachlibre.routing")
+
+# Coût indicatif en dollars pour 1000 tokens (entrée et sortie confondues)
+DEFAULT_MODEL_COSTS = {
+    "gpt-4": 0.045,
+    "gpt-4-turbo": 0.02,
+    "gpt-4o": 0.0075,
+    "gpt-4o-mini": 0.0004,
+    "gpt-3.5-turbo": 0.001,
+}
+
+
+def small_model() -> str:
+    return os.getenv("MODEL_SMALL", "gpt-3.5-turbo")
+
+
+def large_model() -> str:
+    return os.getenv("MODEL_LARGE", "gpt-4")
+
+
+def default_model(agent_id: str) -> str:
+    """
+    Modèle principal d'un agent : MODEL_<AGENT>, sinon MODEL_LARGE
+    """
+    return os.getenv(f"MODEL_{agent_id.upper()}", large_model())
+
+
+def default_routes() -> Dict[str, Any]:
+    """
+    Cascade petit → grand modèle pour les rôles simples : catégorisation des
+    intentions, contrôle de santé des OKR
+    """
+    cascade = [small_model(), large_model()]
+    return {
+        "intent.intent": {"models": cascade},
+        "intent.draft": {"models": cascade},
+        "crew.health": {"models": cascade},
+    }
+
+
+class Route:
+    def __init__(self, name: str, models: List[str], min_confidence: float):
+        self.name = name
+        self.models = models
+        self.min_confidence = min_confidence
+
+
+class ModelRouter:
+    """
+    Choix du modèle par crew d'agent (<agent>.<crew>, ex. intent.draft) :
+
+    - une route à un modèle remplace simplement le modèle de l'agent ;
+    - une route à plusieurs modèles est une cascade : le premier modèle (petit et
+      rapide) est essayé, et l'on passe au suivant si la sortie n'est pas un JSON
+      conforme au schéma du crew ou si la confiance annoncée est sous le seuil.
+
+    Configuration :
+    - MODEL_ROUTING=true : active les routes par défaut (default_routes)
+    - MODEL_ROUTES : JSON {"<agent>.<crew>" | "<agent>" | "*": modèle | [modèles] |
+      {"models": [...], "min_confidence": 0.8}}, appliqué par-dessus
+    - MODEL_ROUTING_MIN_CONFIDENCE : seuil d'escalade par défaut
+    - MODEL_SMALL / MODEL_LARGE / MODEL_<AGENT> : modèles par défaut
+    - MODEL_COSTS : JSON {modèle: $ pour 1000 tokens} pour l'estimation des gains
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Any]] = None):
+        self.enabled = os.getenv("MODEL_ROUTING", "false").lower() == "true"
+        self.min_confidence = float(os.getenv("MODEL_ROUTING_MIN_CONFIDENCE", "0.75"))
+        self.costs = {**DEFAULT_MODEL_COSTS, **json.loads(os.getenv("MODEL_COSTS", "{}"))}
+        if routes is None:
+            routes = default_routes() if self.enabled else {}
+            routes.update(json.loads(os.getenv("MODEL_ROUTES", "{}")))
+        self.routes = {name: self._parse(name, spec) for name, spec in routes.items()}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._latency: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def _parse(self, name: str, spec: Any) -> Route:
+        if isinstance(spec, str):
+            spec = {"models": [spec]}
+        elif isinstance(spec, list):
+            spec = {"models": spec}
+        return Route(name, list(spec["models"]), float(spec.get("min_confidence", self.min_confidence)))
+
+    def route_for(self, name: str) -> Optional[Route]:
+        agent_id = name.split(".", 1)[0]
+        return self.routes.get(name) or self.routes.get(agent_id) or self.routes.get("*")
+
+    def signature(self, agent_id: str) -> List[Any]:
+        """
+        Routes applicables aux crews d'un agent (<agent>.<crew>, <agent>, *), pour les
+        clés de cache de ses étapes
+        """
+        return sorted(
+            [name, route.models, route.min_confidence]
+            for name, route in self.routes.items()
+            if name in ("*", agent_id) or name.startswith(f"{agent_id}.")
+        )
+
+    def accept(self, output: Any, schema: Optional[type], min_confidence: float) -> Tuple[bool, str, Optional[float]]:
+        """
+        Sortie acceptable sans escalade : (accepté, raison, confiance)
+        """
+        confidence = None
+        if schema is not None:
+            data = extract_json(output)
+            if data is None:
+                return False, "invalid_schema", None
+            try:
+                schema.model_validate(data)
+            except ValidationError:
+                return False, "invalid_schema", None
+            if isinstance(data.get("confidence"), (int, float)):
+                confidence = float(data["confidence"])
+        if confidence is None:
+            confidence = extract_confidence(output)
+        # Sans score annoncé, seule la validation du schéma décide
+        if confidence is not None and confidence < min_confidence:
+            return False, "low_confidence", confidence
+        return True, "accepted", confidence
+
+    def kickoff(self, template: Any, **params: Any) -> Any:
+        """
+        Exécute le crew (bloquant, dans le thread de l'exécuteur) selon sa route ;
+        si aucun modèle n'est disponible (circuits ouverts), le crew d'un schéma connu
+        retourne la réponse de repli du schéma au lieu d'échouer. Budget de l'étape
+        entamé (X-Request-Deadline) : le plus petit modèle répond, sans escalade
+        (DEADLINE_SMALL_MODEL=false pour garder le modèle de l'agent).
+        """
+        route = self.route_for(template.route) if template.route else None
+        try:
+            if stage_degraded() and os.getenv("DEADLINE_SMALL_MODEL", "true").lower() == "true":
+                return self._degraded(route, template, **params)
+            if route is None:
+                return template.run(**params)
+            return self._cascade(route, template, **params)
+        except CircuitOpenError as e:
+            if template.schema is None:
+                raise
+            return self.fallback(template, e)
+
+    def _degraded(self, route: Optional[Route], template: Any, **params: Any) -> Any:
+        model = route.models[0] if route is not None else small_model()
+        mark_degraded("deadline")
+        MODEL_ROUTES.labels(route=template.route or "unrouted", model=model, outcome="deadline").inc()
+        logger.info("routing route=%s model=%s outcome=deadline", template.route, model)
+        return template.for_model(model).run(**params)
+
+    def fallback(self, template: Any, error: Exception) -> str:
+        STAGE_FALLBACKS.labels(route=template.route or "unrouted").inc()
+        mark_degraded(str(error))
+        logger.warning("routing route=%s outcome=fallback error=%s", template.route, error)
+        text_field = next(iter(template.schema.model_fields))
+        return json.dumps({
+            **template.schema().model_dump(),
+            text_field: f"Réponse indisponible ({error}) : valeurs par défaut",
+            "confidence": 0.0,
+        }, ensure_ascii=False)
+
+    def _cascade(self, route: Route, template: Any, **params: Any) -> Any:
+        tokens = estimate_tokens(json.dumps(params, ensure_ascii=False, default=str).encode())
+        wasted_seconds = 0.0
+        wasted_cost = 0.0
+        previous = None
+        for tier, model in enumerate(route.models):
+            last = tier == len(route.models) - 1
+            crew = template.for_model(model)
+            start = time.perf_counter()
+            try:
+                output = crew.run(**params)
+            except CircuitOpenError:
+                if not last:
+                    self._record_escalation(route.name, model, "circuit_open")
+                    continue
+                if previous is None:
+                    raise
+                # Grand modèle indisponible : la sortie du modèle précédent reste la meilleure
+                self._record_escalation(route.name, model, "circuit_open")
+                return previous
+            duration = time.perf_counter() - start
+            used = tokens + estimate_tokens(str(output).encode())
+            cost = self.cost(model, used)
+            self._observe(route.name, model, duration)
+
+            accepted, reason, confidence = self.accept(output, template.schema, route.min_confidence)
+            if accepted or last:
+                self._record(route, model, "accepted" if accepted else "final", duration, cost, used, wasted_seconds, wasted_cost)
+                logger.info(
+                    "routing route=%s model=%s tier=%d outcome=%s confidence=%s duration=%.2fs",
+                    route.name, model, tier, "accepted" if accepted else "final", confidence, duration
+                )
+                return output
+
+            # Escalade : le temps et le coût de cet essai sont perdus
+            previous = output
+            wasted_seconds += duration
+            wasted_cost += cost
+            self._record_escalation(route.name, model, reason)
+            logger.info(
+                "routing route=%s model=%s tier=%d outcome=escalate reason=%s confidence=%s duration=%.2fs",
+                route.name, model, tier, reason, confidence, duration
+            )
+
+    def cost(self, model: str, tokens: int) -> float:
+        return self.costs.get(model, 0.0) * tokens / 1000
+
+    def _observe(self, route: str, model: str, duration: float) -> None:
+        with self._lock:
+            previous = self._latency.get((route, model))
+            self._latency[(route, model)] = duration if previous is None else 0.8 * previous + 0.2 * duration
+
+    def _route_stats(self, route: str) -> Dict[str, Any]:
+        return self.stats.setdefault(route, {
+            "calls": 0,
+            "served_by": {},
+            "escalations": {},
+            "saved_seconds": 0.0,
+            "saved_cost": 0.0,
+            "wasted_seconds": 0.0,
+            "wasted_cost": 0.0,
+        })
+
+    def _record_escalation(self, route: str, model: str, reason: str) -> None:
+        MODEL_ROUTES.labels(route=route, model=model, outcome=f"escalate_{reason}").inc()
+        with self._lock:
+            escalations = self._route_stats(route)["escalations"]
+            escalations[reason] = escalations.get(reason, 0) + 1
+
+    def _record(
+        self,
+        route: Route,
+        model: str,
+        outcome: str,
+        duration: float,
+        cost: float,
+        tokens: int,
+        wasted_seconds: float,
+        wasted_cost: float
+    ) -> None:
+        MODEL_ROUTES.labels(route=route.name, model=model, outcome=outcome).inc()
+        largest = route.models[-1]
+        with self._lock:
+            stats = self._route_stats(route.name)
+            stats["calls"] += 1
+            stats["served_by"][model] = stats["served_by"].get(model, 0) + 1
+            stats["wasted_seconds"] += wasted_seconds
+            stats["wasted_cost"] += wasted_cost
+            if model != largest:
+                # Gain par rapport au plus grand modèle de la route (latence moyenne observée)
+                reference = self._latency.get((route.name, largest))
+                if reference is not None:
+                    stats["saved_seconds"] += reference - duration
+                stats["saved_cost"] += self.cost(largest, tokens) - cost
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "routes": {
+                    name: {
+                        "models": route.models,
+                        "min_confidence": route.min_confidence,
+                        "latency_seconds": {
+                            model: self._latency.get((name, model)) for model in route.models
+                        },
+                        **{
+                            key: dict(value) if isinstance(value, dict) else value
+                            for key, value in self._route_stats(name).items()
+                        },
+                    }
+                    for name, route in self.routes.items()
+                },
+            }
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
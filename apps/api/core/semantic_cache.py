@@ -0,0 +1,229 @@
+import copy
+import json
+import math
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.cache import cache_bypass, cache_key, normalize
+from core.metrics import record_cache
+
+# Nombre de classes de l'histogramme des similarités (pas de 0.05)
+HISTOGRAM_BUCKETS = 20
+
+
+def _unit(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class VectorIndex(ABC):
+    """
+    Index de vecteurs pour retrouver l'analyse d'une intention proche
+    """
+
+    @abstractmethod
+    async def search(self, vector: List[float], context_key: str, max_age: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """
+        Retourne (similarité cosinus, payload) du plus proche voisin, ou None
+        """
+
+    @abstractmethod
+    async def add(self, vector: List[float], context_key: str, payload: Dict[str, Any]) -> None:
+        ...
+
+
+class InMemoryVectorIndex(VectorIndex):
+    """
+    Index local (recherche exhaustive), utilisé quand Qdrant n'est pas configuré
+    """
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: List[Tuple[List[float], str, float, Dict[str, Any]]] = []
+
+    async def search(self, vector, context_key, max_age):
+        query = _unit(vector)
+        oldest = time.time() - max_age
+        best = None
+        for stored, key, created_at, payload in self._entries:
+            if key != context_key or created_at < oldest:
+                continue
+            score = sum(a * b for a, b in zip(query, stored))
+            if best is None or score > best[0]:
+                best = (score, payload)
+        return best
+
+    async def add(self, vector, context_key, payload):
+        self._entries.append((_unit(vector), context_key, time.time(), payload))
+        if len(self._entries) > self.max_entries:
+            del self._entries[: len(self._entries) - self.max_entries]
+
+
+class QdrantVectorIndex(VectorIndex):
+    """
+    Index partagé dans l'instance Qdrant du déploiement
+    """
+
+    def __init__(self, url: str, collection: str = "intent_semantic_cache"):
+        from qdrant_client import AsyncQdrantClient, models
+
+        self.client = AsyncQdrantClient(url=url)
+        self.models = models
+        self.collection = collection
+        self._ready = False
+
+    async def _ensure_collection(self, size: int) -> None:
+        if self._ready:
+            return
+        collections = await self.client.get_collections()
+        if self.collection not in [c.name for c in collections.collections]:
+            await self.client.create_collection(
+                collection_name=self.collection,
+                vectors_config=self.models.VectorParams(size=size, distance=self.models.Distance.COSINE)
+            )
+        self._ready = True
+
+    async def search(self, vector, context_key, max_age):
+        await self._ensure_collection(len(vector))
+        points = await self.client.search(
+            collection_name=self.collection,
+            query_vector=vector,
+            query_filter=self.models.Filter(must=[
+                self.models.FieldCondition(key="context_key", match=self.models.MatchValue(value=context_key)),
+                self.models.FieldCondition(key="created_at", range=self.models.Range(gte=time.time() - max_age)),
+            ]),
+            limit=1,
+            with_payload=True
+        )
+        if not points:
+            return None
+        return points[0].score, json.loads(points[0].payload["analysis"])
+
+    async def add(self, vector, context_key, payload):
+        await self._ensure_collection(len(vector))
+        await self.client.upsert(
+            collection_name=self.collection,
+            points=[self.models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector=vector,
+                payload={
+                    "context_key": context_key,
+                    "created_at": time.time(),
+                    "analysis": json.dumps(payload, default=str),
+                }
+            )]
+        )
+
+
+class SemanticCache:
+    """
+    Cache sémantique des analyses d'intention : une paraphrase d'une intention déjà
+    analysée réutilise l'analyse stockée si la similarité dépasse le seuil.
+
+    - SEMANTIC_CACHE_ENABLED : active le cache ; par défaut seulement si un index partagé
+      est configuré (QDRANT_URL), l'index en mémoire restant propre à chaque processus
+    - SEMANTIC_CACHE_THRESHOLD : similarité cosinus minimale (0.92 par défaut)
+    - SEMANTIC_CACHE_TTL_SECONDS : âge maximal d'une analyse réutilisée
+    - SEMANTIC_CACHE_EMBEDDING_MODEL : modèle d'embedding OpenAI
+    - QDRANT_URL : index partagé ; index en mémoire sinon
+    """
+
+    def __init__(self, index: Optional[VectorIndex] = None, embeddings: Any = None):
+        setting = os.getenv("SEMANTIC_CACHE_ENABLED")
+        if setting is None:
+            self.enabled = index is not None or bool(os.getenv("QDRANT_URL"))
+        else:
+            self.enabled = setting.lower() == "true"
+        self.threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        self.ttl = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+        self._index = index
+        self._embeddings = embeddings
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "stores": 0}
+        self.similarities = [0] * HISTOGRAM_BUCKETS
+
+    @property
+    def index(self) -> VectorIndex:
+        if self._index is None:
+            qdrant_url = os.getenv("QDRANT_URL")
+            self._index = QdrantVectorIndex(qdrant_url) if qdrant_url else InMemoryVectorIndex()
+        return self._index
+
+    @property
+    def embeddings(self) -> Any:
+        if self._embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+
+            self._embeddings = OpenAIEmbeddings(
+                model=os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-ada-002"),
+                api_key=os.getenv("OPENAI_API_KEY")
+            )
+        return self._embeddings
+
+    @staticmethod
+    def context_key(context: Optional[Dict[str, Any]]) -> str:
+        # Deux intentions ne sont comparables que si leur contexte est identique
+        return cache_key("SemanticCache", "context", "", 0, context or {})
+
+    def _record_similarity(self, score: float) -> None:
+        bucket = min(int(max(score, 0.0) * HISTOGRAM_BUCKETS), HISTOGRAM_BUCKETS - 1)
+        self.similarities[bucket] += 1
+
+    async def lookup(self, intent: str, context: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Retourne (analyse réutilisable ou None, embedding de l'intention pour un store ultérieur)
+        """
+        if not self.enabled or cache_bypass.get():
+            return None, None
+        try:
+            vector = await self.embeddings.aembed_query(normalize(intent))
+            match = await self.index.search(vector, self.context_key(context), self.ttl)
+        except Exception:
+            # Embedding ou Qdrant indisponible : on exécute le crew normalement
+            self.stats["errors"] += 1
+            return None, None
+
+        if match is not None:
+            score, analysis = match
+            self._record_similarity(score)
+            if score >= self.threshold:
+                self.stats["hits"] += 1
+                record_cache("semantic", "hit")
+                return copy.deepcopy(analysis), vector
+        self.stats["misses"] += 1
+        record_cache("semantic", "miss")
+        return None, vector
+
+    async def store(self, vector: Optional[List[float]], context: Optional[Dict[str, Any]], analysis: Dict[str, Any]) -> None:
+        if vector is None:
+            return
+        try:
+            await self.index.add(vector, self.context_key(context), json.loads(json.dumps(analysis, default=str)))
+            self.stats["stores"] += 1
+        except Exception:
+            self.stats["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+            "similarity_histogram": {
+                f"{i / HISTOGRAM_BUCKETS:.2f}": count
+                for i, count in enumerate(self.similarities)
+            },
+        }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
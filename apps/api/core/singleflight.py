@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.metrics import SINGLEFLIGHT, record_error
+
+# Suppression du verrou uniquement par son détenteur
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlightError(RuntimeError):
+    """
+    Échec du calcul partagé, relayé aux requêtes qui l'attendaient
+    """
+
+
+class SingleFlight:
+    """
+    Regroupe les calculs identiques en cours : les requêtes concurrentes de même clé
+    attendent le résultat du premier calcul au lieu de relancer les crews.
+
+    - en local : une tâche partagée par clé ;
+    - entre réplicas (SINGLEFLIGHT_REDIS_URL, REDIS_URL par défaut) : un verrou Redis
+      désigne le réplica qui calcule, les autres attendent le résultat publié sur un
+      canal (et copié sous une clé courte durée pour les abonnés arrivés en retard).
+
+    - SINGLEFLIGHT_ENABLED : active le regroupement (true par défaut)
+    - SINGLEFLIGHT_LOCK_TTL : durée du verrou, et attente maximale d'un autre réplica
+      avant de calculer soi-même
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.enabled = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+        self.lock_ttl = float(os.getenv("SINGLEFLIGHT_LOCK_TTL", "600"))
+        self.result_ttl = int(os.getenv("SINGLEFLIGHT_RESULT_TTL", "30"))
+        self.prefix = "coachlibre:singleflight:"
+        self.owner = uuid.uuid4().hex
+        self.stats = {"leader": 0, "coalesced_local": 0, "coalesced_remote": 0, "fallback": 0, "errors": 0}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        redis_url = redis_url or os.getenv("SINGLEFLIGHT_REDIS_URL", os.getenv("REDIS_URL"))
+        self.shared = None
+        if redis_url:
+            import redis.asyncio as redis
+
+            self.shared = redis.from_url(redis_url, decode_responses=True)
+
+    def _record(self, result: str) -> None:
+        self.stats[result] += 1
+        SINGLEFLIGHT.labels(result=result).inc()
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value
+    ) -> Any:
+        """
+        Exécute func() une seule fois par clé parmi les appels concurrents ;
+        encode/decode convertissent le résultat en JSON pour le partage entre réplicas
+        """
+        if not self.enabled:
+            return await func()
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._record("coalesced_local")
+            return await asyncio.shield(task)
+
+        task = asyncio.create_task(self._lead_or_follow(key, func, encode, decode))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield : l'annulation d'un appelant n'interrompt pas le calcul des autres
+        return await asyncio.shield(task)
+
+    async def _lead_or_follow(self, key, func, encode, decode) -> Any:
+        if self.shared is None:
+            self._record("leader")
+            return await func()
+
+        lock_key = f"{self.prefix}lock:{key}"
+        try:
+            acquired = await self.shared.set(lock_key, self.owner, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            # Redis indisponible : regroupement local uniquement
+            record_error("singleflight", e)
+            self.stats["errors"] += 1
+            acquired = True
+            lock_key = None
+
+        if not acquired:
+            outcome = await self._wait_remote(key)
+            if outcome is not None:
+                self._record("coalesced_remote")
+                if "error" in outcome:
+                    raise SingleFlightError(outcome["error"])
+                return decode(outcome["value"])
+            # Pas de résultat dans le délai : on calcule nous-mêmes
+            self._record("fallback")
+            return await func()
+
+        self._record("leader")
+        try:
+            value = await func()
+            await self._publish(key, {"value": encode(value)})
+            return value
+        except asyncio.CancelledError:
+            await self._publish(key, {"error": "Calcul partagé annulé"})
+            raise
+        except Exception as e:
+            await self._publish(key, {"error": str(e) or type(e).__name__})
+            raise
+        finally:
+            if lock_key is not None:
+                try:
+                    await self.shared.eval(_RELEASE_SCRIPT, 1, lock_key, self.owner)
+                except Exception:
+                    self.stats["errors"] += 1
+
+    async def _publish(self, key: str, outcome: Dict[str, Any]) -> None:
+        if self.shared is None:
+            return
+        payload = json.dumps(outcome, default=str)
+        try:
+            await self.shared.set(f"{self.prefix}result:{key}", payload, ex=self.result_ttl)
+            await self.shared.publish(f"{self.prefix}channel:{key}", payload)
+        except Exception as e:
+            record_error("singleflight", e)
+            self.stats["errors"] += 1
+
+    async def _wait_remote(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Attend le résultat publié par le réplica détenteur du verrou
+        """
+        pubsub = self.shared.pubsub()
+        try:
+            await pubsub.subscribe(f"{self.prefix}channel:{key}")
+            # Résultat publié avant l'abonnement
+            raw = await self.shared.get(f"{self.prefix}result:{key}")
+            deadline = time.monotonic() + self.lock_ttl
+            while raw is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 1.0))
+                if message is not None:
+                    raw = message["data"]
+                elif not await self.shared.exists(f"{self.prefix}lock:{key}"):
+                    # Verrou libéré ou expiré sans résultat : le détenteur a disparu
+                    raw = await self.shared.get(f"{self.prefix}result:{key}")
+                    if raw is None:
+                        return None
+            return json.loads(raw)
+        except Exception as e:
+            record_error("singleflight", e)
+            self.stats["errors"] += 1
+            return None
+        finally:
+            try:
+                await pubsub.unsubscribe()
+                await pubsub.close()
+            except Exception:
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = self.stats["leader"] + self.stats["coalesced_local"] + self.stats["coalesced_remote"] + self.stats["fallback"]
+        coalesced = self.stats["coalesced_local"] + self.stats["coalesced_remote"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "shared_enabled": self.shared is not None,
+            "inflight": len(self._inflight),
+            "coalesce_ratio": coalesced / calls if calls else 0.0,
+        }
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,114 @@
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from core.metrics import SPECULATION_DIFF, SPECULATIONS, record_error
+from core.resilience import is_degraded
+from core.semantic_cache import get_semantic_cache
+from core.supervision import diff_ratio, get_supervisor_policy, review_decision
+
+
+class SpeculativePipeline:
+    """
+    Pipeline spéculatif intention → projet (SPECULATIVE_PIPELINE=true) : l'analyse des
+    besoins démarre sur le brouillon de l'analyste pendant la validation du superviseur.
+
+    Si le superviseur modifie moins de SPECULATION_DIFF_THRESHOLD du brouillon, le
+    résultat spéculatif est conservé ; sinon il est annulé et recalculé sur l'analyse validée.
+
+    Comme process_intent, le pipeline consulte d'abord le cache sémantique : une
+    paraphrase d'une intention déjà validée saute brouillon et validation. La
+    validation suit la même décision que supervised_kickoff (SupervisorPolicy, budget
+    de l'étape) : un brouillon non relu passe directement à l'étape projet.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, threshold: Optional[float] = None):
+        if enabled is None:
+            enabled = os.getenv("SPECULATIVE_PIPELINE", "false").lower() == "true"
+        self.enabled = enabled
+        self.threshold = threshold if threshold is not None else float(os.getenv("SPECULATION_DIFF_THRESHOLD", "0.2"))
+        self.stats = {"accepted": 0, "rejected": 0, "errors": 0, "semantic_hits": 0, "unvalidated": 0, "saved_seconds": 0.0, "wasted_seconds": 0.0}
+
+    def _record(self, result: str) -> None:
+        self.stats["errors" if result == "error" else result] += 1
+        SPECULATIONS.labels(result=result).inc()
+
+    async def run(self, intent_manager: Any, project_manager: Any, intent: str, context: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Retourne (analyse d'intention validée, analyse des besoins)
+        """
+        semantic_cache = get_semantic_cache()
+        cached_analysis, intent_vector = await semantic_cache.lookup(intent, context)
+        if cached_analysis is not None:
+            self.stats["semantic_hits"] += 1
+            return cached_analysis, await project_manager.analyze_requirements(cached_analysis)
+
+        draft = await intent_manager.draft_intent(intent, context)
+        # Chaque méthode d'agent suit ses propres réponses de repli
+        draft_degraded = is_degraded()
+
+        decision = review_decision(intent_manager.agent_id, draft.get("confidence"), intent=intent, context=context)
+        if decision is None or not decision.validate:
+            # Pas de relecture (brouillon jugé sûr ou budget entamé) : rien à spéculer
+            self.stats["unvalidated"] += 1
+            if decision is not None and not draft_degraded:
+                await semantic_cache.store(intent_vector, context, draft)
+            return draft, await project_manager.analyze_requirements(draft)
+
+        started = time.perf_counter()
+        finished = {}
+        speculative = asyncio.create_task(project_manager.analyze_requirements(draft))
+        speculative.add_done_callback(lambda _: finished.setdefault("at", time.perf_counter()))
+        try:
+            validated = await intent_manager.validate_intent(intent, draft)
+        except BaseException:
+            speculative.cancel()
+            raise
+        validation_time = time.perf_counter() - started
+        if not draft_degraded and not is_degraded():
+            await semantic_cache.store(intent_vector, context, validated)
+
+        ratio = diff_ratio(draft["analysis"], validated["analysis"])
+        SPECULATION_DIFF.observe(ratio)
+        get_supervisor_policy().record_validation(intent_manager.agent_id, decision, validation_time, ratio, decision.pattern)
+        if ratio <= self.threshold:
+            try:
+                project_result = await speculative
+                self._record("accepted")
+                # Recouvrement entre la validation et l'étape projet
+                self.stats["saved_seconds"] += min(validation_time, finished["at"] - started)
+                return validated, project_result
+            except Exception as e:
+                # Échec de la spéculation : on relance sur l'analyse validée
+                record_error("speculation", e)
+                self._record("error")
+        else:
+            speculative.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await speculative
+            self._record("rejected")
+            self.stats["wasted_seconds"] += validation_time
+
+        return validated, await project_manager.analyze_requirements(validated)
+
+    def snapshot(self) -> Dict[str, Any]:
+        attempts = self.stats["accepted"] + self.stats["rejected"] + self.stats["errors"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "attempts": attempts,
+            "acceptance_rate": self.stats["accepted"] / attempts if attempts else 0.0,
+        }
+
+
+_speculation: Optional[SpeculativePipeline] = None
+
+
+def get_speculation() -> SpeculativePipeline:
+    global _speculation
+    if _speculation is None:
+        _speculation = SpeculativePipeline()
+    return _speculation
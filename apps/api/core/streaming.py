@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from core.structured import IncrementalJSONParser
+from core.workflow import WorkflowPipeline
+from models import AgentResponse, UserIntent
+
+# Destination des tokens de la requête courante (copiée dans les threads des crews)
+token_sink: ContextVar[Optional[Callable[[str], None]]] = ContextVar("token_sink", default=None)
+
+
+_token_handler = None
+
+
+def _token_stream_handler() -> Any:
+    """
+    Handler LangChain qui relaie les tokens générés vers la requête qui les a demandés
+    (construit à la demande pour ne pas importer langchain au démarrage)
+    """
+    global _token_handler
+    if _token_handler is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class TokenStreamHandler(BaseCallbackHandler):
+            def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+                sink = token_sink.get()
+                if sink is not None:
+                    sink(token)
+
+        _token_handler = TokenStreamHandler()
+    return _token_handler
+
+
+def llm_streaming_options() -> Dict[str, Any]:
+    """
+    Options ChatOpenAI pour le streaming token par token (LLM_TOKEN_STREAMING=true)
+    """
+    if os.getenv("LLM_TOKEN_STREAMING", "false").lower() != "true":
+        return {}
+    return {"streaming": True, "callbacks": [_token_stream_handler()]}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_workflow(
+    pipeline: WorkflowPipeline,
+    user_intent: UserIntent,
+    tokens: bool = False
+) -> AsyncIterator[str]:
+    """
+    Exécute le workflow et émet un événement SSE dès qu'une étape se termine :
+    - "stage_started" : début d'une étape
+    - "stage" : AgentResponse de l'étape terminée
+    - "token" : token généré (si tokens=True et LLM_TOKEN_STREAMING=true)
+    - "field" : champ JSON de la réponse de l'étape terminé pendant la génération
+      (mêmes conditions que "token") ; information pour le client uniquement :
+      l'étape suivante démarre toujours sur la sortie complète, validée par le
+      superviseur, de l'étape précédente
+    - "result" : WorkflowResult final, ou "error" en cas d'échec
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    current_stage = {"name": None}
+    parsers: Dict[str, IncrementalJSONParser] = {}
+
+    async def on_stage(stage: str, status: str, response: Optional[AgentResponse]):
+        current_stage["name"] = stage
+        if response is None:
+            await queue.put(("stage_started", {"stage": stage}))
+        else:
+            await queue.put(("stage", response.model_dump()))
+
+    def emit_token(token: str):
+        stage = current_stage["name"]
+        queue.put_nowait(("token", {"stage": stage, "token": token}))
+        # Champs disponibles avant la fin de l'étape
+        for name, value in parsers.setdefault(stage, IncrementalJSONParser()).feed(token).items():
+            queue.put_nowait(("field", {"stage": stage, "name": name, "value": value}))
+
+    def on_token(token: str):
+        # Appelé depuis un thread du pool : on repasse par la boucle d'événements
+        loop.call_soon_threadsafe(emit_token, token)
+
+    async def run():
+        if tokens:
+            token_sink.set(on_token)
+        try:
+            result = await pipeline.run(user_intent, on_stage=on_stage)
+            await queue.put(("result", result.model_dump()))
+        except Exception as e:
+            await queue.put(("error", {"detail": f"Erreur dans le workflow: {str(e)}"}))
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            event, data = item
+            yield format_sse(event, data)
+    finally:
+        # Client déconnecté : on annule le workflow en cours
+        task.cancel()
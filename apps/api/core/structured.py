@@ -0,0 +1,310 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field, ValidationError
+
+from core.supervision import extract_confidence
+
+# Modèles compacts des sorties d'étapes (valeurs par défaut = réponse minimale sûre)
+
+
+class IntentAnalysis(BaseModel):
+    analysis: str = ""
+    confidence: float = Field(0.5, ge=0, le=1)
+    category: str = "unknown"
+    priority: str = "low"
+    needs: List[str] = []
+    recommendations: List[str] = []
+
+
+class Requirements(BaseModel):
+    requirements: str = ""
+    confidence: float = Field(0.6, ge=0, le=1)
+    objectives: List[str] = []
+    acceptance_criteria: List[str] = []
+    timeline: str = "À définir"
+    resources: List[str] = []
+    risks: List[str] = []
+    success_metrics: List[str] = []
+
+
+class TechnicalSolution(BaseModel):
+    solution: str = ""
+    confidence: float = Field(0.7, ge=0, le=1)
+    architecture: Dict[str, str] = {}
+    integrations: List[str] = []
+    security: List[str] = []
+    performance: Dict[str, str] = {}
+    deployment: Dict[str, str] = {}
+    effort_estimation: str = "À définir"
+
+
+class DeliveryPlan(BaseModel):
+    delivery_plan: str = ""
+    confidence: float = Field(0.6, ge=0, le=1)
+    deployment_strategy: Dict[str, Any] = {}
+    testing: Dict[str, str] = {}
+    monitoring: Dict[str, str] = {}
+    rollback: Dict[str, Any] = {}
+    documentation: List[str] = []
+    communication: Dict[str, Any] = {}
+    success_metrics: List[str] = []
+    timeline: str = "À définir"
+
+
+_TYPE_NAMES = {str: "texte", float: "nombre 0-1", int: "entier"}
+
+
+def _type_name(annotation: Any) -> str:
+    if annotation in _TYPE_NAMES:
+        return _TYPE_NAMES[annotation]
+    origin = getattr(annotation, "__origin__", None)
+    if origin is list:
+        return "[texte]"
+    if origin is dict:
+        return "{clé: texte}"
+    return "texte"
+
+
+def schema_prompt(model: Type[BaseModel]) -> str:
+    """
+    Consigne de format compacte : un objet JSON avec les champs du modèle, rien d'autre
+    """
+    fields = ", ".join(f'"{name}": {_type_name(field.annotation)}' for name, field in model.model_fields.items())
+    return f"Réponse finale : uniquement un objet JSON {{{fields}}}, sans texte autour."
+
+
+_FENCE = re.compile(r"```(?:json)?")
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_JSON_LITERALS = ("true", "false", "null")
+_QUOTES = str.maketrans({"“": '"', "”": '"', "«": '"', "»": '"'})
+# Échappements valides en JSON (après la barre oblique inverse)
+_ESCAPES = set('"\\/bfnrtu')
+
+
+def _literal(word: str) -> str:
+    """
+    Littéral JSON d'un mot : littéraux Python convertis, littéral tronqué complété
+    ("tru" → "true")
+    """
+    word = _LITERALS.get(word, word)
+    if word in _JSON_LITERALS:
+        return word
+    matches = [literal for literal in _JSON_LITERALS if literal.startswith(word.lower())]
+    return matches[0] if len(matches) == 1 else word
+
+
+def _closes_string(text: str, index: int) -> bool:
+    """
+    Le guillemet en position index ferme-t-il la chaîne ? Oui s'il est suivi de la
+    fin du texte, d'un ":" ou d'une fermeture, ou d'une virgule suivie d'une nouvelle
+    valeur ; sinon c'est un guillemet intérieur non échappé ("il a dit "bonjour"")
+    """
+    rest = text[index + 1:].lstrip()
+    if not rest or rest[0] in ":}]":
+        return True
+    if rest[0] != ",":
+        return False
+    after = rest[1:].lstrip()
+    if not after or after[0] in "\"'{[}]-" or after[0].isdigit():
+        return True
+    word = re.match(r"[A-Za-z_]*", after).group(0)
+    return word in _LITERALS or word in _JSON_LITERALS
+
+
+def repair_json(text: str) -> str:
+    """
+    Réparation sans appel LLM d'un objet JSON mal formé : texte autour, blocs de code,
+    virgules finales, littéraux Python, sauts de ligne dans les chaînes, guillemets
+    simples, échappements invalides (\\'), guillemets intérieurs non échappés, sortie
+    tronquée (chaînes, littéraux et accolades refermés)
+    """
+    text = _FENCE.sub("", text).translate(_QUOTES)
+    start = text.find("{")
+    if start < 0:
+        return text
+    out: List[str] = []
+    stack: List[str] = []
+    quote: Optional[str] = None
+    escape = False
+    i = start
+    while i < len(text):
+        char = text[i]
+        if quote is not None:
+            if escape:
+                escape = False
+                if char == "'":
+                    # \' (chaîne Python) : l'apostrophe n'a pas à être échappée en JSON
+                    out[-1] = char
+                elif char in _ESCAPES:
+                    out.append(char)
+                else:
+                    # Échappement inconnu : barre oblique inverse conservée littéralement
+                    out.append("\\")
+                    out.append(char)
+            elif char == "\\":
+                escape = True
+                out.append(char)
+            elif char == quote and _closes_string(text, i):
+                quote = None
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+        elif char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            # Virgule finale avant la fermeture
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z_]+", text[i:]).group(0)
+            out.append(_literal(word))
+            i += len(word)
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    # Sortie tronquée : on referme ce qui est ouvert
+    if quote is not None:
+        if escape:
+            out.pop()
+        out.append('"')
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+    elif out and out[-1] == ":":
+        out.append("null")
+    while stack:
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def extract_json(text: Any) -> Optional[Dict[str, Any]]:
+    """
+    Premier objet JSON de la sortie d'un crew, réparé si nécessaire
+    """
+    if isinstance(text, dict):
+        return text
+    text = str(text)
+    start = text.find("{")
+    if start < 0:
+        return None
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text, start)
+        return data if isinstance(data, dict) else None
+    except ValueError:
+        pass
+    try:
+        data = json.loads(repair_json(text))
+        return data if isinstance(data, dict) else None
+    except ValueError:
+        return None
+
+
+def parse_output(model: Type[BaseModel], output: Any) -> Dict[str, Any]:
+    """
+    Sortie brute d'un crew → dictionnaire conforme au modèle. Les champs invalides
+    sont ignorés (valeur par défaut) ; sans JSON exploitable, le texte brut devient le
+    champ principal (premier champ du modèle).
+    """
+    text_field = next(iter(model.model_fields))
+    data = extract_json(output) or {}
+    values: Dict[str, Any] = {}
+    for name in model.model_fields:
+        if name not in data:
+            continue
+        try:
+            model(**{name: data[name]})
+            values[name] = data[name]
+        except ValidationError:
+            continue
+
+    if not values.get(text_field):
+        values[text_field] = data.get("summary") or str(output).strip()
+    if "confidence" not in values:
+        confidence = extract_confidence(output)
+        if confidence is not None:
+            values["confidence"] = confidence
+    return model(**values).model_dump()
+
+
+class IncrementalJSONParser:
+    """
+    Analyse d'un objet JSON reçu token par token : feed() retourne les champs de
+    premier niveau terminés depuis le dernier appel. Le texte avant "{" est ignoré
+    (raisonnement de l'agent) ; un nouvel objet recommence l'analyse. Utilisé pour
+    les événements SSE "field" ; aucune étape ne démarre sur ces champs partiels.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._committed = 0
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        new: Dict[str, Any] = {}
+        for char in chunk:
+            if self._depth == 0:
+                if char == "{":
+                    self._reset()
+                    self.fields = {}
+                    self._buffer.append(char)
+                    self._depth = 1
+                    self._committed = 1
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    new.update(self._commit(len(self._buffer) - 1))
+            elif char == "," and self._depth == 1:
+                new.update(self._commit(len(self._buffer) - 1))
+        return new
+
+    def _commit(self, end: int) -> Dict[str, Any]:
+        # Paire "clé": valeur complète entre le dernier séparateur et end
+        segment = "".join(self._buffer[self._committed:end]).strip()
+        self._committed = end + 1
+        if not segment:
+            return {}
+        try:
+            pair = json.loads("{" + segment + "}")
+        except ValueError:
+            return {}
+        self.fields.update(pair)
+        return pair
@@ -0,0 +1,253 @@
+import difflib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+from core.cache import cache_key
+from core.deadline import degrade_stage, stage_degraded, stage_remaining
+from core.executor import get_executor
+from core.metrics import DEADLINE_OUTCOMES, SUPERVISION_DECISIONS
+from core.resilience import mark_degraded
+
+logger = logging.getLogger("coachlibre.supervision")
+
+_CONFIDENCE_PATTERN = re.compile(r"(?:confidence|confiance)\"?\s*(?:[:=]|est de)\s*\"?([01](?:[.,]\d+)?)", re.IGNORECASE)
+
+
+def extract_confidence(text: Any) -> Optional[float]:
+    """
+    Score de confiance annoncé par l'analyste ("confidence": 0.9, Score de confiance : 0,9...)
+    """
+    match = _CONFIDENCE_PATTERN.search(str(text))
+    if match is None:
+        return None
+    return min(1.0, float(match.group(1).replace(",", ".")))
+
+
+def diff_ratio(draft: Any, validated: Any) -> float:
+    """
+    Part du texte modifiée entre le brouillon et la version validée (0 = identique),
+    comparée mot à mot
+    """
+    return 1.0 - difflib.SequenceMatcher(None, str(draft).split(), str(validated).split()).ratio()
+
+
+class SupervisionDecision:
+    def __init__(self, validate: bool, reason: str, confidence: Optional[float], threshold: float, pattern: Optional[str] = None):
+        self.validate = validate
+        self.reason = reason
+        self.confidence = confidence
+        self.threshold = threshold
+        self.pattern = pattern
+
+
+class SupervisorPolicy:
+    """
+    Décide si la passe du superviseur est nécessaire après la première analyse
+    (SUPERVISION_POLICY=true ; sinon le superviseur valide toujours).
+
+    - SUPERVISION_THRESHOLD / SUPERVISION_THRESHOLD_<AGENT> : confiance à partir de
+      laquelle le superviseur peut être sauté
+    - SUPERVISION_SAMPLE_RATE : part des passes sautables validées quand même, pour
+      mesurer le risque qualité
+    - SUPERVISION_MAX_SKIP_RATE : part maximale de passes sautées sur les
+      SUPERVISION_WINDOW dernières décisions d'un agent
+    - SUPERVISION_DIFF_THRESHOLD : en dessous de cette part de texte modifiée, le
+      superviseur est considéré comme ayant approuvé le brouillon ; les entrées
+      approuvées sont mémorisées et sautent ensuite la validation
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, seed: Optional[int] = None):
+        if enabled is None:
+            enabled = os.getenv("SUPERVISION_POLICY", "false").lower() == "true"
+        self.enabled = enabled
+        self.default_threshold = float(os.getenv("SUPERVISION_THRESHOLD", "0.85"))
+        self.sample_rate = float(os.getenv("SUPERVISION_SAMPLE_RATE", "0.1"))
+        self.max_skip_rate = float(os.getenv("SUPERVISION_MAX_SKIP_RATE", "0.8"))
+        self.diff_threshold = float(os.getenv("SUPERVISION_DIFF_THRESHOLD", "0.1"))
+        self.window = int(os.getenv("SUPERVISION_WINDOW", "100"))
+        self.max_patterns = int(os.getenv("SUPERVISION_MAX_PATTERNS", "1024"))
+        self._random = random.Random(seed)
+        self._patterns: "OrderedDict[str, float]" = OrderedDict()
+        self._recent: Dict[str, Deque[bool]] = {}
+        self._validation_time: Dict[str, float] = {}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def threshold_for(self, agent_id: str) -> float:
+        return float(os.getenv(f"SUPERVISION_THRESHOLD_{agent_id.upper()}", self.default_threshold))
+
+    def _agent_stats(self, agent_id: str) -> Dict[str, Any]:
+        return self.stats.setdefault(agent_id, {
+            "validated": 0,
+            "skipped": 0,
+            "reasons": {},
+            "estimated_saved_seconds": 0.0,
+            "sampled": 0,
+            "sampled_changed": 0,
+        })
+
+    def decide(self, agent_id: str, confidence: Optional[float], pattern: Optional[str] = None) -> SupervisionDecision:
+        threshold = self.threshold_for(agent_id)
+        with self._lock:
+            recent = self._recent.setdefault(agent_id, deque(maxlen=self.window))
+            if not self.enabled:
+                validate, reason = True, "disabled"
+            elif pattern is not None and pattern in self._patterns:
+                validate, reason = False, "cached_pattern"
+            elif confidence is None:
+                validate, reason = True, "no_confidence"
+            elif confidence < threshold:
+                validate, reason = True, "low_confidence"
+            elif self._random.random() < self.sample_rate:
+                validate, reason = True, "sampled"
+            elif recent and sum(recent) / len(recent) >= self.max_skip_rate:
+                validate, reason = True, "skip_rate_cap"
+            else:
+                validate, reason = False, "high_confidence"
+
+            recent.append(not validate)
+            stats = self._agent_stats(agent_id)
+            stats["validated" if validate else "skipped"] += 1
+            stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+            if not validate:
+                # Gain estimé : durée moyenne récente d'une validation de cet agent
+                stats["estimated_saved_seconds"] += self._validation_time.get(agent_id, 0.0)
+
+        SUPERVISION_DECISIONS.labels(agent=agent_id, decision="validate" if validate else "skip", reason=reason).inc()
+        logger.info(
+            "supervision agent=%s decision=%s reason=%s confidence=%s threshold=%.2f",
+            agent_id, "validate" if validate else "skip", reason, confidence, threshold
+        )
+        return SupervisionDecision(validate, reason, confidence, threshold, pattern)
+
+    def expected_validation(self, agent_id: str) -> float:
+        """
+        Durée moyenne récente d'une passe du superviseur de l'agent (0 si inconnue)
+        """
+        with self._lock:
+            return self._validation_time.get(agent_id, 0.0)
+
+    def record_validation(self, agent_id: str, decision: SupervisionDecision, duration: float, changed: float, pattern: Optional[str] = None) -> None:
+        """
+        Résultat d'une passe du superviseur : durée, part du brouillon modifiée
+        """
+        with self._lock:
+            previous = self._validation_time.get(agent_id)
+            self._validation_time[agent_id] = duration if previous is None else 0.8 * previous + 0.2 * duration
+            stats = self._agent_stats(agent_id)
+            if decision.reason == "sampled":
+                # Passe qui aurait été sautée : mesure du risque qualité
+                stats["sampled"] += 1
+                if changed > self.diff_threshold:
+                    stats["sampled_changed"] += 1
+            if pattern is not None and changed <= self.diff_threshold:
+                self._patterns[pattern] = time.time()
+                self._patterns.move_to_end(pattern)
+                while len(self._patterns) > self.max_patterns:
+                    self._patterns.popitem(last=False)
+            elif pattern is not None:
+                self._patterns.pop(pattern, None)
+
+        logger.info(
+            "supervision agent=%s validated duration=%.2fs changed=%.2f reason=%s",
+            agent_id, duration, changed, decision.reason
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            agents = {}
+            for agent_id, stats in self.stats.items():
+                total = stats["validated"] + stats["skipped"]
+                agents[agent_id] = {
+                    **stats,
+                    "reasons": dict(stats["reasons"]),
+                    "threshold": self.threshold_for(agent_id),
+                    "skip_rate": stats["skipped"] / total if total else 0.0,
+                    # Part des validations forcées où le superviseur a réellement corrigé
+                    "quality_risk": stats["sampled_changed"] / stats["sampled"] if stats["sampled"] else None,
+                }
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "max_skip_rate": self.max_skip_rate,
+                "patterns": len(self._patterns),
+                "agents": agents,
+            }
+
+
+_policy: Optional[SupervisorPolicy] = None
+
+
+def get_supervisor_policy() -> SupervisorPolicy:
+    global _policy
+    if _policy is None:
+        _policy = SupervisorPolicy()
+    return _policy
+
+
+def skip_supervisor(agent_id: str) -> None:
+    # Réponse non validée : hors cache, comptée comme dégradation
+    mark_degraded("deadline")
+    degrade_stage()
+    DEADLINE_OUTCOMES.labels(stage=agent_id, outcome="supervisor_skipped").inc()
+    logger.info("supervision agent=%s decision=skip reason=deadline", agent_id)
+
+
+def review_decision(agent_id: str, confidence: Optional[float], **params: Any) -> Optional[SupervisionDecision]:
+    """
+    Relecture d'un brouillon déjà produit : None si le budget de l'étape ne permet
+    plus la validation (passe sautée), sinon la décision de la politique ; params
+    identifient l'entrée pour la mémoire des brouillons approuvés
+    """
+    policy = get_supervisor_policy()
+    remaining = stage_remaining()
+    if stage_degraded() or (remaining is not None and remaining < policy.expected_validation(agent_id)):
+        skip_supervisor(agent_id)
+        return None
+    return policy.decide(agent_id, confidence, cache_key(agent_id, "supervision", "", None, params))
+
+
+async def supervised_kickoff(
+    agent_id: str,
+    crew: Any,
+    draft_crew: Any,
+    validation_crew: Any,
+    validation_params: Optional[Dict[str, Any]] = None,
+    **params: Any
+) -> Any:
+    """
+    Exécute une étape analyste + superviseur. Sans politique active, le crew complet
+    est lancé tel quel ; sinon l'analyste produit un brouillon et la politique décide
+    si validation_crew (paramètre {draft}) doit le relire.
+
+    Budget de l'étape entamé (X-Request-Deadline) : seul le brouillon est produit,
+    ou la validation est sautée si elle ne tient plus dans le temps restant.
+    """
+    policy = get_supervisor_policy()
+    executor = get_executor()
+    if stage_degraded():
+        skip_supervisor(agent_id)
+        return await executor.kickoff(draft_crew, agent_id=agent_id, **params)
+    if not policy.enabled:
+        return await executor.kickoff(crew, agent_id=agent_id, **params)
+
+    draft = await executor.kickoff(draft_crew, agent_id=agent_id, **params)
+    decision = review_decision(agent_id, extract_confidence(draft), **params)
+    if decision is None or not decision.validate:
+        return draft
+
+    start = time.perf_counter()
+    validated = await executor.kickoff(
+        validation_crew,
+        agent_id=agent_id,
+        draft=draft,
+        **(validation_params or {})
+    )
+    policy.record_validation(agent_id, decision, time.perf_counter() - start, diff_ratio(draft, validated), decision.pattern)
+    return validated
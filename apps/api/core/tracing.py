@@ -0,0 +1,389 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("coachlibre.tracing")
+
+# Types de span OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """
+    Span au format OpenTelemetry (identifiants W3C, horodatage en nanosecondes) ;
+    un span non échantillonné n'est ni enregistré ni exporté
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "kind", "sampled", "start_ns", "end_ns", "attributes", "events", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, kind: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        if self.sampled:
+            self.events.append({"timeUnixNano": str(time.time_ns()), "name": name, "attributes": _otlp_attributes(attributes)})
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = str(error) or type(error).__name__
+        self.set_attribute("exception.type", type(error).__name__)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+class SpanExporter:
+    """
+    Exporte les spans terminés par lots, depuis un thread dédié, au format OTLP/JSON
+    (ExportTraceServiceRequest) :
+
+    - TRACE_OTLP_ENDPOINT : collecteur OTLP/HTTP (ex. http://otel-collector:4318/v1/traces)
+    - TRACE_FILE : sans collecteur, une requête OTLP par ligne (fichier JSONL, relu par
+      benchmarks.traces) ; renommé en <fichier>.1 au-delà de TRACE_FILE_MAX_BYTES
+    - TRACE_FLUSH_INTERVAL / TRACE_BATCH_SIZE / TRACE_BUFFER_SIZE : lots et file d'attente
+      (au-delà de TRACE_BUFFER_SIZE, les spans sont abandonnés plutôt que de bloquer)
+    """
+
+    def __init__(self, service_name: str):
+        self.endpoint = os.getenv("TRACE_OTLP_ENDPOINT")
+        # Fichier sur demande uniquement, et jamais en plus du collecteur
+        self.path = None if self.endpoint else os.getenv("TRACE_FILE") or None
+        self.max_bytes = int(os.getenv("TRACE_FILE_MAX_BYTES", str(100 * 1024 * 1024)))
+        self.flush_interval = float(os.getenv("TRACE_FLUSH_INTERVAL", "2"))
+        self.batch_size = int(os.getenv("TRACE_BATCH_SIZE", "512"))
+        self.resource = {"attributes": _otlp_attributes({"service.name": service_name, "process.pid": os.getpid()})}
+        self.stats = {"exported": 0, "dropped": 0, "errors": 0}
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=int(os.getenv("TRACE_BUFFER_SIZE", "10000")))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, span: Span) -> None:
+        if not self.path and not self.endpoint:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _loop(self) -> None:
+        while True:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stop = True
+                    break
+                batch.append(span)
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[Span]) -> None:
+        request = {
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{"scope": {"name": "coachlibre"}, "spans": [span.to_otlp() for span in batch]}],
+            }]
+        }
+        try:
+            if self.path:
+                self._rotate()
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            if self.endpoint:
+                import httpx
+
+                httpx.post(self.endpoint, json=request, timeout=5.0).raise_for_status()
+            self.stats["exported"] += len(batch)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning("Export des traces impossible : %s", e)
+
+    def _rotate(self) -> None:
+        try:
+            if os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+        except FileNotFoundError:
+            pass
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+
+class Tracer:
+    """
+    Traces des workflows : requête HTTP → workflow → méthode d'agent → crew → tâche
+    CrewAI → appel LLM. Le span courant suit la requête dans les threads de
+    l'exécuteur (contexte copié) ; un en-tête traceparent entrant est respecté.
+
+    - TRACING_ENABLED=true : active les traces
+    - TRACE_SAMPLE_RATE : part des traces racines enregistrées
+    - TRACE_SERVICE_NAME : attribut service.name des spans
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+        self.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+        self.exporter = SpanExporter(os.getenv("TRACE_SERVICE_NAME", "coachlibre-api")) if self.enabled else None
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        traceparent: Optional[str] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        **attributes: Any
+    ) -> Optional[Span]:
+        """
+        Démarre un span sans le rendre courant (None si les traces sont désactivées),
+        à terminer par end_span()
+        """
+        if not self.enabled:
+            return None
+        parent = parent or _current.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+        match = _TRACEPARENT.match(traceparent or "")
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            return Span(name, trace_id, parent_id, flags == "01", kind, attributes)
+        sampled = random.random() < self.sample_rate
+        return Span(name, f"{random.getrandbits(128):032x}", None, sampled, kind, attributes)
+
+    def end_span(self, span: Optional[Span], error: Optional[BaseException] = None) -> None:
+        if span is None:
+            return
+        if error is not None:
+            span.record_error(error)
+        span.end_ns = time.time_ns()
+        if span.sampled:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Span courant pour la durée du bloc (enfant du span courant)
+        """
+        span = self.start_span(name, kind=kind, **attributes)
+        if span is None:
+            yield None
+            return
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        else:
+            self.end_span(span)
+        finally:
+            _current.reset(token)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "file": self.exporter.path if self.exporter else None,
+            "endpoint": self.exporter.endpoint if self.exporter else None,
+            **(self.exporter.stats if self.exporter else {}),
+        }
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add_span_event(name: str, **attributes: Any) -> None:
+    """
+    Événement sur le span courant (reprise, requête dupliquée...), sans effet hors trace
+    """
+    span = _current.get()
+    if span is not None:
+        span.add_event(name, **attributes)
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI : span racine par requête HTTP (hors TRACE_EXCLUDE_PATHS), parent
+    pris dans l'en-tête traceparent entrant et renvoyé dans la réponse
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.exclude = set(os.getenv("TRACE_EXCLUDE_PATHS", "/health,/ready,/metrics").split(","))
+
+    async def __call__(self, scope, receive, send):
+        tracer = get_tracer()
+        if scope["type"] != "http" or not tracer.enabled or scope["path"] in self.exclude:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        span = tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            traceparent=headers.get(b"traceparent", b"").decode("latin-1"),
+            kind=SPAN_KIND_SERVER,
+            **{"http.method": scope["method"], "http.target": scope["path"]}
+        )
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                message["headers"] = list(message.get("headers", [])) + [(b"traceparent", span.traceparent.encode())]
+            await send(message)
+
+        token = _current.set(span)
+        error = None
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            tracer.end_span(span, error)
+
+
+_llm_handler_class = None
+
+
+def llm_tracing_handler(model: str) -> Any:
+    """
+    Handler LangChain : span feuille par requête LLM (modèle, tokens), courant
+    pendant l'appel pour que reprises et requêtes HTTP s'y rattachent
+    """
+    global _llm_handler_class
+    if _llm_handler_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class LLMTracingHandler(BaseCallbackHandler):
+            def __init__(self, model: str):
+                self.model = model
+                self._spans: Dict[Any, Any] = {}
+
+            def _start(self, run_id: Any, prompt_chars: int) -> None:
+                span = get_tracer().start_span(
+                    "llm.chat",
+                    kind=SPAN_KIND_CLIENT,
+                    **{"llm.model": self.model, "llm.prompt_chars": prompt_chars}
+                )
+                if span is not None:
+                    # Le span précédent est restauré à la fin de l'appel (même thread)
+                    self._spans[run_id] = (span, _current.get())
+                    _current.set(span)
+
+            def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any) -> None:
+                self._start(run_id, sum(len(str(m.content)) for batch in messages for m in batch))
+
+            def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any) -> None:
+                self._start(run_id, sum(len(p) for p in prompts))
+
+            def _finish(self, run_id: Any, error: Optional[BaseException] = None) -> Optional[Span]:
+                span, previous = self._spans.pop(run_id, (None, None))
+                if span is None:
+                    return None
+                _current.set(previous)
+                get_tracer().end_span(span, error)
+                return span
+
+            def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+                entry = self._spans.get(run_id)
+                if entry is not None:
+                    output = response.llm_output or {}
+                    usage = output.get("token_usage") or {}
+                    entry[0].set_attribute("llm.response_model", output.get("model_name"))
+                    for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                        entry[0].set_attribute(f"llm.usage.{kind}", usage.get(kind))
+                self._finish(run_id)
+
+            def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+                self._finish(run_id, error)
+
+        _llm_handler_class = LLMTracingHandler
+    return _llm_handler_class(model)
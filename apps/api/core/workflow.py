@@ -0,0 +1,352 @@
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from core.cache import cache_bypass
+from core.dag import DagExecutor
+from core.deadline import Deadline, DeadlineExceeded, workflow_deadline
+from core.executor import CrewTimeoutError
+from core.ids import intent_hash, new_workflow_id
+from core.log import debug_request
+from core.metrics import DEADLINE_OUTCOMES, WORKFLOW_LATENCY, WORKFLOWS_IN_FLIGHT, record_error
+from core.persistence import get_workflow_store
+from core.registry import AgentRegistry
+from core.singleflight import get_single_flight
+from core.speculation import get_speculation
+from core.tracing import get_tracer
+from models import AgentResponse, ExtendedWorkflowResult, UserIntent, WorkflowResult
+
+# Étapes du workflow, dans l'ordre d'exécution
+STAGES = ["intent", "project", "technical", "release"]
+
+# Agent, clé de la réponse et agent suivant pour chaque étape
+STAGE_AGENTS = {
+    "intent": ("intent_manager", "analysis", "project_manager"),
+    "project": ("project_manager", "requirements", "technical_lead"),
+    "technical": ("technical_lead", "solution", "release_manager"),
+    "release": ("release_manager", "delivery_plan", None),
+}
+
+# Nœuds du workflow étendu : méthode → agent (entrées déclarées par @consumes)
+WORKFLOW_NODES = {
+    "process_intent": "intent",
+    "analyze_requirements": "project",
+    "design_solution": "technical",
+    "prepare_delivery": "release",
+    "create_project_plan": "project",
+    "create_technical_specs": "technical",
+    "create_release_notes": "release",
+    "monitor_system_health": "crew",
+}
+
+# Entrées initiales disponibles pour les nœuds
+WORKFLOW_SOURCES = ["intent", "context"]
+
+StageCallback = Callable[[str, str, Optional[AgentResponse]], Awaitable[None]]
+
+
+def build_agent_response(stage: str, result: Dict[str, Any]) -> AgentResponse:
+    """
+    Construit la réponse API d'une étape à partir du résultat brut de l'agent
+    """
+    agent_id, response_key, next_agent = STAGE_AGENTS[stage]
+    return AgentResponse(
+        agent_id=agent_id,
+        response=str(result[response_key]),
+        confidence=result["confidence"],
+        next_agent=next_agent
+    )
+
+
+def intent_key(user_intent: UserIntent) -> str:
+    """
+    Clé des workflows identiques : intention et contexte normalisés
+    """
+    return intent_hash(user_intent.intent, user_intent.context)
+
+
+def coalescible(user_intent: UserIntent) -> bool:
+    """
+    Seules les requêtes sans condition propre sont regroupées : pas de budget
+    (X-Request-Deadline, timeout), de contournement du cache ni de X-Debug. Le calcul
+    partagé s'exécute dans le contexte du premier appelant, dont les autres
+    hériteraient sinon
+    """
+    return user_intent.timeout is None and not cache_bypass.get() and not debug_request.get()
+
+
+def workflow_budget(user_intent: UserIntent) -> Optional[float]:
+    """
+    Budget de temps du workflow : timeout de l'intention, sinon WORKFLOW_DEADLINE_SECONDS
+    """
+    if user_intent.timeout is not None:
+        return user_intent.timeout
+    default = os.getenv("WORKFLOW_DEADLINE_SECONDS")
+    return float(default) if default else None
+
+
+def stage_records(result: WorkflowResult, durations: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """
+    Lignes d'étapes persistées pour un résultat de workflow
+    """
+    durations = durations or {}
+    return [
+        {
+            "stage": stage,
+            "agent_id": response.agent_id,
+            "confidence": response.confidence,
+            "output": response.model_dump(),
+            "duration": durations.get(stage),
+        }
+        for stage, response in zip(STAGES, result.results)
+    ]
+
+
+class WorkflowPipeline:
+    """
+    Enchaîne les quatre agents (intention → projet → technique → release)
+    """
+
+    def __init__(self, registry: AgentRegistry):
+        self.registry = registry
+        self.dag = DagExecutor(registry)
+        self._catalog: Optional[Dict[str, Any]] = None
+
+    def catalog(self) -> Dict[str, Any]:
+        """
+        Méthode → (agent, entrées déclarées), lu sur les classes d'agents au premier usage
+        """
+        if self._catalog is None:
+            self._catalog = {
+                method: (agent_id, getattr(getattr(self.registry.agent_class(agent_id), method), "dag_inputs", {}))
+                for method, agent_id in WORKFLOW_NODES.items()
+            }
+        return self._catalog
+
+    async def run_shared(self, user_intent: UserIntent) -> WorkflowResult:
+        """
+        Comme run(), mais les workflows identiques en cours (sur ce réplica ou un autre)
+        sont regroupés en un seul calcul. Seul un résultat "completed" est partagé : un
+        résultat partiel dépend du budget du premier appelant, les autres recalculent
+        """
+        workflow_id = new_workflow_id()
+        if not coalescible(user_intent):
+            return await self.run(user_intent, workflow_id=workflow_id)
+        result = await get_single_flight().do(
+            intent_key(user_intent),
+            lambda: self.run(user_intent, workflow_id=workflow_id),
+            encode=lambda result: result.model_dump(),
+            decode=WorkflowResult.model_validate
+        )
+        if result.workflow_id == workflow_id:
+            return result
+        if result.status != "completed":
+            return await self.run(user_intent, workflow_id=workflow_id)
+        # Appelant regroupé : le workflow est aussi enregistré sous son identifiant
+        result = result.model_copy(update={"workflow_id": workflow_id})
+        get_workflow_store().record_workflow(
+            result.workflow_id, user_intent.user_id, user_intent.intent, result.status,
+            final_output=result.final_output, stages=stage_records(result),
+            intent_hash=result.intent_hash
+        )
+        return result
+
+    async def run_extended(
+        self,
+        user_intent: UserIntent,
+        targets: Optional[Iterable[str]] = None,
+        workflow_id: Optional[str] = None
+    ) -> ExtendedWorkflowResult:
+        """
+        Exécute les nœuds demandés (tous par défaut) et leurs dépendances en parallèle ;
+        en cas d'échec d'un nœud, les résultats des autres branches sont conservés
+        """
+        catalog = await asyncio.to_thread(self.catalog)
+        nodes = self.dag.build(catalog, targets or list(WORKFLOW_NODES), WORKFLOW_SOURCES)
+        with WORKFLOWS_IN_FLIGHT.track_inprogress(), WORKFLOW_LATENCY.time():
+            run = await self.dag.run(nodes, {"intent": user_intent.intent, "context": user_intent.context})
+
+        if not run["errors"]:
+            status = "completed"
+        elif run["results"]:
+            status = "partial"
+        else:
+            status = "failed"
+        return ExtendedWorkflowResult(
+            workflow_id=workflow_id or new_workflow_id(),
+            status=status,
+            intent_hash=intent_key(user_intent),
+            **run
+        )
+
+    async def run(
+        self,
+        user_intent: UserIntent,
+        workflow_id: Optional[str] = None,
+        on_stage: Optional[StageCallback] = None
+    ) -> WorkflowResult:
+        """
+        Exécute le workflow complet ; on_stage(stage, statut, réponse) est appelé
+        au démarrage ("running") et à la fin ("completed") de chaque étape.
+
+        Avec un budget de temps (user_intent.timeout), chaque étape reçoit une part du
+        temps restant ; si le budget est épuisé, le résultat est "partial" avec les
+        étapes terminées.
+        """
+        store = get_workflow_store()
+        workflow_id = workflow_id or new_workflow_id()
+        started: Dict[str, float] = {}
+        durations: Dict[str, float] = {}
+
+        async def timed(stage: str, status: str, response: Optional[AgentResponse]):
+            # Durée de chaque étape pour la persistance
+            if status == "running":
+                started[stage] = time.perf_counter()
+            elif stage in started:
+                durations[stage] = time.perf_counter() - started[stage]
+            if on_stage is not None:
+                await on_stage(stage, status, response)
+
+        start = time.perf_counter()
+        budget = workflow_budget(user_intent)
+        span_attributes = {"workflow.id": workflow_id, "workflow.intent_hash": intent_key(user_intent), "workflow.budget_seconds": budget}
+        with WORKFLOWS_IN_FLIGHT.track_inprogress(), WORKFLOW_LATENCY.time():
+            try:
+                with get_tracer().span("workflow", **span_attributes) as span, workflow_deadline(budget, STAGES) as deadline:
+                    result = await self._run(user_intent, workflow_id, timed if store.enabled else on_stage, deadline)
+                    if span is not None:
+                        span.set_attribute("workflow.status", result.status)
+            except Exception as e:
+                record_error("workflow", e)
+                store.record_workflow(
+                    workflow_id, user_intent.user_id, user_intent.intent, "failed",
+                    error=str(e) or type(e).__name__, duration=time.perf_counter() - start,
+                    intent_hash=intent_key(user_intent)
+                )
+                raise
+
+        # Mise en file uniquement : l'écriture en base se fait en arrière-plan
+        store.record_workflow(
+            workflow_id, user_intent.user_id, user_intent.intent, result.status,
+            final_output=result.final_output, duration=time.perf_counter() - start,
+            stages=stage_records(result, durations), intent_hash=result.intent_hash
+        )
+        return result
+
+    async def _run(
+        self,
+        user_intent: UserIntent,
+        workflow_id: Optional[str],
+        on_stage: Optional[StageCallback],
+        deadline: Optional[Deadline] = None
+    ) -> WorkflowResult:
+        async def notify(stage: str, status: str, response: Optional[AgentResponse] = None):
+            if on_stage is not None:
+                await on_stage(stage, status, response)
+
+        def budget(*stages: str):
+            return deadline.stage(*stages) if deadline is not None else contextlib.nullcontext()
+
+        responses: List[AgentResponse] = []
+        try:
+            release_result = await self._stages(user_intent, notify, budget, responses)
+        except (DeadlineExceeded, CrewTimeoutError) as e:
+            if deadline is None:
+                raise
+            return self._partial(user_intent, workflow_id, responses, deadline, e)
+
+        # Compilation des résultats
+        return WorkflowResult(
+            workflow_id=workflow_id or new_workflow_id(),
+            status="completed",
+            results=responses,
+            intent_hash=intent_key(user_intent),
+            # prepare_delivery ne fournit pas toujours de "final_output" : on retombe sur le plan
+            final_output=str(release_result.get("final_output") or release_result["delivery_plan"]),
+            degraded_stages=list(deadline.degraded) if deadline is not None else []
+        )
+
+    def _partial(
+        self,
+        user_intent: UserIntent,
+        workflow_id: Optional[str],
+        responses: List[AgentResponse],
+        deadline: Deadline,
+        error: Exception
+    ) -> WorkflowResult:
+        """
+        Résultat des étapes terminées quand le budget de temps est épuisé
+        """
+        skipped = STAGES[len(responses):]
+        if isinstance(error, CrewTimeoutError):
+            DEADLINE_OUTCOMES.labels(stage=skipped[0], outcome="timeout").inc()
+        return WorkflowResult(
+            workflow_id=workflow_id or new_workflow_id(),
+            status="partial",
+            results=responses,
+            intent_hash=intent_key(user_intent),
+            final_output=responses[-1].response if responses else f"Budget de temps épuisé ({error})",
+            degraded_stages=list(deadline.degraded),
+            skipped_stages=skipped
+        )
+
+    async def _stages(
+        self,
+        user_intent: UserIntent,
+        notify: Callable[..., Awaitable[None]],
+        budget: Callable[..., Any],
+        responses: List[AgentResponse]
+    ) -> Dict[str, Any]:
+        """
+        Enchaîne les étapes ; responses reçoit chaque réponse dès la fin de son étape
+        """
+        speculation = get_speculation()
+        if speculation.enabled:
+            # 1-2. Intention et besoins en pipeline spéculatif
+            await notify("intent", "running")
+            intent_manager = await self.registry.aget("intent")
+            project_manager = await self.registry.aget("project")
+            with budget("intent", "project"):
+                intent_result, project_result = await speculation.run(
+                    intent_manager, project_manager, user_intent.intent, user_intent.context
+                )
+            responses.append(build_agent_response("intent", intent_result))
+            await notify("intent", "completed", responses[-1])
+            await notify("project", "running")
+            responses.append(build_agent_response("project", project_result))
+            await notify("project", "completed", responses[-1])
+        else:
+            # 1. Gestionnaire d'intention
+            await notify("intent", "running")
+            intent_manager = await self.registry.aget("intent")
+            with budget("intent"):
+                intent_result = await intent_manager.process_intent(user_intent.intent, user_intent.context)
+            responses.append(build_agent_response("intent", intent_result))
+            await notify("intent", "completed", responses[-1])
+
+            # 2. Chef de projet fonctionnel
+            await notify("project", "running")
+            project_manager = await self.registry.aget("project")
+            with budget("project"):
+                project_result = await project_manager.analyze_requirements(intent_result)
+            responses.append(build_agent_response("project", project_result))
+            await notify("project", "completed", responses[-1])
+
+        # 3. Chef de projet technique
+        await notify("technical", "running")
+        technical_lead = await self.registry.aget("technical")
+        with budget("technical"):
+            technical_result = await technical_lead.design_solution(project_result)
+        responses.append(build_agent_response("technical", technical_result))
+        await notify("technical", "completed", responses[-1])
+
+        # 4. Release Manager
+        await notify("release", "running")
+        release_manager = await self.registry.aget("release")
+        with budget("release"):
+            release_result = await release_manager.prepare_delivery(technical_result)
+        responses.append(build_agent_response("release", release_result))
+        await notify("release", "completed", responses[-1])
+        return release_result
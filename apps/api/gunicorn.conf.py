@@ -0,0 +1,60 @@
+"""
+Configuration gunicorn du mode production (workers uvicorn) :
+
+    gunicorn -c gunicorn.conf.py main:app
+
+- WEB_CONCURRENCY : nombre de workers (par défaut un par CPU, plafonné par
+  WEB_MAX_WORKERS) ; les crews tournent dans le pool de threads de chaque worker,
+  le parallélisme CPU (parsing, prompts) vient des processus
+- GUNICORN_KEEPALIVE, GUNICORN_BACKLOG, GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT
+- PROMETHEUS_MULTIPROC_DIR : métriques agrégées entre workers sur /metrics
+
+L'état partagé entre workers (jobs, caches, regroupement des workflows, activité
+des agents) passe par Redis : REDIS_URL doit être défini dès qu'il y a plus d'un worker.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+
+def default_workers() -> int:
+    cpus = multiprocessing.cpu_count()
+    return max(1, min(cpus, int(os.getenv("WEB_MAX_WORKERS", "8"))))
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", default_workers()))
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+backlog = int(os.getenv("GUNICORN_BACKLOG", "2048"))
+# Un workflow complet peut durer plusieurs minutes (CREW_TIMEOUT_SECONDS par crew)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "600"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+# Pas de préchargement : chaque worker importe l'application après le fork et construit
+# ses agents au premier usage (pools de threads, clients HTTP et Redis propres au worker)
+preload_app = False
+# GUNICORN_ACCESS_LOG vide : journal des accès désactivé
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+
+# Répertoire des métriques multiprocessus, posé avant l'import de prometheus_client par les workers
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "coachlibre-metrics"))
+
+
+def on_starting(server):
+    # Fichiers de métriques d'une exécution précédente
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    if server.cfg.workers > 1 and not os.getenv("REDIS_URL"):
+        server.log.warning(
+            "%s workers sans REDIS_URL : jobs, caches et activité des agents restent propres à chaque worker",
+            server.cfg.workers
+        )
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,25 +1,67 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from typing import List, Optional
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
 
-# Import des modules CrewAI
-from agents.crew_manager import CrewManager
-from agents.intent_manager import IntentManager
-from agents.project_manager import ProjectManager
-from agents.technical_lead import TechnicalLead
-from agents.release_manager import ReleaseManager
+from core.batch import NDJSON_TYPES, BatchProcessor, iter_json_array, iter_ndjson
+from core.cache import CacheBypassMiddleware, get_cache
+from core.dag import DagError
+from core.deadline import parse_deadline_header
+from core.executor import CrewTimeoutError, shutdown_executor
+from core.handoff import get_handoff
+from core.log import LogContextMiddleware, configure_logging, get_log_system
+from core.jobs import JobManager, create_job_store
+from core.llm import get_llm_registry
+from core.metrics import get_activity, render_metrics
+from core.persistence import get_workflow_store
+from core.registry import get_agent_registry
+from core.resilience import get_resilience
+from core.routing import get_model_router
+from core.semantic_cache import get_semantic_cache
+from core.singleflight import get_single_flight
+from core.speculation import get_speculation
+from core.streaming import stream_workflow
+from core.supervision import get_supervisor_policy
+from core.tracing import TracingMiddleware, get_tracer
+from core.workflow import WorkflowPipeline
+from models import ExtendedWorkflowResult, UserIntent, WorkflowJob, WorkflowResult
 
 load_dotenv()
+# Journaux JSON non bloquants, avant toute construction d'agent
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Préchauffage optionnel des agents, en tâche de fond pour ne pas retarder /health
+    warmup_task = None
+    if os.getenv("AGENT_WARMUP", "false").lower() == "true":
+        warmup_task = asyncio.create_task(agent_registry.warm_up())
+    # Base indisponible : démarrage sans persistance, reconnexion en arrière-plan
+    await get_workflow_store().start()
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await job_manager.shutdown()
+    # Vide le tampon d'écriture avant de fermer le pool de connexions
+    await get_workflow_store().close()
+    # Libère le pool de threads des crews et les connexions HTTP des LLM à l'arrêt
+    shutdown_executor()
+    get_llm_registry().close()
+    # Derniers spans exportés et journaux écrits avant l'arrêt
+    get_tracer().close()
+    get_log_system().close()
 
 app = FastAPI(
     title="CoachLibre API",
     description="API Multi-Agent pour la plateforme de coaching",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configuration CORS
@@ -30,31 +72,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CacheBypassMiddleware)
+app.add_middleware(TracingMiddleware)
+# Ajouté en dernier, donc le plus externe : l'identifiant couvre toute la requête
+app.add_middleware(LogContextMiddleware)
+
+# Initialisation des agents (construits au premier usage)
+agent_registry = get_agent_registry()
+
+pipeline = WorkflowPipeline(agent_registry)
+job_manager = JobManager(create_job_store(), pipeline)
+batch_processor = BatchProcessor(pipeline)
 
-# Modèles Pydantic
-class UserIntent(BaseModel):
-    intent: str
-    context: Optional[dict] = None
-    user_id: Optional[str] = None
-
-class AgentResponse(BaseModel):
-    agent_id: str
-    response: str
-    confidence: float
-    next_agent: Optional[str] = None
-
-class WorkflowResult(BaseModel):
-    workflow_id: str
-    status: str
-    results: List[AgentResponse]
-    final_output: str
-
-# Initialisation des agents
-crew_manager = CrewManager()
-intent_manager = IntentManager()
-project_manager = ProjectManager()
-technical_lead = TechnicalLead()
-release_manager = ReleaseManager()
+async def deadline_intent(user_intent: UserIntent, x_request_deadline: Optional[str] = Header(None)) -> UserIntent:
+    """
+    Intention dont le budget de temps vient de l'en-tête X-Request-Deadline s'il est présent
+    """
+    try:
+        budget = parse_deadline_header(x_request_deadline)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"X-Request-Deadline invalide: {x_request_deadline}")
+    if budget is None:
+        return user_intent
+    return user_intent.model_copy(update={"timeout": budget})
 
 @app.get("/")
 async def root():
@@ -64,81 +104,243 @@ async def root():
 async def health_check():
     return {"status": "healthy", "agents": ["intent", "project", "technical", "release"]}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Indique quels agents sont déjà construits ; avec AGENT_WARMUP=true, 503 tant que
+    le préchauffage n'est pas terminé
+    """
+    agents = agent_registry.status()
+    warmup = os.getenv("AGENT_WARMUP", "false").lower() == "true"
+    ready = all(agents.values()) or not warmup
+    content = {"status": "ready" if ready else "warming_up", "agents": agents}
+    return JSONResponse(content=content, status_code=200 if ready else 503)
+
 @app.post("/workflow/process", response_model=WorkflowResult)
-async def process_workflow(user_intent: UserIntent):
+async def process_workflow(user_intent: UserIntent = Depends(deadline_intent)):
     """
-    Traite une intention utilisateur à travers le workflow multi-agent
+    Traite une intention utilisateur à travers le workflow multi-agent ; avec un budget
+    de temps (X-Request-Deadline ou timeout), résultat "partial" si le budget est épuisé
     """
     try:
-        # 1. Gestionnaire d'intention
-        intent_result = await intent_manager.process_intent(user_intent.intent, user_intent.context)
-        
-        # 2. Chef de projet fonctionnel
-        project_result = await project_manager.analyze_requirements(intent_result)
-        
-        # 3. Chef de projet technique
-        technical_result = await technical_lead.design_solution(project_result)
-        
-        # 4. Release Manager
-        release_result = await release_manager.prepare_delivery(technical_result)
-        
-        # Compilation des résultats
-        workflow_result = WorkflowResult(
-            workflow_id=f"wf_{user_intent.user_id}_{int(hash(user_intent.intent))}",
-            status="completed",
-            results=[
-                AgentResponse(
-                    agent_id="intent_manager",
-                    response=intent_result["analysis"],
-                    confidence=intent_result["confidence"]
-                ),
-                AgentResponse(
-                    agent_id="project_manager",
-                    response=project_result["requirements"],
-                    confidence=project_result["confidence"]
-                ),
-                AgentResponse(
-                    agent_id="technical_lead",
-                    response=technical_result["solution"],
-                    confidence=technical_result["confidence"]
-                ),
-                AgentResponse(
-                    agent_id="release_manager",
-                    response=release_result["delivery_plan"],
-                    confidence=release_result["confidence"]
-                )
-            ],
-            final_output=release_result["final_output"]
-        )
-        
-        return workflow_result
+        # Les requêtes identiques concurrentes partagent le même calcul
+        return await pipeline.run_shared(user_intent)
         
+    except CrewTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"Délai dépassé dans le workflow: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur dans le workflow: {str(e)}")
+
+@app.post("/workflow/extended", response_model=ExtendedWorkflowResult)
+async def process_extended_workflow(user_intent: UserIntent, nodes: Optional[List[str]] = Query(None)):
+    """
+    Workflow étendu (plan projet, spécifications, notes de release, santé du système) :
+    les nœuds indépendants s'exécutent en parallèle ; statut "partial" si certains échouent
+    """
+    try:
+        return await pipeline.run_extended(user_intent, nodes)
+
+    except DagError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur dans le workflow: {str(e)}")
 
+@app.post("/workflow/stream")
+async def stream_workflow_events(user_intent: UserIntent = Depends(deadline_intent), tokens: bool = False):
+    """
+    Traite une intention et diffuse (Server-Sent Events) la réponse de chaque agent dès sa fin
+    """
+    return StreamingResponse(
+        stream_workflow(pipeline, user_intent, tokens=tokens),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/workflow/batch")
+async def process_workflow_batch(request: Request):
+    """
+    Traite un lot d'intentions (tableau JSON ou flux NDJSON) et diffuse un résultat NDJSON
+    par élément, dans l'ordre de fin : {"index", "status", "result" | "error"}
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        # Corps lu avant de répondre : pendant la réponse en streaming, Starlette
+        # consomme les messages entrants pour détecter la déconnexion du client
+        items = iter_ndjson(await request.body())
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Corps attendu : tableau JSON ou NDJSON")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Corps attendu : tableau JSON ou NDJSON")
+        items = iter_json_array(body)
+
+    return StreamingResponse(
+        batch_processor.stream(items),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/workflow/submit", response_model=WorkflowJob, status_code=202)
+async def submit_workflow(user_intent: UserIntent = Depends(deadline_intent)):
+    """
+    Soumet un workflow en tâche de fond et retourne immédiatement son identifiant
+    """
+    return await job_manager.submit(user_intent)
+
+@app.get("/workflow/{workflow_id}", response_model=WorkflowJob)
+async def get_workflow(workflow_id: str):
+    """
+    Retourne la progression d'un workflow (statut de chaque étape)
+    """
+    job = await job_manager.get(workflow_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    return job
+
+@app.get("/workflow/{workflow_id}/result", response_model=WorkflowResult)
+async def get_workflow_result(workflow_id: str):
+    """
+    Retourne le résultat final d'un workflow terminé, complet ou partiel (budget épuisé)
+    """
+    job = await job_manager.get(workflow_id)
+    if job is None:
+        # Job expiré ou workflow synchrone : résultat persisté
+        stored = await get_workflow_store().get_workflow(workflow_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Workflow non trouvé")
+        job = {
+            "status": stored["status"],
+            "error": stored["error"],
+            "result": {
+                "workflow_id": workflow_id,
+                "status": stored["status"],
+                "results": [stage["output"] for stage in stored["stages"]],
+                "final_output": stored["final_output"] or "",
+                "intent_hash": stored["intent_hash"],
+            },
+        }
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Erreur dans le workflow: {job['error']}")
+    if job["status"] not in ("completed", "partial"):
+        raise HTTPException(status_code=409, detail=f"Workflow non terminé (statut : {job['status']})")
+    return job["result"]
+
+@app.get("/users/{user_id}/workflows")
+async def list_user_workflows(user_id: str, limit: int = Query(50, ge=1, le=500)):
+    """
+    Historique des workflows d'un utilisateur (du plus récent au plus ancien)
+    """
+    return {"user_id": user_id, "workflows": await get_workflow_store().list_workflows(user_id, limit)}
+
+@app.get("/persistence/stats")
+async def persistence_stats():
+    """
+    Tampon d'écriture vers la base : lignes en attente, écrites, abandonnées
+    """
+    return get_workflow_store().snapshot()
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Métriques Prometheus (latences par agent et étape, appels et tokens LLM, caches, erreurs)
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Compteurs du cache des réponses d'agents et du cache sémantique des intentions
+    """
+    return {**get_cache().snapshot(), "semantic": get_semantic_cache().snapshot()}
+
+@app.get("/singleflight/stats")
+async def singleflight_stats():
+    """
+    Workflows regroupés sur un calcul identique déjà en cours
+    """
+    return get_single_flight().snapshot()
+
+@app.get("/handoff/stats")
+async def handoff_stats():
+    """
+    Tokens des prompts transmis entre étapes (digest compact vs données brutes)
+    """
+    return get_handoff().snapshot()
+
+@app.get("/speculation/stats")
+async def speculation_stats():
+    """
+    Taux d'acceptation du pipeline spéculatif intention → projet
+    """
+    return get_speculation().snapshot()
+
+@app.get("/resilience/stats")
+async def resilience_stats():
+    """
+    Appels LLM par modèle : reprises, état du disjoncteur, taux de victoire du hedging
+    """
+    return get_resilience().snapshot()
+
+@app.get("/routing/stats")
+async def routing_stats():
+    """
+    Routage des modèles par crew : modèle ayant servi, escalades, latence et coût
+    économisés par rapport au plus grand modèle de la route
+    """
+    return get_model_router().snapshot()
+
+@app.get("/supervision/stats")
+async def supervision_stats():
+    """
+    Décisions de la politique de supervision : taux de passes sautées, gain estimé,
+    risque qualité mesuré sur les validations forcées
+    """
+    return get_supervisor_policy().snapshot()
+
+@app.get("/logging/stats")
+async def logging_stats():
+    """
+    Journalisation : niveau, format, file d'attente et journaux abandonnés
+    """
+    return get_log_system().snapshot()
+
+@app.get("/tracing/stats")
+async def tracing_stats():
+    """
+    Export des traces : destination, spans exportés, abandonnés et erreurs d'export
+    """
+    return get_tracer().snapshot()
+
 @app.get("/agents/{agent_id}/status")
 async def get_agent_status(agent_id: str):
     """
     Récupère le statut d'un agent spécifique
     """
-    agents = {
-        "intent": intent_manager,
-        "project": project_manager,
-        "technical": technical_lead,
-        "release": release_manager
-    }
-    
-    if agent_id not in agents:
+    if agent_id not in agent_registry:
         raise HTTPException(status_code=404, detail="Agent non trouvé")
     
-    return {"agent_id": agent_id, "status": "active", "last_activity": "2024-01-01T00:00:00Z"}
+    activity = await get_activity().asnapshot(agent_id)
+    # Actif : construit dans ce worker ou sollicité récemment par un autre worker
+    status = "active" if agent_registry.is_warm(agent_id) or activity["last_activity"] else "idle"
+    return {"agent_id": agent_id, "status": status, **activity}
 
 @app.post("/agents/{agent_id}/improve")
 async def improve_agent_response(agent_id: str, feedback: dict):
     """
     Améliore la réponse d'un agent basé sur le feedback
     """
-    # Logique d'amélioration des agents
+    if agent_id not in agent_registry:
+        raise HTTPException(status_code=404, detail="Agent non trouvé")
+    # Feedback conservé pour l'amélioration des agents (écriture en arrière-plan)
+    get_workflow_store().record_feedback(
+        agent_id,
+        feedback,
+        workflow_id=feedback.get("workflow_id"),
+        user_id=feedback.get("user_id")
+    )
     return {"message": f"Agent {agent_id} amélioré avec succès"}
 
 if __name__ == "__main__":
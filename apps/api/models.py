@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+# Modèles Pydantic
+class UserIntent(BaseModel):
+    intent: str
+    context: Optional[dict] = None
+    user_id: Optional[str] = None
+    # Budget de temps en secondes (X-Request-Deadline prioritaire s'il est présent)
+    timeout: Optional[float] = None
+
+class AgentResponse(BaseModel):
+    agent_id: str
+    response: str
+    confidence: float
+    next_agent: Optional[str] = None
+
+class WorkflowResult(BaseModel):
+    workflow_id: str
+    status: str
+    results: List[AgentResponse]
+    final_output: str
+    intent_hash: Optional[str] = None
+    # Étapes exécutées en mode dégradé ou non exécutées faute de budget (statut "partial")
+    degraded_stages: List[str] = []
+    skipped_stages: List[str] = []
+
+class WorkflowJob(BaseModel):
+    workflow_id: str
+    status: str
+    stages: Dict[str, str]
+    results: List[AgentResponse] = []
+    error: Optional[str] = None
+    intent_hash: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+class ExtendedWorkflowResult(BaseModel):
+    workflow_id: str
+    status: str
+    results: Dict[str, Any]
+    statuses: Dict[str, str]
+    errors: Dict[str, str] = {}
+    durations: Dict[str, float] = {}
+    intent_hash: Optional[str] = None
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests lancés depuis apps/api ou depuis la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Aucun appel réseau : LLM local, pas de télémétrie CrewAI
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
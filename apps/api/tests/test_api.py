@@ -0,0 +1,122 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from models import WorkflowResult
+
+
+@pytest.fixture
+def client():
+    # Sans lifespan : ni préchauffage ni connexion à la base
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("header", ["0", "-1", str(time.time() - 60), "abc"])
+def test_invalid_deadline_header_is_rejected(client, header):
+    response = client.post("/workflow/process", json={"intent": "apprendre python"}, headers={"X-Request-Deadline": header})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("status, code", [("completed", 200), ("partial", 200), ("running", 409), ("failed", 500)])
+def test_workflow_result_terminal_states(client, monkeypatch, status, code):
+    job = {
+        "status": status,
+        "error": "boom" if status == "failed" else None,
+        "result": {
+            "workflow_id": "wf_1",
+            "status": status,
+            "results": [],
+            "final_output": "sortie",
+            "skipped_stages": ["release"] if status == "partial" else [],
+        },
+    }
+
+    async def get(workflow_id):
+        return job
+    monkeypatch.setattr(main.job_manager, "get", get)
+
+    response = client.get("/workflow/wf_1/result")
+    assert response.status_code == code
+    if code == 200:
+        assert response.json()["status"] == status
+
+
+class BatchPipeline:
+    """
+    run_shared factice : "partial" avec un budget, échec pour l'intention "boom"
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    async def run_shared(self, user_intent):
+        self.calls.append(user_intent.intent)
+        if user_intent.intent == "boom":
+            raise RuntimeError("échec de l'agent")
+        return WorkflowResult(
+            workflow_id=f"wf_{len(self.calls)}",
+            status="partial" if user_intent.timeout else "completed",
+            results=[],
+            final_output=user_intent.intent
+        )
+
+
+@pytest.fixture
+def batch_pipeline(monkeypatch):
+    pipeline = BatchPipeline()
+    monkeypatch.setattr(main.batch_processor, "pipeline", pipeline)
+    return pipeline
+
+
+def batch_lines(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+
+
+def test_batch_json_array(client, batch_pipeline):
+    items = [
+        {"intent": "apprendre python"},
+        {"intent": "apprendre python"},
+        {"intent": "boom"},
+        {"intent": "apprendre rust", "timeout": 5},
+        {"pas_d_intention": True},
+    ]
+    lines = batch_lines(client.post("/workflow/batch", json=items))
+
+    assert [line["index"] for line in lines] == [0, 1, 2, 3, 4]
+    assert lines[0]["status"] == lines[1]["status"] == "completed"
+    # Un seul des deux doublons est signalé, et une seule exécution
+    assert sorted(bool(line.get("deduplicated")) for line in lines[:2]) == [False, True]
+    assert batch_pipeline.calls.count("apprendre python") == 1
+    assert lines[2] == {"index": 2, "status": "failed", "error": "échec de l'agent"}
+    # Budget épuisé : statut du workflow, pas "completed"
+    assert lines[3]["status"] == "partial"
+    assert lines[3]["result"]["status"] == "partial"
+    assert lines[4]["status"] == "invalid"
+
+
+def test_batch_same_intent_different_budget_is_not_deduplicated(client, batch_pipeline):
+    items = [{"intent": "apprendre python"}, {"intent": "apprendre python", "timeout": 5}]
+    lines = batch_lines(client.post("/workflow/batch", json=items))
+    assert [line["status"] for line in lines] == ["completed", "partial"]
+    assert not any(line.get("deduplicated") for line in lines)
+
+
+def test_batch_ndjson(client, batch_pipeline):
+    body = '{"intent": "apprendre python"}\n\n{"intent": "apprendre rust"}\n{pas du json\n'
+    lines = batch_lines(client.post("/workflow/batch", content=body, headers={"Content-Type": "application/x-ndjson"}))
+
+    # Lignes vides ignorées dans la numérotation
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert [line["status"] for line in lines] == ["completed", "completed", "invalid"]
+    assert lines[1]["result"]["final_output"] == "apprendre rust"
+
+
+@pytest.mark.parametrize("body", ['{"intent": "x"}', "pas du json"])
+def test_batch_rejects_non_array_body(client, batch_pipeline, body):
+    response = client.post("/workflow/batch", content=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
@@ -0,0 +1,113 @@
+import pytest
+
+from core import cache as cache_module
+from core.cache import ResponseCache, cache_bypass, cache_key, cached_stage, normalize
+from core.resilience import mark_degraded
+
+
+class FakeLLM:
+    model_name = "gpt-4o-mini"
+    temperature = 0.1
+
+
+class FakeAgent:
+    agent_id = "intent"
+
+    def __init__(self):
+        self.llm = FakeLLM()
+        self.calls = 0
+
+    @cached_stage
+    async def process_intent(self, intent: str, context: dict = None):
+        self.calls += 1
+        return {"analysis": intent, "context": context}
+
+    @cached_stage
+    async def degraded(self, intent: str):
+        self.calls += 1
+        mark_degraded("fallback")
+        return {"analysis": intent}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.delenv("CACHE_REDIS_URL", raising=False)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("CACHE_ENABLED", "true")
+    cache = ResponseCache()
+    monkeypatch.setattr(cache_module, "_cache", cache)
+    return cache
+
+
+def test_normalize():
+    assert normalize("  Apprendre\n PYTHON ") == "apprendre python"
+    assert normalize({"b": 1, "a": ("X", None)}) == {"a": ["x", None], "b": 1}
+
+
+def test_cache_key_ignores_formatting():
+    assert cache_key("A", "m", "gpt", 0.1, {"x": "Bonjour  le monde"}) == cache_key("A", "m", "gpt", 0.1, {"x": "bonjour le monde"})
+    assert cache_key("A", "m", "gpt", 0.1, {"x": 1}) != cache_key("A", "m", "gpt-4o", 0.1, {"x": 1})
+
+
+async def test_positional_keyword_and_default_calls_share_entry(cache):
+    agent = FakeAgent()
+    first = await agent.process_intent("apprendre python")
+    assert await agent.process_intent("apprendre python", None) == first
+    assert await agent.process_intent(intent="apprendre python") == first
+    assert await agent.process_intent("apprendre python", context=None) == first
+    assert agent.calls == 1
+    assert cache.stats["hits_local"] == 3
+
+    await agent.process_intent("apprendre python", {"niveau": "débutant"})
+    assert agent.calls == 2
+
+
+async def test_cached_result_is_a_copy(cache):
+    agent = FakeAgent()
+    result = await agent.process_intent("apprendre python")
+    result["analysis"] = "modifié"
+    assert (await agent.process_intent("apprendre python"))["analysis"] == "apprendre python"
+
+
+async def test_degraded_result_is_not_cached(cache):
+    agent = FakeAgent()
+    await agent.degraded("apprendre python")
+    await agent.degraded("apprendre python")
+    assert agent.calls == 2
+
+
+async def test_bypass(cache):
+    agent = FakeAgent()
+    token = cache_bypass.set(True)
+    try:
+        await agent.process_intent("apprendre python")
+        await agent.process_intent("apprendre python")
+    finally:
+        cache_bypass.reset(token)
+    assert agent.calls == 2
+    assert cache.stats["bypassed"] == 2
+
+
+async def test_model_routes_are_part_of_the_key(cache, monkeypatch):
+    from core import routing
+
+    agent = FakeAgent()
+    monkeypatch.setattr(routing, "_router", routing.ModelRouter(routes={}))
+    await agent.process_intent("apprendre python")
+
+    # Étape servie par une autre route : pas de réutilisation de la réponse
+    monkeypatch.setattr(routing, "_router", routing.ModelRouter(routes={"intent.draft": ["gpt-3.5-turbo", "gpt-4"]}))
+    await agent.process_intent("apprendre python")
+    assert agent.calls == 2
+    # Route d'un autre agent : même clé
+    monkeypatch.setattr(routing, "_router", routing.ModelRouter(routes={"intent.draft": ["gpt-3.5-turbo", "gpt-4"], "project": "gpt-4o"}))
+    await agent.process_intent("apprendre python")
+    assert agent.calls == 2
+
+
+def test_route_signature():
+    from core.routing import ModelRouter
+
+    router = ModelRouter(routes={"intent.draft": ["a", "b"], "intent": "c", "*": "d", "intentions": "e", "project.draft": "f"})
+    assert [name for name, _, _ in router.signature("intent")] == ["*", "intent", "intent.draft"]
+    assert cache_key("A", "m", "gpt", 0.1, {"x": 1}, []) == cache_key("A", "m", "gpt", 0.1, {"x": 1})
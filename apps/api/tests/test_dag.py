@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from core.dag import DagError, DagExecutor
+
+
+class FakeAgent:
+    """
+    Méthodes d'agent factices : chaque appel est journalisé, "plan" échoue sur demande
+    """
+
+    def __init__(self, fail_plan: bool = False, delay: float = 0.0):
+        self.fail_plan = fail_plan
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def _step(self, name: str, value):
+        self.calls.append(name)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return value
+
+    async def analyze(self, intent):
+        return await self._step("analyze", f"analyse({intent})")
+
+    async def plan(self, analysis):
+        if self.fail_plan:
+            raise RuntimeError("plan impossible")
+        return await self._step("plan", f"plan({analysis})")
+
+    async def research(self, intent):
+        return await self._step("research", f"recherche({intent})")
+
+    async def release(self, plan, research):
+        return await self._step("release", f"release({plan}, {research})")
+
+
+class FakeRegistry:
+    def __init__(self, agent: FakeAgent):
+        self.agent = agent
+
+    async def aget(self, agent_id: str):
+        return self.agent
+
+
+CATALOG = {
+    "analyze": ("intent_manager", {"intent": "intent"}),
+    "plan": ("project_manager", {"analysis": "analyze"}),
+    "research": ("technical_lead", {"intent": "intent"}),
+    "release": ("release_manager", {"plan": "plan", "research": "research"}),
+}
+
+
+def test_build_orders_ancestors_first():
+    nodes = DagExecutor(FakeRegistry(FakeAgent())).build(CATALOG, ["release"], ["intent"])
+    order = list(nodes)
+    assert set(order) == set(CATALOG)
+    assert order.index("analyze") < order.index("plan") < order.index("release")
+    assert order.index("research") < order.index("release")
+
+
+def test_build_only_needed_nodes():
+    nodes = DagExecutor(FakeRegistry(FakeAgent())).build(CATALOG, ["plan"], ["intent"])
+    assert list(nodes) == ["analyze", "plan"]
+
+
+@pytest.mark.parametrize("catalog, message", [
+    ({"a": ("agent", {"x": "missing"})}, "inconnu"),
+    ({"a": ("agent", {"x": "b"}), "b": ("agent", {"y": "a"})}, "Cycle"),
+])
+def test_build_rejects_invalid_graph(catalog, message):
+    with pytest.raises(DagError, match=message):
+        DagExecutor(FakeRegistry(FakeAgent())).build(catalog, ["a"], ["intent"])
+
+
+async def test_run_passes_outputs_to_dependents():
+    agent = FakeAgent()
+    executor = DagExecutor(FakeRegistry(agent), max_parallel=4)
+    events = []
+
+    async def on_node(name, status):
+        events.append((name, status))
+
+    outcome = await executor.run(executor.build(CATALOG, ["release"], ["intent"]), {"intent": "coder"}, on_node)
+
+    assert outcome["results"]["release"] == "release(plan(analyse(coder)), recherche(coder))"
+    assert set(outcome["statuses"].values()) == {"completed"}
+    assert outcome["errors"] == {}
+    assert set(outcome["durations"]) == set(CATALOG)
+    assert ("release", "running") in events and events[-1] == ("release", "completed")
+
+
+async def test_independent_branches_run_in_parallel_within_limit():
+    agent = FakeAgent(delay=0.02)
+    executor = DagExecutor(FakeRegistry(agent), max_parallel=1)
+    await executor.run(executor.build(CATALOG, ["release"], ["intent"]), {"intent": "coder"})
+    assert agent.max_active == 1
+
+    agent = FakeAgent(delay=0.02)
+    executor = DagExecutor(FakeRegistry(agent), max_parallel=4)
+    await executor.run(executor.build(CATALOG, ["release"], ["intent"]), {"intent": "coder"})
+    # analyze et research n'ont que l'intention en entrée : exécutés ensemble
+    assert agent.max_active == 2
+
+
+async def test_failure_skips_only_dependents():
+    executor = DagExecutor(FakeRegistry(FakeAgent(fail_plan=True)))
+    outcome = await executor.run(executor.build(CATALOG, ["release"], ["intent"]), {"intent": "coder"})
+
+    assert outcome["statuses"] == {"analyze": "completed", "plan": "failed", "research": "completed", "release": "skipped"}
+    assert outcome["errors"] == {"plan": "plan impossible"}
+    assert set(outcome["results"]) == {"analyze", "research"}
+
+
+async def test_cancellation_cancels_running_nodes():
+    agent = FakeAgent(delay=10)
+    executor = DagExecutor(FakeRegistry(agent))
+    task = asyncio.create_task(executor.run(executor.build(CATALOG, ["release"], ["intent"]), {"intent": "coder"}))
+    await asyncio.sleep(0.01)
+    assert agent.active == 2
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert agent.active == 0
+
+
+async def test_node_cancelled_from_inside_is_a_failure():
+    class CancellingAgent(FakeAgent):
+        async def research(self, intent):
+            # Ex. un délai interne qui annule la tâche du nœud
+            raise asyncio.CancelledError()
+
+    executor = DagExecutor(FakeRegistry(CancellingAgent()))
+    outcome = await executor.run(executor.build(CATALOG, ["release"], ["intent"]), {"intent": "coder"})
+
+    assert outcome["statuses"] == {"analyze": "completed", "plan": "completed", "research": "failed", "release": "skipped"}
+    assert outcome["errors"] == {"research": "Nœud annulé"}
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from core.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    current_deadline,
+    degrade_stage,
+    parse_deadline_header,
+    stage_degraded,
+    stage_remaining,
+    workflow_deadline,
+)
+
+STAGES = ["intent", "project", "technical", "release"]
+
+
+@pytest.fixture(autouse=True)
+def weights(monkeypatch):
+    monkeypatch.setenv("DEADLINE_STAGE_WEIGHTS", '{"intent": 1, "project": 1, "technical": 1, "release": 1}')
+    monkeypatch.setenv("DEADLINE_DEGRADE_RATIO", "0.5")
+    monkeypatch.setenv("DEADLINE_MIN_STAGE_SECONDS", "0.01")
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("30", 30.0),
+    ("0.5", 0.5),
+])
+def test_parse_duration(value, expected):
+    assert parse_deadline_header(value) == expected
+
+
+@pytest.mark.parametrize("scale", [1, 1000])
+def test_parse_epoch_deadline(scale):
+    budget = parse_deadline_header(str((time.time() + 20) * scale))
+    assert 19 < budget <= 20
+
+
+@pytest.mark.parametrize("value", [
+    "0",
+    "-5",
+    str(time.time() - 10),
+    str((time.time() - 10) * 1000),
+    "nan",
+    "inf",
+    "demain",
+])
+def test_parse_rejects_invalid_or_past_deadline(value):
+    with pytest.raises(ValueError):
+        parse_deadline_header(value)
+
+
+def test_allocation_follows_remaining_weights():
+    deadline = Deadline(8.0, STAGES)
+    assert deadline.allocate(["intent"]) == pytest.approx(2.0, abs=0.05)
+    assert deadline.allocate(["intent", "project"]) == pytest.approx(4.0, abs=0.05)
+    # Dernière étape : tout le temps restant
+    assert deadline.allocate(["release"]) == pytest.approx(8.0, abs=0.05)
+    assert deadline.nominal(["technical"]) == 2.0
+
+
+def test_stage_context_exposes_budget():
+    with workflow_deadline(8.0, STAGES) as deadline:
+        assert current_deadline() is deadline
+        with deadline.stage("intent") as budget:
+            assert budget == pytest.approx(2.0, abs=0.05)
+            assert 0 < stage_remaining() <= budget
+            assert not stage_degraded()
+        assert stage_remaining() is None
+    assert current_deadline() is None
+
+
+def test_late_stage_is_degraded(monkeypatch):
+    deadline = Deadline(8.0, STAGES)
+    # Trois quarts du budget consommés par la première étape
+    deadline.end -= 6.0
+    with deadline.stage("project"):
+        assert stage_degraded()
+    assert deadline.degraded == ["project"]
+
+
+def test_degrade_stage_marks_current_stage():
+    with workflow_deadline(8.0, STAGES) as deadline:
+        with deadline.stage("technical"):
+            degrade_stage()
+            degrade_stage()
+    assert deadline.degraded == ["technical"]
+
+
+def test_exhausted_budget_stops_stage():
+    deadline = Deadline(8.0, STAGES)
+    deadline.end = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with deadline.stage("release"):
+            pass
+
+
+def test_without_budget_nothing_is_active():
+    with workflow_deadline(None, STAGES) as deadline:
+        assert deadline is None
+        assert current_deadline() is None
+        assert stage_remaining() is None
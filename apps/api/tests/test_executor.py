@@ -0,0 +1,87 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from core.executor import CrewExecutor, CrewTimeoutError
+
+request_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_var", default="")
+
+
+@pytest.fixture
+def executor():
+    executor = CrewExecutor(max_workers=4, default_timeout=5, agent_concurrency=1)
+    yield executor
+    executor.shutdown()
+
+
+async def wait_until(predicate, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    end = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < end, "condition jamais atteinte"
+        await asyncio.sleep(0.005)
+
+
+async def test_runs_in_thread_with_request_context(executor):
+    request_var.set("req-1")
+    main_thread = threading.get_ident()
+
+    def work(value):
+        return value, request_var.get(), threading.get_ident() != main_thread
+
+    assert await executor.run(work, 42, agent_id="intent") == (42, "req-1", True)
+
+
+async def test_timed_out_call_keeps_its_slot_until_thread_ends(executor):
+    release = threading.Event()
+    started = []
+
+    def slow():
+        release.wait(5)
+        return "tard"
+
+    with pytest.raises(CrewTimeoutError):
+        await executor.run(slow, agent_id="intent", timeout=0.05)
+
+    second = asyncio.create_task(executor.run(lambda: started.append(1) or "ok", agent_id="intent"))
+    await asyncio.sleep(0.05)
+    # Le thread du premier appel tourne encore : la limite de l'agent est respectée
+    assert started == []
+    release.set()
+    assert await second == "ok"
+
+
+async def test_queued_call_cancelled_before_start_releases_slot():
+    executor = CrewExecutor(max_workers=1, default_timeout=5, agent_concurrency=2)
+    release = threading.Event()
+    ran = []
+    try:
+        blocker = asyncio.create_task(executor.run(lambda: release.wait(5), agent_id="technical"))
+        await asyncio.sleep(0.02)
+        # Pool saturé : le second appel attend dans la file du pool et expire avant de démarrer
+        with pytest.raises(CrewTimeoutError):
+            await executor.run(lambda: ran.append(1), agent_id="technical", timeout=0.05)
+        semaphore = executor._semaphore("technical")
+        await wait_until(lambda: semaphore._value == 1)
+        release.set()
+        await blocker
+        await wait_until(lambda: semaphore._value == 2)
+        assert ran == []
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+async def test_deadline_shortens_timeout(executor):
+    from core.deadline import workflow_deadline
+
+    release = threading.Event()
+    try:
+        with workflow_deadline(0.05, ["intent"]):
+            with pytest.raises(CrewTimeoutError) as error:
+                await executor.run(lambda: release.wait(5), agent_id="intent", timeout=10)
+        assert error.value.timeout <= 0.05
+    finally:
+        release.set()
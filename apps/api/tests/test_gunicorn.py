@@ -0,0 +1,51 @@
+import logging
+import os
+import runpy
+import types
+
+import pytest
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+@pytest.fixture
+def load_config(monkeypatch, tmp_path):
+    for key in ("WEB_CONCURRENCY", "WEB_MAX_WORKERS", "GUNICORN_ACCESS_LOG", "REDIS_URL"):
+        monkeypatch.delenv(key, raising=False)
+    # Posé avant le chargement : la configuration ne modifie pas l'environnement des tests
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path / "metrics"))
+
+    def load(**settings):
+        for key, value in settings.items():
+            monkeypatch.setenv(key, value)
+        return runpy.run_path(CONFIG)
+    return load
+
+
+def test_worker_count(load_config, monkeypatch):
+    monkeypatch.setattr("multiprocessing.cpu_count", lambda: 32)
+    assert load_config()["workers"] == 8
+    assert load_config(WEB_MAX_WORKERS="4")["workers"] == 4
+    assert load_config(WEB_CONCURRENCY="3")["workers"] == 3
+
+
+def test_production_settings(load_config):
+    config = load_config(GUNICORN_ACCESS_LOG="")
+    assert config["worker_class"] == "uvicorn.workers.UvicornWorker"
+    assert config["preload_app"] is False
+    assert config["accesslog"] is None
+
+
+def test_on_starting_resets_metrics_and_warns_without_redis(load_config, caplog):
+    config = load_config()
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(directory)
+    open(os.path.join(directory, "counter_1.db"), "w").close()
+
+    logger = logging.getLogger("test.gunicorn")
+    server = types.SimpleNamespace(cfg=types.SimpleNamespace(workers=2), log=logger)
+    with caplog.at_level(logging.WARNING, logger="test.gunicorn"):
+        config["on_starting"](server)
+
+    assert os.listdir(directory) == []
+    assert "sans REDIS_URL" in caplog.text
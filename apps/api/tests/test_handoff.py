@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from core.handoff import HandoffSerializer, _largest, _shorten, count_tokens, fit_to_budget
+
+ANALYSIS = {
+    "analysis": "L'utilisateur veut apprendre Python. Il débute. Il dispose de deux heures par semaine. Il vise un premier emploi.",
+    "category": "apprentissage",
+    "priority": "high",
+    "needs": ["bases du langage", "projets guidés", "préparation aux entretiens"],
+    "recommendations": ["commencer par les types", "écrire un petit script par semaine"],
+    "confidence": 0.9,
+    "internal_notes": "non transmis",
+}
+
+
+@pytest.fixture
+def serializer(monkeypatch):
+    monkeypatch.delenv("HANDOFF_FIELDS_PROJECT", raising=False)
+    monkeypatch.delenv("HANDOFF_BUDGET_PROJECT", raising=False)
+    monkeypatch.setenv("HANDOFF_MODE", "truncate")
+    return HandoffSerializer()
+
+
+def test_whitelist_keeps_stage_fields_in_priority_order(serializer):
+    digest = json.loads(serializer.digest("project", ANALYSIS))
+    assert "internal_notes" not in digest
+    assert set(digest) == set(ANALYSIS) - {"internal_notes"}
+
+
+def test_whitelist_from_env(serializer, monkeypatch):
+    monkeypatch.setenv("HANDOFF_FIELDS_PROJECT", "category, needs")
+    assert json.loads(serializer.digest("project", ANALYSIS)) == {"category": "apprentissage", "needs": ANALYSIS["needs"]}
+
+
+def test_unknown_stage_keeps_all_fields(serializer):
+    assert json.loads(serializer.digest("other", ANALYSIS)) == ANALYSIS
+
+
+def test_budget_is_respected_without_mutating_input(serializer, monkeypatch):
+    monkeypatch.setenv("HANDOFF_BUDGET_PROJECT", "30")
+    data = {**ANALYSIS, "needs": [f"besoin numéro {i}" for i in range(50)]}
+    before = json.dumps(data)
+
+    digest = serializer.digest("project", data)
+
+    assert count_tokens(digest) <= 30
+    parsed = json.loads(digest)
+    assert list(parsed)[0] == "analysis"
+    assert json.dumps(data) == before
+    stats = serializer.snapshot()["project"]
+    assert stats["calls"] == 1
+    assert stats["prompt_tokens"] < stats["raw_tokens"]
+
+
+def test_extract_mode_keeps_whole_sentences():
+    text = "Première phrase. Deuxième phrase. Troisième phrase. Quatrième phrase."
+    assert _shorten(text, "extract") == "Première phrase. Deuxième phrase. …"
+    # Une seule phrase : coupe par caractères
+    assert _shorten("Une seule longue phrase sans fin", "extract") == "Une seule longue…"
+
+    digest = fit_to_budget({"analysis": text * 10}, 20, mode="extract")
+    assert json.loads(digest)["analysis"].endswith(". …")
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("ab", None),
+    (["x"], None),
+    ({"a": "ab", "b": ["x"], "c": 3}, None),
+    ({"a": "abc", "b": ["x", "yy"]}, (10, ("b",))),
+])
+def test_largest_skips_values_that_cannot_shrink(data, expected):
+    assert _largest(data) == expected
+
+
+def test_last_resort_drops_whole_fields():
+    # Rien de réductible : les derniers champs sont retirés, le JSON reste valide
+    data = {f"champ_{i}": "ab" for i in range(40)}
+    digest = fit_to_budget(data, 10)
+    parsed = json.loads(digest)
+    assert 0 < len(parsed) < 40
+    assert list(parsed) == [f"champ_{i}" for i in range(len(parsed))]
+    assert count_tokens(digest) <= 10
+
+
+def test_unreducible_document_stays_valid_json():
+    digest = fit_to_budget({"a": ["x"]}, 1)
+    assert json.loads(digest) == {"a": ["x"]}
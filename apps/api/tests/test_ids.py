@@ -0,0 +1,59 @@
+import time
+
+from core import ids
+from core.ids import UlidGenerator, intent_hash, new_workflow_id, ulid_timestamp
+
+
+def test_workflow_id_format():
+    workflow_id = new_workflow_id()
+    assert workflow_id.startswith("wf_")
+    ulid = workflow_id[3:]
+    assert len(ulid) == 26
+    assert set(ulid) <= set(ids._ALPHABET)
+
+
+def test_ulids_are_strictly_ordered():
+    generator = UlidGenerator()
+    values = [generator.new() for _ in range(5000)]
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_same_millisecond_increments_random_part(monkeypatch):
+    generator = UlidGenerator()
+    monkeypatch.setattr(ids.time, "time_ns", lambda: 1_700_000_000_000 * 1_000_000)
+    first, second = generator.new(), generator.new()
+    assert first[:10] == second[:10]
+    assert second > first
+
+
+def test_clock_going_backwards_stays_monotonic(monkeypatch):
+    generator = UlidGenerator()
+    now = [1_700_000_000_000]
+    monkeypatch.setattr(ids.time, "time_ns", lambda: now[0] * 1_000_000)
+    first = generator.new()
+    now[0] -= 5000
+    assert generator.new() > first
+
+
+def test_random_overflow_moves_to_next_millisecond(monkeypatch):
+    generator = UlidGenerator()
+    monkeypatch.setattr(ids.time, "time_ns", lambda: 1_700_000_000_000 * 1_000_000)
+    monkeypatch.setattr(ids.os, "urandom", lambda size: b"\xff" * size)
+    first, second = generator.new(), generator.new()
+    assert round((ulid_timestamp(second) - ulid_timestamp(first)) * 1000) == 1
+    assert second > first
+
+
+def test_ulid_timestamp_roundtrip():
+    before = time.time()
+    workflow_id = new_workflow_id()
+    assert before - 0.001 <= ulid_timestamp(workflow_id) <= time.time()
+    assert ulid_timestamp(workflow_id.lower()) == ulid_timestamp(workflow_id)
+
+
+def test_intent_hash_is_stable_and_context_sensitive():
+    assert intent_hash("apprendre python") == intent_hash("apprendre python")
+    assert intent_hash("apprendre python", {"a": 1, "b": 2}) == intent_hash("apprendre python", {"b": 2, "a": 1})
+    assert intent_hash("apprendre python") != intent_hash("apprendre rust")
+    assert intent_hash("apprendre python", {"niveau": "débutant"}) != intent_hash("apprendre python")
@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+import pytest
+
+from core.jobs import InMemoryJobStore, JobManager, RedisJobStore, create_job_store
+from models import AgentResponse, UserIntent, WorkflowResult
+
+
+class FakePipeline:
+    """
+    Pipeline factice : étape intention puis étape projet ; échoue pour l'intention
+    "boom", reste bloqué sur l'étape projet tant que `release` n'est pas levé
+    """
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def run(self, user_intent, workflow_id=None, on_stage=None):
+        await on_stage("intent", "running", None)
+        await on_stage("intent", "completed", AgentResponse(agent_id="intent", response="analyse", confidence=0.9))
+        await on_stage("project", "running", None)
+        if user_intent.intent == "boom":
+            raise RuntimeError("échec du chef de projet")
+        await self.release.wait()
+        return WorkflowResult(
+            workflow_id=workflow_id,
+            status="partial",
+            results=[],
+            final_output=user_intent.intent,
+            skipped_stages=["technical", "release"]
+        )
+
+
+class FakeRedis:
+    """
+    Sous-ensemble de redis.asyncio : get/set avec expiration (horloge modifiable)
+    """
+
+    def __init__(self):
+        self.now = time.monotonic()
+        self.data = {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, self.now + ex if ex else None)
+
+    async def get(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and self.now >= expires:
+            del self.data[key]
+            return None
+        return value
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    import redis.asyncio
+
+    client = FakeRedis()
+    monkeypatch.setattr(redis.asyncio, "from_url", lambda url, **kwargs: client)
+    return client
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request, redis_client):
+    if request.param == "memory":
+        return InMemoryJobStore()
+    return RedisJobStore("redis://test:6379", ttl=60)
+
+
+async def wait_for_status(manager, workflow_id, *statuses):
+    for _ in range(200):
+        job = await manager.get(workflow_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.005)
+    raise AssertionError(f"statut {statuses} jamais atteint")
+
+
+async def test_submit_poll_result(store):
+    pipeline = FakePipeline()
+    pipeline.release.clear()
+    manager = JobManager(store, pipeline)
+
+    job = await manager.submit(UserIntent(intent="apprendre python"))
+    assert job["status"] == "pending"
+    assert set(job["stages"].values()) == {"pending"}
+
+    await wait_for_status(manager, job["workflow_id"], "running")
+    # Pipeline bloqué sur l'étape projet
+    await asyncio.sleep(0.01)
+    running = await manager.get(job["workflow_id"])
+    assert running["stages"]["intent"] == "completed"
+    assert running["stages"]["project"] == "running"
+    assert running["results"][0]["agent_id"] == "intent"
+
+    pipeline.release.set()
+    done = await wait_for_status(manager, job["workflow_id"], "partial")
+    assert done["result"]["final_output"] == "apprendre python"
+    assert done["stages"] == {"intent": "completed", "project": "running", "technical": "skipped", "release": "skipped"}
+
+
+async def test_failure_is_recorded(store):
+    manager = JobManager(store, FakePipeline())
+    job = await manager.submit(UserIntent(intent="boom"))
+
+    failed = await wait_for_status(manager, job["workflow_id"], "failed")
+    assert failed["error"] == "échec du chef de projet"
+    # L'étape en cours passe en échec, les suivantes restent en attente
+    assert failed["stages"] == {"intent": "completed", "project": "failed", "technical": "pending", "release": "pending"}
+
+
+async def test_shutdown_cancels_running_jobs(store):
+    pipeline = FakePipeline()
+    pipeline.release.clear()
+    manager = JobManager(store, pipeline)
+    job = await manager.submit(UserIntent(intent="apprendre python"))
+    await wait_for_status(manager, job["workflow_id"], "running")
+
+    await manager.shutdown()
+
+    assert (await manager.get(job["workflow_id"]))["status"] == "cancelled"
+    assert not manager._tasks
+
+
+async def test_unknown_job(store):
+    assert await store.get("wf_inconnu") is None
+    assert await store.update("wf_inconnu", status="running") is None
+
+
+async def test_redis_job_expires_after_ttl(redis_client):
+    store = RedisJobStore("redis://test:6379", ttl=60)
+    await store.save({"workflow_id": "wf_1", "status": "pending"})
+    assert (await store.get("wf_1"))["status"] == "pending"
+    assert "coachlibre:workflow:wf_1" in redis_client.data
+
+    redis_client.now += 61
+    assert await store.get("wf_1") is None
+
+
+async def test_memory_store_evicts_oldest_jobs():
+    store = InMemoryJobStore(max_jobs=2)
+    for index in range(3):
+        await store.save({"workflow_id": f"wf_{index}"})
+    assert await store.get("wf_0") is None
+    assert await store.get("wf_2") == {"workflow_id": "wf_2"}
+
+
+async def test_memory_store_returns_copies():
+    store = InMemoryJobStore()
+    job = {"workflow_id": "wf_1", "stages": {"intent": "pending"}}
+    await store.save(job)
+    job["stages"]["intent"] = "modifié"
+    (await store.get("wf_1"))["stages"]["intent"] = "modifié"
+    assert (await store.get("wf_1"))["stages"]["intent"] == "pending"
+
+
+@pytest.mark.parametrize("settings, expected", [
+    ({}, InMemoryJobStore),
+    ({"REDIS_URL": "redis://test:6379"}, RedisJobStore),
+    ({"REDIS_URL": "redis://test:6379", "JOB_STORE": "memory"}, InMemoryJobStore),
+    ({"JOB_STORE": "redis", "JOB_TTL_SECONDS": "120"}, RedisJobStore),
+])
+def test_create_job_store(monkeypatch, redis_client, settings, expected):
+    for key in ("REDIS_URL", "JOB_STORE", "JOB_TTL_SECONDS"):
+        monkeypatch.delenv(key, raising=False)
+    for key, value in settings.items():
+        monkeypatch.setenv(key, value)
+    store = create_job_store()
+    assert isinstance(store, expected)
+    if "JOB_TTL_SECONDS" in settings:
+        assert store.ttl == 120
@@ -0,0 +1,149 @@
+import threading
+import types
+
+import httpx
+import pytest
+
+from core import llm as llm_module
+from core.llm import LLMLimiter, LLMRegistry, LimitedTransport, TokenBucket
+
+
+class FakeClock:
+    """
+    Horloge de core.llm : time.sleep avance l'horloge au lieu d'attendre
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_module, "time", types.SimpleNamespace(monotonic=clock.monotonic, perf_counter=clock.perf_counter, sleep=clock.sleep))
+    return clock
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "1")
+    return LLMLimiter()
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate_per_minute=60)
+    bucket.acquire(60)
+    assert clock.sleeps == []
+
+    # Seau vide : 1 jeton par seconde
+    bucket.acquire(3)
+    assert clock.sleeps == [pytest.approx(3.0)]
+
+    clock.now += 10
+    bucket.acquire(10)
+    assert len(clock.sleeps) == 1
+
+
+def test_bucket_clamps_amount_to_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60)
+    # Demande supérieure à la capacité : servie dès que le seau est plein
+    bucket.acquire(1000)
+    assert clock.sleeps == []
+    bucket.acquire(1000)
+    assert sum(clock.sleeps) == pytest.approx(60.0)
+
+
+def test_slot_releases_semaphore_on_exception(limiter):
+    with pytest.raises(RuntimeError):
+        with limiter.slot(10):
+            assert limiter.semaphore._value == 0
+            raise RuntimeError("échec de la requête")
+    assert limiter.semaphore._value == 1
+
+
+def test_slot_release_is_idempotent(limiter):
+    with limiter.slot(10) as release:
+        release()
+        release()
+    assert limiter.semaphore._value == 1
+    # Le sémaphore borné lèverait ValueError sur une libération de trop
+    with limiter.slot(10) as release:
+        assert limiter.semaphore._value == 0
+        release()
+
+
+@pytest.fixture
+def transport(monkeypatch, limiter):
+    # Comme le vrai transport : corps non lu, exposé sous forme de flux
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", lambda self, request: httpx.Response(200, stream=httpx.ByteStream(b'{"ok": true}')))
+    return LimitedTransport(limiter)
+
+
+def test_streamed_response_holds_slot_until_closed(transport, limiter):
+    with httpx.Client(transport=transport) as client:
+        with client.stream("POST", "http://llm.test/v1/chat", content=b"prompt") as response:
+            # Corps pas encore lu : la place reste occupée
+            assert limiter.semaphore._value == 0
+            assert response.read() == b'{"ok": true}'
+        assert limiter.semaphore._value == 1
+
+        assert client.post("http://llm.test/v1/chat", content=b"prompt").json() == {"ok": True}
+        assert limiter.semaphore._value == 1
+
+
+def test_failed_request_releases_slot(monkeypatch, limiter):
+    def fail(self, request):
+        raise httpx.ConnectError("connexion refusée")
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", fail)
+
+    with pytest.raises(httpx.ConnectError):
+        LimitedTransport(limiter).handle_request(httpx.Request("POST", "http://llm.test/v1/chat"))
+    assert limiter.semaphore._value == 1
+
+
+def test_registry_shares_clients_per_key():
+    registry = LLMRegistry()
+    try:
+        llm = registry.get("gpt-4o", 0.1, "fake")
+        assert registry.get("gpt-4o", 0.1, "fake") is llm
+        assert registry.get("gpt-4o", 0.2, "fake") is not llm
+        assert registry.get("gpt-4o-mini", 0.1, "fake") is not llm
+        # Un client HTTP poolé par (fournisseur, modèle), quelle que soit la température
+        assert registry._http_client("openai", "gpt-4o") is registry._http_client("openai", "gpt-4o")
+        assert registry._http_client("openai", "gpt-4o") is not registry._http_client("openai", "gpt-4o-mini")
+        with pytest.raises(ValueError):
+            registry.get("gpt-4o", 0.1, "inconnu")
+    finally:
+        registry.close()
+
+
+def test_registry_builds_each_client_once_under_concurrency(monkeypatch):
+    registry = LLMRegistry()
+    built = []
+    build = registry._build
+
+    def counting_build(*args):
+        built.append(args)
+        return build(*args)
+    monkeypatch.setattr(registry, "_build", counting_build)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("gpt-4o", 0.1, "fake"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(result is results[0] for result in results)
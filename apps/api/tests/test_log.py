@@ -0,0 +1,74 @@
+import logging
+
+import pytest
+
+from core import log
+from core.log import LogContextMiddleware, LogSystem, debug_request
+
+
+def make_system(monkeypatch, **env) -> LogSystem:
+    for key in ("LOG_DEBUG_HEADER", "LOG_DEBUG_TOKEN"):
+        monkeypatch.delenv(key, raising=False)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    system = LogSystem()
+    monkeypatch.setattr(log, "_log_system", system)
+    return system
+
+
+async def call(headers):
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["debug"] = debug_request.get()
+        seen["level"] = logging.getLogger("coachlibre").getEffectiveLevel()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/health", "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]}
+    await LogContextMiddleware(app)(scope, None, send)
+    return seen, dict(sent[0]["headers"])
+
+
+@pytest.mark.parametrize("env", [
+    {},
+    {"LOG_DEBUG_HEADER": "true"},
+    {"LOG_DEBUG_TOKEN": "secret"},
+])
+async def test_debug_header_disabled_by_default_or_without_secret(monkeypatch, env):
+    system = make_system(monkeypatch, **env)
+    assert not system.debug_header
+    seen, _ = await call({"X-Debug": "true"})
+    assert seen["debug"] is False
+
+
+@pytest.mark.parametrize("value, expected", [("secret", True), ("true", False), ("secre", False), ("", False)])
+async def test_debug_header_requires_shared_secret(monkeypatch, value, expected):
+    make_system(monkeypatch, LOG_DEBUG_HEADER="true", LOG_DEBUG_TOKEN="secret")
+    seen, _ = await call({"X-Debug": value})
+    assert seen["debug"] is expected
+
+
+async def test_application_logger_at_debug_only_during_debug_requests(monkeypatch):
+    make_system(monkeypatch, LOG_DEBUG_HEADER="true", LOG_DEBUG_TOKEN="secret")
+    coachlibre = logging.getLogger("coachlibre")
+    monkeypatch.setattr(coachlibre, "level", logging.NOTSET)
+    monkeypatch.setattr(logging.getLogger(), "level", logging.INFO)
+
+    seen, _ = await call({})
+    assert seen["level"] == logging.INFO
+    seen, _ = await call({"X-Debug": "secret"})
+    assert seen["level"] == logging.DEBUG
+    assert coachlibre.getEffectiveLevel() == logging.INFO
+
+
+async def test_request_id_is_propagated(monkeypatch):
+    make_system(monkeypatch)
+    _, headers = await call({"X-Request-ID": "abc123"})
+    assert headers[b"x-request-id"] == b"abc123"
+    _, headers = await call({})
+    assert len(headers[b"x-request-id"]) == 16
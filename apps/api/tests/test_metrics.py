@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from core import metrics
+from core.metrics import ActivityTracker, SharedActivityTracker, instrumented
+
+
+class FakeAgent:
+    agent_id = "metrics_test"
+
+    @instrumented
+    async def succeed(self):
+        return "ok"
+
+    @instrumented
+    async def fail(self):
+        raise RuntimeError("échec")
+
+    @instrumented
+    async def wait(self):
+        await asyncio.sleep(10)
+
+
+def calls(stage: str, status: str) -> float:
+    return REGISTRY.get_sample_value(
+        "coachlibre_agent_calls_total", {"agent": "metrics_test", "stage": stage, "status": status}
+    ) or 0.0
+
+
+@pytest.fixture
+def activity(monkeypatch):
+    tracker = ActivityTracker()
+    monkeypatch.setattr(metrics, "_activity", tracker)
+    return tracker
+
+
+async def test_instrumented_records_success_error_and_cancellation(activity):
+    agent = FakeAgent()
+    before = {status: calls(stage, status) for stage, status in [("succeed", "success"), ("fail", "error"), ("wait", "cancelled")]}
+
+    assert await agent.succeed() == "ok"
+    with pytest.raises(RuntimeError):
+        await agent.fail()
+    task = asyncio.create_task(agent.wait())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert calls("succeed", "success") == before["success"] + 1
+    assert calls("fail", "error") == before["error"] + 1
+    assert calls("wait", "cancelled") == before["cancelled"] + 1
+    snapshot = activity.snapshot("metrics_test")
+    assert snapshot["calls"] == {"success": 1, "error": 1, "cancelled": 1}
+    assert snapshot["latency_seconds"]["window"] == 3
+    assert snapshot["last_activity"] is not None
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args):
+            self.commands.append((name, args))
+        return command
+
+    async def execute(self):
+        if self.redis.down:
+            raise ConnectionError("redis indisponible")
+        return [getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """
+    Sous-ensemble de redis.asyncio pour l'activité partagée (pipeline sans transaction)
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def set(self, key, value):
+        self.data[key] = str(value)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def lpush(self, key, value):
+        self.data.setdefault(key, []).insert(0, str(value))
+
+    def ltrim(self, key, start, end):
+        self.data[key] = self.data[key][start:end + 1]
+
+    def lrange(self, key, start, end):
+        return list(self.data.get(key, []))
+
+    def hincrby(self, key, field, amount):
+        counts = self.data.setdefault(key, {})
+        counts[field] = str(int(counts.get(field, 0)) + amount)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    import redis.asyncio
+
+    client = FakeRedis()
+    monkeypatch.setattr(redis.asyncio, "from_url", lambda url, **kwargs: client)
+    return client
+
+
+async def test_shared_tracker_aggregates_through_redis(redis_client):
+    tracker = SharedActivityTracker("redis://test:6379", window=2)
+    for duration in (0.1, 0.2, 0.3):
+        tracker.record("intent", duration, "success")
+    tracker.record("intent", 0.4, "error")
+    await asyncio.gather(*tracker._pending)
+
+    # Un autre worker lit la même activité
+    other = SharedActivityTracker("redis://test:6379")
+    snapshot = await other.asnapshot("intent")
+    assert snapshot["calls"] == {"success": 3, "error": 1, "cancelled": 0}
+    assert snapshot["latency_seconds"]["window"] == 2
+    assert snapshot["last_activity"] is not None
+
+
+async def test_shared_tracker_falls_back_to_local_activity(redis_client):
+    tracker = SharedActivityTracker("redis://test:6379")
+    redis_client.down = True
+    tracker.record("intent", 0.1, "success")
+    await asyncio.gather(*tracker._pending)
+
+    snapshot = await tracker.asnapshot("intent")
+    assert snapshot["calls"]["success"] == 1
+    assert redis_client.data == {}
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from core.persistence import SQLiteBackend, WorkflowStore
+
+
+@pytest.fixture
+def store_factory(tmp_path, monkeypatch):
+    # Intervalle long : seules la taille du lot ou la fermeture déclenchent l'écriture
+    monkeypatch.setenv("PERSIST_FLUSH_INTERVAL", "60")
+    monkeypatch.setenv("PERSIST_RECONNECT_SECONDS", "0.01")
+    path = str(tmp_path / "workflows.db")
+
+    def factory() -> WorkflowStore:
+        return WorkflowStore(SQLiteBackend(path))
+    return factory
+
+
+STAGES = [
+    {"stage": "intent_analysis", "agent_id": "intent_manager", "confidence": 0.9, "output": {"intent": "coaching"}, "duration": 0.25},
+    {"stage": "project_planning", "agent_id": "project_manager", "confidence": 0.8, "output": {"tasks": ["a", "b"]}, "duration": 0.5},
+    {"stage": "execution", "agent_id": "technical_lead", "confidence": None, "output": "fait", "duration": None},
+]
+
+
+async def test_record_workflow_with_stages(store_factory):
+    store = store_factory()
+    await store.start()
+    store.record_workflow("wf-1", "user-1", "apprendre python", "completed", final_output="ok", duration=1.5, stages=STAGES, intent_hash="h1")
+    await store.close()
+
+    store = store_factory()
+    await store.start()
+    workflow = await store.get_workflow("wf-1")
+    await store.close()
+
+    assert workflow["user_id"] == "user-1"
+    assert workflow["status"] == "completed"
+    assert workflow["intent_hash"] == "h1"
+    assert workflow["duration_ms"] == 1500
+    # Étapes dans l'ordre d'exécution, sorties JSON décodées
+    assert [stage["stage"] for stage in workflow["stages"]] == ["intent_analysis", "project_planning", "execution"]
+    assert workflow["stages"][0]["output"] == {"intent": "coaching"}
+    assert workflow["stages"][1]["duration_ms"] == 500
+    assert workflow["stages"][2]["output"] == "fait"
+
+
+async def test_rewrite_replaces_workflow_and_stages(store_factory):
+    store = store_factory()
+    await store.start()
+    store.record_workflow("wf-1", "user-1", "intent", "partial", stages=STAGES[:1])
+    store.record_workflow("wf-1", "user-1", "intent", "completed", stages=STAGES[:1])
+    await store.close()
+
+    store = store_factory()
+    await store.start()
+    workflow = await store.get_workflow("wf-1")
+    await store.close()
+    assert workflow["status"] == "completed"
+    assert len(workflow["stages"]) == 1
+
+
+async def test_list_workflows_by_user(store_factory):
+    store = store_factory()
+    await store.start()
+    for index in range(3):
+        store.record_workflow(f"wf-{index}", "user-1", f"intent {index}", "completed")
+        # created_at distincts : tri décroissant déterministe
+        await asyncio.sleep(0.002)
+    store.record_workflow("wf-other", "user-2", "autre", "failed", error="boom")
+    await store.close()
+
+    store = store_factory()
+    await store.start()
+    workflows = await store.list_workflows("user-1")
+    limited = await store.list_workflows("user-1", limit=2)
+    others = await store.list_workflows("user-2")
+    await store.close()
+
+    assert [w["workflow_id"] for w in workflows] == ["wf-2", "wf-1", "wf-0"]
+    assert [w["workflow_id"] for w in limited] == ["wf-2", "wf-1"]
+    assert [w["workflow_id"] for w in others] == ["wf-other"]
+    assert await store.list_workflows("user-3") == []
+
+
+async def test_close_flushes_buffer(store_factory):
+    store = store_factory()
+    await store.start()
+    store.record_workflow("wf-1", "user-1", "intent", "completed", stages=STAGES)
+    store.record_feedback("technical_lead", {"rating": 5}, workflow_id="wf-1", user_id="user-1")
+    # Laisse le flusher prendre la première ligne : le lot est en cours à la fermeture
+    await asyncio.sleep(0.01)
+    assert store.stats["written"] == 0
+    await store.close()
+
+    assert store.stats["written"] == 5
+    assert store.stats["dropped"] == 0
+    assert store.snapshot()["buffered"] == 0
+
+    store = store_factory()
+    await store.start()
+    feedback = await store.backend.fetch("SELECT agent_id, workflow_id FROM agent_feedback")
+    await store.close()
+    assert feedback == [{"agent_id": "technical_lead", "workflow_id": "wf-1"}]
+
+
+class FlakyBackend(SQLiteBackend):
+    def __init__(self, path: str, failures: int):
+        super().__init__(path)
+        self.failures = failures
+
+    async def connect(self) -> None:
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionRefusedError("base indisponible")
+        await super().connect()
+
+
+async def test_start_without_database_reconnects(store_factory, tmp_path):
+    path = str(tmp_path / "flaky.db")
+    store = WorkflowStore(FlakyBackend(path, failures=2))
+    await store.start()
+    assert not store.connected
+    assert await store.get_workflow("wf-1") is None
+    # Gardé dans le tampon jusqu'à la reconnexion
+    store.record_workflow("wf-1", "user-1", "intent", "completed")
+
+    for _ in range(100):
+        if store.connected:
+            break
+        await asyncio.sleep(0.01)
+    assert store.connected
+    assert store.stats["connect_errors"] == 2
+    await store.close()
+    assert store.stats["written"] == 1
+
+    store = WorkflowStore(SQLiteBackend(path))
+    await store.start()
+    assert (await store.get_workflow("wf-1"))["status"] == "completed"
+    await store.close()
+
+
+async def test_close_while_disconnected(tmp_path):
+    store = WorkflowStore(FlakyBackend(str(tmp_path / "down.db"), failures=1000))
+    await store.start()
+    store.record_workflow("wf-1", "user-1", "intent", "completed")
+    await store.close()
+    assert not store.connected
+    assert store.stats["written"] == 0
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core.registry import AgentRegistry
+
+
+class SlowAgent:
+    """
+    Construction lente et comptée (import de crewai, création des Agent CrewAI)
+    """
+
+    built = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        time.sleep(0.05)
+        with SlowAgent.lock:
+            SlowAgent.built += 1
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    SlowAgent.built = 0
+    registry = AgentRegistry(factories={"intent": ("tests", "SlowAgent"), "project": ("tests", "SlowAgent")})
+    monkeypatch.setattr(registry, "agent_class", lambda agent_id: SlowAgent)
+    return registry
+
+
+async def test_concurrent_aget_builds_once(registry):
+    agents = await asyncio.gather(*(registry.aget("intent") for _ in range(10)))
+    assert SlowAgent.built == 1
+    assert all(agent is agents[0] for agent in agents)
+    assert registry.status() == {"intent": True, "project": False}
+
+
+async def test_unknown_agent(registry):
+    assert "inconnu" not in registry
+    with pytest.raises(KeyError):
+        await registry.aget("inconnu")
+
+
+async def test_warm_up_builds_all_agents(registry):
+    await registry.warm_up()
+    assert registry.status() == {"intent": True, "project": True}
+    assert SlowAgent.built == 2
+
+
+async def test_aget_does_not_block_event_loop(registry):
+    ticks = []
+
+    async def build():
+        await registry.aget("intent")
+        return time.perf_counter()
+
+    async def ticker():
+        for _ in range(3):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    built_at, _ = await asyncio.gather(build(), ticker())
+    # La boucle tourne pendant la construction (50 ms) de l'agent
+    assert ticks[-1] < built_at
+
+
+@pytest.fixture
+def client(monkeypatch, registry):
+    monkeypatch.setattr(main, "agent_registry", registry)
+    return TestClient(main.app)
+
+
+def test_ready_returns_503_until_warm_up(client, registry, monkeypatch):
+    monkeypatch.setenv("AGENT_WARMUP", "true")
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "warming_up", "agents": {"intent": False, "project": False}}
+
+    asyncio.run(registry.warm_up())
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_ready_without_warm_up(client, monkeypatch):
+    monkeypatch.delenv("AGENT_WARMUP", raising=False)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["agents"] == {"intent": False, "project": False}
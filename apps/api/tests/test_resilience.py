@@ -0,0 +1,200 @@
+import time
+
+import pytest
+
+from core.resilience import CircuitBreaker, CircuitOpenError, LLMResilience, is_retryable
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def resilience(monkeypatch):
+    monkeypatch.setenv("LLM_RETRY_ATTEMPTS", "1")
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "1")
+    monkeypatch.setenv("LLM_BREAKER_RESET_SECONDS", "0.05")
+    monkeypatch.setenv("LLM_HEDGING", "false")
+    return LLMResilience()
+
+
+def fail(error: Exception):
+    def call():
+        raise error
+    return call
+
+
+@pytest.mark.parametrize("error, expected", [
+    (HTTPError(429), True),
+    (HTTPError(503), True),
+    (HTTPError(400), False),
+    (HTTPError(401), False),
+    (TimeoutError(), True),
+    (ConnectionError(), True),
+    (ValueError(), False),
+    (CircuitOpenError("m", 1.0), False),
+])
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker("test-threshold", failure_threshold=2, reset_timeout=0.05)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    # Un seul appel d'essai à la fois
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = CircuitBreaker("test-reopen", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+
+
+def test_retries_transient_errors(monkeypatch):
+    monkeypatch.setenv("LLM_RETRY_ATTEMPTS", "3")
+    monkeypatch.setenv("LLM_RETRY_BASE_DELAY", "0")
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "5")
+    resilience = LLMResilience()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TimeoutError()
+        return "ok"
+
+    assert resilience.call("test-retry", flaky) == "ok"
+    assert resilience.snapshot()["models"]["test-retry"]["retries"] == 2
+
+
+def test_non_retryable_error_on_half_open_probe_releases_circuit(resilience):
+    model = "test-probe"
+    # closed → open
+    with pytest.raises(CircuitOpenError):
+        resilience.call(model, fail(TimeoutError()))
+    assert resilience.breaker(model).state == "open"
+    with pytest.raises(CircuitOpenError):
+        resilience.call(model, lambda: "jamais appelé")
+
+    # open → half_open, l'essai échoue sur une erreur non transitoire
+    time.sleep(0.06)
+    with pytest.raises(HTTPError):
+        resilience.call(model, fail(HTTPError(400)))
+
+    # Le modèle a répondu : le circuit est refermé et les appels suivants passent
+    assert resilience.breaker(model).state == "closed"
+    assert resilience.call(model, lambda: "ok") == "ok"
+
+
+def test_interrupted_probe_is_released(resilience):
+    model = "test-interrupted"
+    with pytest.raises(CircuitOpenError):
+        resilience.call(model, fail(TimeoutError()))
+    time.sleep(0.06)
+
+    class Interrupted(BaseException):
+        pass
+
+    with pytest.raises(Interrupted):
+        resilience.call(model, fail(Interrupted()))
+    # L'essai interrompu ne bloque pas le suivant
+    assert resilience.call(model, lambda: "ok") == "ok"
+
+
+def test_call_admitted_while_closed_does_not_release_probe(resilience):
+    model = "test-stray"
+    breaker = resilience.breaker(model)
+
+    class Interrupted(BaseException):
+        pass
+
+    def stray():
+        # Pendant cet appel (admis circuit fermé), le circuit s'ouvre puis un essai démarre
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.before_call() is True
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        resilience.call(model, stray)
+    # L'essai en cours appartient à un autre appel : toujours un seul essai à la fois
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_retry_skipped_when_deadline_shorter_than_backoff(monkeypatch):
+    from core.deadline import workflow_deadline
+
+    monkeypatch.setenv("LLM_RETRY_ATTEMPTS", "3")
+    monkeypatch.setenv("LLM_RETRY_BASE_DELAY", "5")
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "5")
+    resilience = LLMResilience()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        raise TimeoutError()
+
+    start = time.monotonic()
+    with workflow_deadline(1, ["intent"]):
+        with pytest.raises(TimeoutError):
+            resilience.call("test-deadline", flaky)
+    assert attempts == [1]
+    assert time.monotonic() - start < 1
+    assert resilience.snapshot()["models"]["test-deadline"]["retries"] == 0
+
+
+def test_open_circuit_serves_schema_defaults_through_crew(resilience, monkeypatch):
+    from agents.templates import CrewTemplate, TaskTemplate
+    from core import resilience as resilience_module
+    from core import routing
+    from core.llm import LLMRegistry
+    from core.resilience import is_degraded, track_degraded
+    from core.structured import IntentAnalysis, extract_json
+
+    monkeypatch.setenv("FAKE_LLM_FAILURE_RATE_TEST_FALLBACK", "1")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS_TEST_FALLBACK", "0")
+    monkeypatch.delenv("MODEL_ROUTES", raising=False)
+    monkeypatch.setattr(resilience_module, "_resilience", resilience)
+    monkeypatch.setattr(routing, "_router", routing.ModelRouter())
+
+    crew = CrewTemplate(
+        LLMRegistry().get("test-fallback", 0.1, "fake"),
+        {"analyst": {"role": "Analyste", "goal": "Analyser", "backstory": "Analyste de test", "allow_delegation": False}},
+        [("analyst", TaskTemplate(description="Analyser : {intent}", expected_output="Une analyse"))],
+        route="intent.draft",
+        schema=IntentAnalysis
+    )
+    token = track_degraded()
+    try:
+        output = crew.kickoff(intent="apprendre python")
+        assert is_degraded()
+    finally:
+        resilience_module._degraded.reset(token)
+
+    data = extract_json(output)
+    assert data["confidence"] == 0.0
+    assert data["category"] == IntentAnalysis().category
+    assert "Réponse indisponible" in data["analysis"]
+    assert resilience.breaker("test-fallback").state == "open"
@@ -0,0 +1,166 @@
+import pytest
+from pydantic import BaseModel, Field
+
+from agents.templates import CrewTemplate, TaskTemplate
+from core import llm as llm_module
+from core import resilience as resilience_module
+from core.llm import get_llm
+from core.resilience import LLMResilience
+from core.routing import ModelRouter
+from core.structured import extract_json
+
+SMALL = "route-small"
+LARGE = "route-large"
+AGENTS = {
+    "analyst": {
+        "role": "Analyste",
+        "goal": "Analyser une intention",
+        "backstory": "Analyste de test",
+        "allow_delegation": False,
+    }
+}
+TASK = TaskTemplate(description="Analyser : {intent}", expected_output="Une analyse")
+
+
+class Summary(BaseModel):
+    # Résumé court : la sortie d'un modèle trop bavard ne respecte pas le schéma
+    summary: str = Field("", max_length=200)
+    confidence: float = Field(0.5, ge=0, le=1)
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """
+    Petit et grand modèles simulés (réglages FAKE_LLM_*_<MODÈLE>) ; chaque test part
+    d'un registre de clients et de disjoncteurs neufs
+    """
+    monkeypatch.setenv("FAKE_LLM_DISTRIBUTION", "fixed")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS_ROUTE_SMALL", "0")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS_ROUTE_LARGE", "50")
+    monkeypatch.setenv("FAKE_LLM_COMPLETION_TOKENS", "5")
+    monkeypatch.setenv("MODEL_COSTS", '{"route-small": 0.001, "route-large": 0.03}')
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "1")
+    monkeypatch.setenv("LLM_RETRY_ATTEMPTS", "1")
+    monkeypatch.setattr(llm_module, "_registry", llm_module.LLMRegistry())
+    monkeypatch.setattr(resilience_module, "_resilience", LLMResilience())
+
+    def configure(small_confidence: float, large_confidence: float = 0.9) -> None:
+        for model, confidence in (("ROUTE_SMALL", small_confidence), ("ROUTE_LARGE", large_confidence)):
+            monkeypatch.setenv(f"FAKE_LLM_MIN_CONFIDENCE_{model}", str(confidence))
+            monkeypatch.setenv(f"FAKE_LLM_MAX_CONFIDENCE_{model}", str(confidence))
+    return configure
+
+
+def router(min_confidence: float = 0.75) -> ModelRouter:
+    return ModelRouter(routes={"intent.draft": {"models": [SMALL, LARGE], "min_confidence": min_confidence}})
+
+
+def crew() -> CrewTemplate:
+    return CrewTemplate(get_llm(model=LARGE, temperature=0.1), AGENTS, [("analyst", TASK)], route="intent.draft", schema=Summary)
+
+
+def served_by(model_router: ModelRouter):
+    return model_router.snapshot()["routes"]["intent.draft"]["served_by"]
+
+
+@pytest.mark.parametrize("output, schema, expected", [
+    ('{"summary": "ok", "confidence": 0.9}', Summary, (True, "accepted", 0.9)),
+    ('{"summary": "ok", "confidence": 0.5}', Summary, (False, "low_confidence", 0.5)),
+    ("pas de JSON", Summary, (False, "invalid_schema", None)),
+    ('{"summary": "' + "x" * 300 + '"}', Summary, (False, "invalid_schema", None)),
+    # Sans schéma ni score annoncé : accepté
+    ("texte libre", None, (True, "accepted", None)),
+    ("Score de confiance : 0,4", None, (False, "low_confidence", 0.4)),
+])
+def test_accept(output, schema, expected):
+    assert ModelRouter(routes={}).accept(output, schema, 0.75) == expected
+
+
+def test_route_lookup_falls_back_to_agent_then_wildcard():
+    model_router = ModelRouter(routes={"intent.draft": [SMALL, LARGE], "intent": LARGE, "*": {"models": [SMALL], "min_confidence": 0.5}})
+    assert model_router.route_for("intent.draft").models == [SMALL, LARGE]
+    assert model_router.route_for("intent.validation").models == [LARGE]
+    assert model_router.route_for("project.draft").min_confidence == 0.5
+
+
+def test_confident_small_model_is_accepted(fake_models):
+    fake_models(small_confidence=0.9)
+    model_router = router()
+
+    output = model_router.kickoff(crew(), intent="apprendre python")
+
+    assert extract_json(output)["confidence"] == 0.9
+    assert served_by(model_router) == {SMALL: 1}
+    assert model_router.stats["intent.draft"]["escalations"] == {}
+
+
+def test_low_confidence_escalates(fake_models):
+    fake_models(small_confidence=0.4, large_confidence=0.95)
+    model_router = router()
+
+    output = model_router.kickoff(crew(), intent="apprendre python")
+
+    assert extract_json(output)["confidence"] == 0.95
+    assert served_by(model_router) == {LARGE: 1}
+    assert model_router.stats["intent.draft"]["escalations"] == {"low_confidence": 1}
+
+
+def test_schema_failure_escalates(fake_models, monkeypatch):
+    fake_models(small_confidence=0.9)
+    # Réponse du petit modèle trop longue pour le schéma
+    monkeypatch.setenv("FAKE_LLM_COMPLETION_TOKENS_ROUTE_SMALL", "100")
+    model_router = router()
+
+    model_router.kickoff(crew(), intent="apprendre python")
+
+    assert served_by(model_router) == {LARGE: 1}
+    assert model_router.stats["intent.draft"]["escalations"] == {"invalid_schema": 1}
+
+
+def test_open_breaker_skips_model(fake_models):
+    fake_models(small_confidence=0.9)
+    resilience_module.get_resilience().breaker(SMALL).record_failure()
+    model_router = router()
+
+    model_router.kickoff(crew(), intent="apprendre python")
+
+    assert served_by(model_router) == {LARGE: 1}
+    assert model_router.stats["intent.draft"]["escalations"] == {"circuit_open": 1}
+
+
+def test_all_breakers_open_serves_schema_defaults(fake_models):
+    fake_models(small_confidence=0.9)
+    for model in (SMALL, LARGE):
+        resilience_module.get_resilience().breaker(model).record_failure()
+    model_router = router()
+
+    data = extract_json(model_router.kickoff(crew(), intent="apprendre python"))
+
+    assert data["confidence"] == 0.0
+    assert data["summary"].startswith("Réponse indisponible")
+    assert served_by(model_router) == {}
+
+
+def test_saved_and_wasted_stats(fake_models):
+    fake_models(small_confidence=0.8, large_confidence=0.8)
+    model_router = router()
+    route = model_router.routes["intent.draft"]
+    template = crew()
+
+    # Seuil au-dessus de la confiance du petit modèle : essai perdu, grand modèle final
+    route.min_confidence = 0.9
+    model_router.kickoff(template, intent="apprendre python")
+    stats = model_router.stats["intent.draft"]
+    assert stats["served_by"] == {LARGE: 1}
+    assert stats["wasted_seconds"] >= 0
+    assert 0 < stats["wasted_cost"] < model_router.cost(LARGE, 1000)
+    assert stats["saved_cost"] == 0
+
+    # Petit modèle accepté : gain de coût et de latence par rapport au grand modèle
+    route.min_confidence = 0.75
+    model_router.kickoff(template, intent="apprendre rust")
+    assert stats["served_by"] == {LARGE: 1, SMALL: 1}
+    assert stats["saved_cost"] > 0
+    assert stats["saved_seconds"] > 0.03
+    latency = model_router.snapshot()["routes"]["intent.draft"]["latency_seconds"]
+    assert latency[LARGE] > latency[SMALL]
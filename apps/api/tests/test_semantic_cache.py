@@ -0,0 +1,115 @@
+import pytest
+
+from core import speculation
+from core.cache import cache_bypass
+from core.resilience import mark_degraded, track_degraded
+from core.semantic_cache import InMemoryVectorIndex, SemanticCache
+from core.speculation import SpeculativePipeline
+
+
+class FakeEmbeddings:
+    """
+    Embedding factice : une dimension par mot connu (paraphrases = même vecteur)
+    """
+
+    WORDS = ["python", "apprendre", "rust", "cuisine"]
+
+    async def aembed_query(self, text: str):
+        return [1.0 if word in text else 0.0 for word in self.WORDS] + [0.01]
+
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.delenv("SEMANTIC_CACHE_ENABLED", raising=False)
+    monkeypatch.delenv("QDRANT_URL", raising=False)
+    return monkeypatch
+
+
+@pytest.mark.parametrize("settings, index, expected", [
+    ({}, None, False),
+    ({"QDRANT_URL": "http://qdrant:6333"}, None, True),
+    ({}, InMemoryVectorIndex(), True),
+    ({"SEMANTIC_CACHE_ENABLED": "true"}, None, True),
+    ({"SEMANTIC_CACHE_ENABLED": "false", "QDRANT_URL": "http://qdrant:6333"}, None, False),
+])
+def test_enabled_only_with_configured_index(env, settings, index, expected):
+    for key, value in settings.items():
+        env.setenv(key, value)
+    assert SemanticCache(index=index).enabled is expected
+
+
+async def test_paraphrase_reuses_analysis(env):
+    cache = SemanticCache(index=InMemoryVectorIndex(), embeddings=FakeEmbeddings())
+    analysis, vector = await cache.lookup("Je veux apprendre python")
+    assert analysis is None
+    await cache.store(vector, None, {"analysis": "python"})
+
+    hit, _ = await cache.lookup("apprendre python, vite")
+    assert hit == {"analysis": "python"}
+    miss, _ = await cache.lookup("apprendre rust")
+    assert miss is None
+    # Contexte différent : analyses non comparables
+    other, _ = await cache.lookup("apprendre python", {"niveau": "expert"})
+    assert other is None
+    assert cache.stats["hits"] == 1
+
+
+async def test_bypass_skips_lookup(env):
+    cache = SemanticCache(index=InMemoryVectorIndex(), embeddings=FakeEmbeddings())
+    token = cache_bypass.set(True)
+    try:
+        assert await cache.lookup("apprendre python") == (None, None)
+    finally:
+        cache_bypass.reset(token)
+
+
+class FakeIntentManager:
+    agent_id = "intent"
+
+    def __init__(self, degraded: bool = False):
+        self.degraded = degraded
+        self.calls = []
+
+    async def draft_intent(self, intent, context=None):
+        track_degraded()
+        self.calls.append("draft")
+        if self.degraded:
+            mark_degraded("fallback")
+        return {"analysis": f"analyse {intent}"}
+
+    async def validate_intent(self, intent, draft):
+        track_degraded()
+        self.calls.append("validate")
+        return {"analysis": draft["analysis"]}
+
+
+class FakeProjectManager:
+    async def analyze_requirements(self, analysis):
+        return {"requirements": f"besoins de {analysis['analysis']}"}
+
+
+@pytest.fixture
+def semantic(env):
+    cache = SemanticCache(index=InMemoryVectorIndex(), embeddings=FakeEmbeddings())
+    env.setattr(speculation, "get_semantic_cache", lambda: cache)
+    return cache
+
+
+async def test_speculative_pipeline_uses_semantic_cache(semantic):
+    pipeline = SpeculativePipeline(enabled=True, threshold=0.2)
+    intent_manager = FakeIntentManager()
+
+    first = await pipeline.run(intent_manager, FakeProjectManager(), "apprendre python")
+    second = await pipeline.run(intent_manager, FakeProjectManager(), "apprendre python rapidement")
+
+    assert intent_manager.calls == ["draft", "validate"]
+    assert second == first
+    assert pipeline.stats["semantic_hits"] == 1
+    assert pipeline.stats["accepted"] == 1
+    assert semantic.stats["stores"] == 1
+
+
+async def test_degraded_draft_is_not_stored(semantic):
+    pipeline = SpeculativePipeline(enabled=True, threshold=0.2)
+    await pipeline.run(FakeIntentManager(degraded=True), FakeProjectManager(), "apprendre python")
+    assert semantic.stats["stores"] == 0
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from core import workflow
+from core.cache import cache_bypass
+from core.log import debug_request
+from core.singleflight import SingleFlight
+from core.workflow import WorkflowPipeline
+from models import UserIntent, WorkflowResult
+
+
+@pytest.fixture
+def flight(monkeypatch):
+    monkeypatch.delenv("SINGLEFLIGHT_REDIS_URL", raising=False)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("SINGLEFLIGHT_ENABLED", "true")
+    flight = SingleFlight()
+    monkeypatch.setattr(workflow, "get_single_flight", lambda: flight)
+    return flight
+
+
+async def test_concurrent_calls_share_one_computation(flight):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "résultat"
+
+    results = await asyncio.gather(*(flight.do("clé", compute) for _ in range(5)))
+    assert results == ["résultat"] * 5
+    assert len(calls) == 1
+    assert flight.stats["leader"] == 1
+    assert flight.stats["coalesced_local"] == 4
+    assert flight.snapshot()["inflight"] == 0
+
+
+async def test_distinct_keys_and_sequential_calls_recompute(flight):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    await asyncio.gather(flight.do("a", compute), flight.do("b", compute))
+    await flight.do("a", compute)
+    assert len(calls) == 3
+
+
+async def test_error_is_relayed_to_waiters(flight):
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*(flight.do("clé", compute) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+async def test_cancelled_caller_does_not_cancel_others(flight):
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    first = asyncio.create_task(flight.do("clé", compute))
+    second = asyncio.create_task(flight.do("clé", compute))
+    await asyncio.sleep(0.005)
+    first.cancel()
+    assert await second == "ok"
+
+
+async def test_disabled_runs_every_call(flight):
+    flight.enabled = False
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(flight.do("clé", compute) for _ in range(3)))
+    assert len(calls) == 3
+
+
+class FakePipeline(WorkflowPipeline):
+    """
+    Pipeline dont run() est factice : statut imposé, appels comptés
+    """
+
+    def __init__(self, status: str = "completed"):
+        super().__init__(registry=None)
+        self.status = status
+        self.runs = []
+
+    async def run(self, user_intent, workflow_id=None):
+        self.runs.append(workflow_id)
+        await asyncio.sleep(0.01)
+        return WorkflowResult(workflow_id=workflow_id, status=self.status, results=[], final_output="sortie")
+
+
+@pytest.fixture
+def store(monkeypatch):
+    recorded = []
+
+    class Store:
+        def record_workflow(self, workflow_id, *args, **kwargs):
+            recorded.append(workflow_id)
+    monkeypatch.setattr(workflow, "get_workflow_store", lambda: Store())
+    return recorded
+
+
+async def test_run_shared_coalesces_identical_intents(flight, store):
+    pipeline = FakePipeline()
+    intent = UserIntent(intent="apprendre python", user_id="u1")
+    results = await asyncio.gather(*(pipeline.run_shared(intent) for _ in range(3)))
+
+    assert len(pipeline.runs) == 1
+    # Chaque appelant garde son propre identifiant, enregistré pour les suiveurs
+    assert len({result.workflow_id for result in results}) == 3
+    assert len(store) == 2
+
+
+async def test_partial_result_is_not_shared(flight, store):
+    pipeline = FakePipeline(status="partial")
+    intent = UserIntent(intent="apprendre python")
+    results = await asyncio.gather(*(pipeline.run_shared(intent) for _ in range(3)))
+
+    assert len(pipeline.runs) == 3
+    # Les suiveurs ont recalculé sous leur propre identifiant
+    assert {result.workflow_id for result in results} == set(pipeline.runs)
+    assert store == []
+
+
+@pytest.mark.parametrize("setup", [
+    lambda: UserIntent(intent="apprendre python", timeout=5),
+    lambda: (cache_bypass.set(True), UserIntent(intent="apprendre python"))[1],
+    lambda: (debug_request.set(True), UserIntent(intent="apprendre python"))[1],
+])
+async def test_requests_with_own_conditions_are_not_coalesced(flight, store, setup):
+    pipeline = FakePipeline()
+    leader = asyncio.create_task(pipeline.run_shared(UserIntent(intent="apprendre python")))
+    await asyncio.sleep(0)
+
+    async def own():
+        # Contexte propre à la tâche : X-Cache-Bypass ou X-Debug de cette seule requête
+        return await pipeline.run_shared(setup())
+
+    await asyncio.gather(leader, asyncio.create_task(own()))
+    assert len(pipeline.runs) == 2
+    assert flight.stats["coalesced_local"] == 0
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from core import speculation, supervision
+from core.deadline import workflow_deadline
+from core.semantic_cache import SemanticCache
+from core.speculation import SpeculativePipeline
+from core.supervision import SupervisorPolicy, diff_ratio
+
+DRAFT = "a b c d e f g h i j"
+# Deux mots sur dix modifiés : diff_ratio = 0.2
+VALIDATED = "a b c d e f g h x y"
+
+
+class FakeIntentManager:
+    agent_id = "intent"
+
+    def __init__(self, confidence: float = 0.5, validated: str = VALIDATED):
+        self.confidence = confidence
+        self.validated = validated
+        self.calls = []
+
+    async def draft_intent(self, intent, context=None):
+        self.calls.append("draft")
+        return {"analysis": DRAFT, "confidence": self.confidence}
+
+    async def validate_intent(self, intent, draft):
+        self.calls.append("validate")
+        await asyncio.sleep(0.02)
+        return {"analysis": self.validated, "confidence": 0.9}
+
+
+class FakeProjectManager:
+    """
+    Analyse des besoins lente sur le brouillon : toujours en cours à la fin de la validation
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.inputs = []
+        self.cancelled = []
+
+    async def analyze_requirements(self, analysis):
+        self.inputs.append(analysis["analysis"])
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(analysis["analysis"])
+            raise
+        return {"requirements": f"besoins de {analysis['analysis']}"}
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.delenv("SEMANTIC_CACHE_ENABLED", raising=False)
+    monkeypatch.delenv("QDRANT_URL", raising=False)
+    monkeypatch.setenv("SUPERVISION_SAMPLE_RATE", "0")
+    monkeypatch.setenv("SUPERVISION_THRESHOLD", "0.85")
+    monkeypatch.setattr(speculation, "get_semantic_cache", lambda: SemanticCache())
+    policy = SupervisorPolicy(enabled=True, seed=1)
+    monkeypatch.setattr(supervision, "_policy", policy)
+    return policy
+
+
+def test_diff_ratio_of_fixture():
+    assert diff_ratio(DRAFT, VALIDATED) == pytest.approx(0.2)
+
+
+@pytest.mark.parametrize("threshold, result", [(0.2, "accepted"), (0.19, "rejected")])
+async def test_speculation_threshold(policy, threshold, result):
+    pipeline = SpeculativePipeline(enabled=True, threshold=threshold)
+    project_manager = FakeProjectManager()
+
+    analysis, requirements = await pipeline.run(FakeIntentManager(), project_manager, "apprendre python")
+
+    assert analysis["analysis"] == VALIDATED
+    assert pipeline.stats[result] == 1
+    if result == "accepted":
+        # Résultat spéculatif conservé : l'étape projet n'est pas relancée
+        assert project_manager.inputs == [DRAFT]
+        assert requirements == {"requirements": f"besoins de {DRAFT}"}
+    else:
+        assert project_manager.inputs == [DRAFT, VALIDATED]
+        assert requirements == {"requirements": f"besoins de {VALIDATED}"}
+    # La validation alimente la politique du superviseur
+    assert policy.expected_validation("intent") > 0
+
+
+async def test_rejection_cancels_speculative_task(policy):
+    pipeline = SpeculativePipeline(enabled=True, threshold=0.1)
+    project_manager = FakeProjectManager(delay=0.5)
+    intent_manager = FakeIntentManager()
+
+    task = asyncio.create_task(pipeline.run(intent_manager, project_manager, "apprendre python"))
+    await asyncio.sleep(0.05)
+    # Validation terminée et rejetée : la spéculation est annulée, la relance attend
+    assert project_manager.cancelled == [DRAFT]
+    assert pipeline.stats["rejected"] == 1
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+async def test_confident_draft_skips_validation(policy):
+    pipeline = SpeculativePipeline(enabled=True, threshold=0.2)
+    project_manager = FakeProjectManager()
+    intent_manager = FakeIntentManager(confidence=0.95)
+
+    analysis, _ = await pipeline.run(intent_manager, project_manager, "apprendre python")
+
+    assert intent_manager.calls == ["draft"]
+    assert analysis["analysis"] == DRAFT
+    assert project_manager.inputs == [DRAFT]
+    assert pipeline.stats["unvalidated"] == 1
+    assert policy.stats["intent"]["reasons"] == {"high_confidence": 1}
+
+
+async def test_degraded_stage_skips_validation(policy, monkeypatch):
+    monkeypatch.setenv("DEADLINE_DEGRADE_RATIO", "2")
+    monkeypatch.setenv("DEADLINE_MIN_STAGE_SECONDS", "0")
+    pipeline = SpeculativePipeline(enabled=True, threshold=0.2)
+    intent_manager = FakeIntentManager()
+
+    with workflow_deadline(10, ["intent", "project"]) as deadline:
+        with deadline.stage("intent", "project"):
+            analysis, _ = await pipeline.run(intent_manager, FakeProjectManager(), "apprendre python")
+
+    assert intent_manager.calls == ["draft"]
+    assert analysis["analysis"] == DRAFT
+    assert pipeline.stats["unvalidated"] == 1
+    # Aucune décision de la politique : la passe est sautée pour le budget
+    assert "intent" not in policy.stats
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core.streaming import stream_workflow, token_sink
+from models import AgentResponse, UserIntent, WorkflowResult
+
+
+def parse_sse(text: str):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class FakePipeline:
+    """
+    Pipeline factice : une étape, tokens relayés comme par le handler LangChain ;
+    échoue pour l'intention "boom", reste bloqué si `block` est vrai
+    """
+
+    def __init__(self, block: bool = False):
+        self.block = block
+        self.cancelled = asyncio.Event()
+
+    async def run(self, user_intent, on_stage=None):
+        await on_stage("intent", "running", None)
+        sink = token_sink.get()
+        if sink is not None:
+            for chunk in ['Final Answer: {"category": "appren', 'tissage", "nee', 'ds": ["bases"]}']:
+                sink(chunk)
+                await asyncio.sleep(0)
+        if user_intent.intent == "boom":
+            raise RuntimeError("agent indisponible")
+        if self.block:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled.set()
+                raise
+        response = AgentResponse(agent_id="intent", response="analyse", confidence=0.9)
+        await on_stage("intent", "completed", response)
+        return WorkflowResult(workflow_id="wf_1", status="completed", results=[response], final_output="analyse")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("FAKE_LLM_JITTER_MS", "0")
+    return TestClient(main.app)
+
+
+def test_stream_event_order_with_fake_llm(client):
+    response = client.post("/workflow/stream", json={"intent": "apprendre le streaming"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names == ["stage_started", "stage"] * 4 + ["result"]
+    stages = [data["stage"] for name, data in events if name == "stage_started"]
+    assert stages == ["intent", "project", "technical", "release"]
+    assert [data["agent_id"] for name, data in events if name == "stage"] == ["intent_manager", "project_manager", "technical_lead", "release_manager"]
+    assert events[-1][1]["status"] == "completed"
+
+
+def test_stream_error_event(client, monkeypatch):
+    monkeypatch.setattr(main, "pipeline", FakePipeline())
+    events = parse_sse(client.post("/workflow/stream", json={"intent": "boom"}).text)
+    assert events == [
+        ("stage_started", {"stage": "intent"}),
+        ("error", {"detail": "Erreur dans le workflow: agent indisponible"}),
+    ]
+
+
+async def test_tokens_and_fields():
+    events = [item async for item in stream_workflow(FakePipeline(), UserIntent(intent="apprendre"), tokens=True)]
+    events = parse_sse("".join(events))
+
+    assert [name for name, _ in events] == ["stage_started", "token", "token", "field", "token", "field", "stage", "result"]
+    fields = [(data["name"], data["value"]) for name, data in events if name == "field"]
+    assert fields == [("category", "apprentissage"), ("needs", ["bases"])]
+    assert all(data["stage"] == "intent" for name, data in events if name in ("token", "field"))
+
+
+async def test_disconnect_cancels_workflow():
+    pipeline = FakePipeline(block=True)
+    stream = stream_workflow(pipeline, UserIntent(intent="apprendre"))
+    assert (await stream.__anext__()).startswith("event: stage_started")
+
+    # Client déconnecté : StreamingResponse ferme le générateur
+    await stream.aclose()
+    await asyncio.wait_for(pipeline.cancelled.wait(), 1)
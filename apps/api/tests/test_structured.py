@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from core.structured import IncrementalJSONParser, IntentAnalysis, extract_json, parse_output, repair_json
+
+
+@pytest.mark.parametrize("raw, expected", [
+    # Déjà valide
+    ('{"a": 1}', {"a": 1}),
+    # Texte et bloc de code autour
+    ('Voici :\n```json\n{"a": 1}\n```\nFin.', {"a": 1}),
+    # Virgules finales
+    ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}),
+    # Littéraux Python
+    ("{'ok': True, 'ko': False, 'rien': None}", {"ok": True, "ko": False, "rien": None}),
+    # Guillemets simples et échappement \' invalide en JSON
+    ("{'a': 'l\\'ami'}", {"a": "l'ami"}),
+    # Apostrophe non échappée dans une chaîne entre guillemets simples
+    ("{'a': 'l'ami', 'b': 1}", {"a": "l'ami", "b": 1}),
+    # Guillemets intérieurs non échappés
+    ('{"texte": "il a dit "bonjour""}', {"texte": 'il a dit "bonjour"'}),
+    ('{"texte": "il a dit "oui", puis "non"", "n": 2}', {"texte": 'il a dit "oui", puis "non"', "n": 2}),
+    ('{"a": ["x "y" z", "w"]}', {"a": ['x "y" z', "w"]}),
+    # Échappement inconnu conservé littéralement
+    ('{"chemin": "C:\\dossier"}', {"chemin": "C:\\dossier"}),
+    # Saut de ligne brut dans une chaîne
+    ('{"a": "ligne 1\nligne 2"}', {"a": "ligne 1\nligne 2"}),
+    # Guillemets typographiques
+    ('{“a”: «b»}', {"a": "b"}),
+    # Sorties tronquées
+    ('{"ok": tru', {"ok": True}),
+    ('{"ok": fa', {"ok": False}),
+    ('{"a": [1, n', {"a": [1, None]}),
+    ('{"a": "début', {"a": "début"}),
+    ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+    ('{"a": 1,', {"a": 1}),
+])
+def test_repair_json(raw, expected):
+    assert json.loads(repair_json(raw)) == expected
+
+
+def test_repair_json_stops_at_first_object():
+    assert json.loads(repair_json('{"a": 1} puis {"b": 2}')) == {"a": 1}
+
+
+@pytest.mark.parametrize("output, expected", [
+    ({"a": 1}, {"a": 1}),
+    ("pas de json", None),
+    ('[1, 2]', None),
+    ('analyse : {"a": 1} fin', {"a": 1}),
+    ("analyse : {'a': 'l\\'ami'}", {"a": "l'ami"}),
+])
+def test_extract_json(output, expected):
+    assert extract_json(output) == expected
+
+
+def test_parse_output_keeps_valid_fields_only():
+    output = '{"analysis": "Apprendre Python", "confidence": 7, "needs": ["cours"], "priority": "high"}'
+    result = parse_output(IntentAnalysis, output)
+    assert result["analysis"] == "Apprendre Python"
+    # Confiance hors bornes : valeur par défaut
+    assert result["confidence"] == 0.5
+    assert result["needs"] == ["cours"]
+    assert result["priority"] == "high"
+
+
+def test_parse_output_falls_back_to_raw_text():
+    result = parse_output(IntentAnalysis, "Réponse libre sans JSON")
+    assert result["analysis"] == "Réponse libre sans JSON"
+    assert result["category"] == "unknown"
+
+
+def test_incremental_parser_emits_completed_fields():
+    parser = IncrementalJSONParser()
+    chunks = ['Pensée... {"analysis": "Appr', 'endre", "needs": ["a", ', '"b"], "confidence": 0.', "8}"]
+    emitted = [parser.feed(chunk) for chunk in chunks]
+    assert emitted == [{}, {"analysis": "Apprendre"}, {"needs": ["a", "b"]}, {"confidence": 0.8}]
+    assert parser.fields == {"analysis": "Apprendre", "needs": ["a", "b"], "confidence": 0.8}
@@ -0,0 +1,173 @@
+import pytest
+
+from core import supervision
+from core.deadline import workflow_deadline
+from core.resilience import _degraded, is_degraded, track_degraded
+from core.supervision import SupervisorPolicy, extract_confidence, supervised_kickoff
+
+
+class StubCrew:
+    """
+    Crew factice : retourne une sortie fixe et journalise les paramètres reçus
+    """
+
+    def __init__(self, output: str):
+        self.output = output
+        self.calls = []
+
+    def kickoff(self, **params):
+        self.calls.append(params)
+        return self.output
+
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setenv("SUPERVISION_THRESHOLD", "0.85")
+    monkeypatch.setenv("SUPERVISION_SAMPLE_RATE", "0")
+    monkeypatch.setenv("SUPERVISION_MAX_SKIP_RATE", "1.1")
+    monkeypatch.setenv("SUPERVISION_DIFF_THRESHOLD", "0.1")
+    monkeypatch.setenv("SUPERVISION_WINDOW", "100")
+    return monkeypatch
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"confidence": 0.9, "analysis": "..."}', 0.9),
+    ('{"confidence": "0.75"}', 0.75),
+    ("Score de confiance : 0,85", 0.85),
+    ("La confiance est de 0.7", 0.7),
+    ("CONFIDENCE=1", 1.0),
+    ("confidence: 1.5", 1.0),
+    ("Aucun score annoncé", None),
+])
+def test_extract_confidence(text, expected):
+    assert extract_confidence(text) == expected
+
+
+def test_disabled_policy_always_validates(env):
+    policy = SupervisorPolicy(enabled=False, seed=1)
+    assert policy.decide("intent", 0.99).reason == "disabled"
+
+
+@pytest.mark.parametrize("confidence, validate, reason", [
+    (None, True, "no_confidence"),
+    (0.5, True, "low_confidence"),
+    (0.84, True, "low_confidence"),
+    (0.85, False, "high_confidence"),
+    (0.99, False, "high_confidence"),
+])
+def test_confidence_threshold(env, confidence, validate, reason):
+    decision = SupervisorPolicy(enabled=True, seed=1).decide("intent", confidence)
+    assert (decision.validate, decision.reason) == (validate, reason)
+
+
+def test_threshold_per_agent(env):
+    env.setenv("SUPERVISION_THRESHOLD_RELEASE", "0.95")
+    policy = SupervisorPolicy(enabled=True, seed=1)
+    assert not policy.decide("intent", 0.9).validate
+    assert policy.decide("release", 0.9).reason == "low_confidence"
+
+
+def test_sample_rate(env):
+    env.setenv("SUPERVISION_SAMPLE_RATE", "0.3")
+    policy = SupervisorPolicy(enabled=True, seed=42)
+    reasons = [policy.decide("intent", 0.95).reason for _ in range(1000)]
+    assert set(reasons) == {"sampled", "high_confidence"}
+    assert 250 < reasons.count("sampled") < 350
+    # Même graine, mêmes décisions
+    replay = SupervisorPolicy(enabled=True, seed=42)
+    assert [replay.decide("intent", 0.95).reason for _ in range(1000)] == reasons
+
+
+def test_consecutive_skips_are_capped(env):
+    env.setenv("SUPERVISION_MAX_SKIP_RATE", "0.5")
+    env.setenv("SUPERVISION_WINDOW", "4")
+    policy = SupervisorPolicy(enabled=True, seed=1)
+    reasons = [policy.decide("intent", 0.95).reason for _ in range(6)]
+    assert reasons == ["high_confidence", "skip_rate_cap", "skip_rate_cap", "high_confidence", "skip_rate_cap", "high_confidence"]
+    # Fenêtre par agent
+    assert policy.decide("project", 0.95).reason == "high_confidence"
+    assert policy.snapshot()["agents"]["intent"]["skip_rate"] == 0.5
+
+
+def test_pattern_memory(env):
+    policy = SupervisorPolicy(enabled=True, seed=1)
+    decision = policy.decide("intent", 0.5, "motif")
+    assert decision.validate
+
+    # Brouillon approuvé quasiment tel quel : l'entrée est mémorisée
+    policy.record_validation("intent", decision, 2.0, changed=0.05, pattern="motif")
+    cached = policy.decide("intent", None, "motif")
+    assert (cached.validate, cached.reason) == (False, "cached_pattern")
+    assert policy.stats["intent"]["estimated_saved_seconds"] == 2.0
+
+    # Brouillon corrigé : l'entrée est oubliée
+    policy.record_validation("intent", decision, 2.0, changed=0.5, pattern="motif")
+    assert policy.decide("intent", None, "motif").reason == "no_confidence"
+
+
+def test_sampled_validation_measures_quality_risk(env):
+    env.setenv("SUPERVISION_SAMPLE_RATE", "1")
+    policy = SupervisorPolicy(enabled=True, seed=1)
+    decision = policy.decide("intent", 0.95)
+    assert decision.reason == "sampled"
+    policy.record_validation("intent", decision, 1.0, changed=0.5)
+    policy.record_validation("intent", decision, 1.0, changed=0.0)
+    assert policy.snapshot()["agents"]["intent"]["quality_risk"] == 0.5
+
+
+@pytest.fixture
+def crews():
+    return {
+        "crew": StubCrew("analyse complète"),
+        "draft_crew": StubCrew('{"analysis": "brouillon", "confidence": 0.95}'),
+        "validation_crew": StubCrew('{"analysis": "validé", "confidence": 0.99}'),
+    }
+
+
+def use_policy(env, policy: SupervisorPolicy) -> SupervisorPolicy:
+    env.setattr(supervision, "_policy", policy)
+    return policy
+
+
+async def test_kickoff_without_policy_runs_full_crew(env, crews):
+    use_policy(env, SupervisorPolicy(enabled=False, seed=1))
+    assert await supervised_kickoff("intent", **crews, intent="apprendre python") == "analyse complète"
+    assert crews["crew"].calls == [{"intent": "apprendre python"}]
+    assert crews["draft_crew"].calls == crews["validation_crew"].calls == []
+
+
+async def test_kickoff_skips_validation_of_confident_draft(env, crews):
+    policy = use_policy(env, SupervisorPolicy(enabled=True, seed=1))
+    draft = await supervised_kickoff("intent", **crews, intent="apprendre python")
+    assert draft == crews["draft_crew"].output
+    assert crews["validation_crew"].calls == []
+    assert policy.stats["intent"]["reasons"] == {"high_confidence": 1}
+
+
+async def test_kickoff_validates_low_confidence_draft(env, crews):
+    env.setenv("SUPERVISION_THRESHOLD", "0.99")
+    policy = use_policy(env, SupervisorPolicy(enabled=True, seed=1))
+    validated = await supervised_kickoff(
+        "intent", **crews, validation_params={"intent": "apprendre python"}, intent="apprendre python"
+    )
+    assert validated == crews["validation_crew"].output
+    assert crews["validation_crew"].calls == [{"draft": crews["draft_crew"].output, "intent": "apprendre python"}]
+    assert policy.expected_validation("intent") > 0
+
+
+async def test_degraded_stage_runs_draft_only(env, crews):
+    env.setenv("DEADLINE_DEGRADE_RATIO", "2")
+    env.setenv("DEADLINE_MIN_STAGE_SECONDS", "0")
+    # Politique désactivée : le mode dégradé prime quand même
+    use_policy(env, SupervisorPolicy(enabled=False, seed=1))
+    token = track_degraded()
+    try:
+        with workflow_deadline(10, ["intent"]) as deadline:
+            with deadline.stage("intent"):
+                draft = await supervised_kickoff("intent", **crews, intent="apprendre python")
+        assert is_degraded()
+    finally:
+        _degraded.reset(token)
+    assert draft == crews["draft_crew"].output
+    assert crews["crew"].calls == crews["validation_crew"].calls == []
+    assert deadline.degraded == ["intent"]
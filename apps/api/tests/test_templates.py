@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+
+from agents.templates import CrewTemplate, TaskTemplate, route_crews
+from core.llm import get_llm
+
+AGENTS = {
+    "analyst": {
+        "role": "Analyste",
+        "goal": "Analyser une intention",
+        "backstory": "Analyste de test",
+        "allow_delegation": False,
+    }
+}
+TASK = TaskTemplate(description="Analyser : {intent}", expected_output="Une analyse")
+
+
+class Analysis(BaseModel):
+    summary: str
+
+
+class FakeAgent:
+    agent_id = "intent"
+
+    def __init__(self):
+        self.draft_crew = CrewTemplate(get_llm(model="gpt-4o", temperature=0.1), AGENTS, [("analyst", TASK)])
+
+
+def test_task_template_render():
+    assert TASK.fields == {"intent"}
+    assert TASK.render(intent="apprendre python") == "Analyser : apprendre python"
+
+
+def test_model_variant_keeps_route_and_schema():
+    agent = FakeAgent()
+    route_crews(agent, {"draft": Analysis})
+    crew = agent.draft_crew
+    assert crew.route == "intent.draft"
+
+    variant = crew.for_model("gpt-4o-mini")
+    assert variant is not crew
+    assert variant.llm.model_name == "gpt-4o-mini"
+    assert variant.llm.temperature == crew.llm.temperature
+    assert variant.route == "intent.draft"
+    assert variant.schema is Analysis
+    # Variante construite une seule fois, modèle courant sans variante
+    assert crew.for_model("gpt-4o-mini") is variant
+    assert crew.for_model(crew.llm.model_name) is crew
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from core.tracing import Span, SpanExporter
+
+
+@pytest.fixture
+def env(monkeypatch):
+    for key in ("TRACE_FILE", "TRACE_OTLP_ENDPOINT", "TRACE_FILE_MAX_BYTES"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("TRACE_FLUSH_INTERVAL", "0.01")
+    return monkeypatch
+
+
+def span(name: str = "workflow") -> Span:
+    result = Span(name, "0" * 32, None, True, 1, {"route": "intent"})
+    result.end_ns = result.start_ns + 1000
+    return result
+
+
+def test_no_file_without_configuration(env, tmp_path):
+    env.chdir(tmp_path)
+    exporter = SpanExporter("test")
+    exporter.export(span())
+    exporter.close()
+    assert exporter.path is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_file_export_when_requested(env, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    env.setenv("TRACE_FILE", str(path))
+    exporter = SpanExporter("test")
+    exporter.export(span("a"))
+    exporter.export(span("b"))
+    exporter.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    names = [s["name"] for line in lines for s in line["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    assert names == ["a", "b"]
+    assert exporter.stats["exported"] == 2
+
+
+def test_no_file_when_collector_is_configured(env, tmp_path):
+    env.setenv("TRACE_FILE", str(tmp_path / "traces.jsonl"))
+    env.setenv("TRACE_OTLP_ENDPOINT", "http://collector:4318/v1/traces")
+    exporter = SpanExporter("test")
+    assert exporter.path is None
+    assert exporter.endpoint == "http://collector:4318/v1/traces"
+
+
+def test_file_is_rotated(env, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    env.setenv("TRACE_FILE", str(path))
+    env.setenv("TRACE_FILE_MAX_BYTES", "10")
+    exporter = SpanExporter("test")
+    exporter._write([span("a")])
+    exporter._write([span("b")])
+    exporter._write([span("c")])
+
+    assert sorted(os.listdir(tmp_path)) == ["traces.jsonl", "traces.jsonl.1"]
+    assert '"c"' in path.read_text()
+    assert '"b"' in (tmp_path / "traces.jsonl.1").read_text()